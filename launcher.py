@@ -5,7 +5,7 @@
 #   (works on the PyPI release; dev-only widgets are gracefully downgraded)
 # ------------------------------------------------------------------------------
 
-import sys, os, time, json, subprocess, threading, socket, shutil, sqlite3, signal, webbrowser, pandas as pd
+import sys, os, time, json, subprocess, threading, socket, shutil, signal, webbrowser
 from datetime import datetime
 from collections import defaultdict
 import customtkinter as ctk
@@ -63,22 +63,14 @@ def browser(url: str):
     webbrowser.open_new_tab(url)
 
 # ── audit-log tail ──────────────────────────────────────────────────────────
+# Follows data/logs/audit across rotations (inotify where available, see audit_log.tail)
 def stream_audit_log():
-    log_path = os.path.join("data", "logs", "console_audit.log")
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-    if not os.path.exists(log_path):
-        with open(log_path, "w", encoding="utf-8") as f:
-            f.write("🔍 Audit log initialized.\n")
+    from src.services import audit_log
 
     def _follow():
-        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-            f.seek(0, os.SEEK_END)
-            while True:
-                line = f.readline()
-                if not line:
-                    time.sleep(1)
-                    continue
-                log(line.replace("â€“", "-").replace("â€”", "-"))
+        log("🔍 Following audit log.")
+        for entry in audit_log.tail():
+            log(f"[AUDIT] {entry['who']} - {entry['msg']}")
     threading.Thread(target=_follow, daemon=True).start()
 
 # ── launch / stop server ────────────────────────────────────────────────────
@@ -233,8 +225,10 @@ def render_maintenance_tab(notebook: ctk.CTkTabview, port_var: ctk.StringVar):
     def load_routes():
         for w in scroll.winfo_children(): w.destroy()
         try:
-            from wsgi import get_app
             app = get_app()
+            if app is None:
+                ctk.CTkLabel(scroll, text="Still starting - try again in a moment.").pack()
+                return
             grouped = defaultdict(list)
             with app.app_context():
                 for r in app.url_map.iter_rules():
@@ -261,44 +255,96 @@ def render_maintenance_tab(notebook: ctk.CTkTabview, port_var: ctk.StringVar):
     # db tools
     tools = titled(tab, "Database Tools")
     tools.pack(fill="x", padx=20, pady=10)
-    def run_script(pyfile, done):
-        script = os.path.join(os.path.dirname(__file__), "scripts", pyfile)
+    # Tools run on the in-process job runner; the Tk loop only polls their status
+    job_var = ctk.StringVar(value="No job running.")
+    current = {"id": None}
+
+    # The Flask app (routes list + job runner) is built once on a worker thread while the
+    # window comes up: create_app() runs migrations and index checks that would freeze Tk.
+    # No background schedulers in the GUI process.
+    job_app, app_ready = {}, threading.Event()
+
+    def build_app():
+        try:
+            from src.database import create_app
+            job_app["app"] = create_app()
+        except Exception as e:
+            job_app["error"] = str(e)
+        app_ready.set()
+    threading.Thread(target=build_app, daemon=True).start()
+
+    # None until build_app() finishes; raises if it failed.
+    def get_app():
+        if not app_ready.is_set():
+            return None
+        if "error" in job_app:
+            raise RuntimeError(job_app["error"])
+        return job_app["app"]
+
+    def submit(kind, params, done):
+        if current["id"]:
+            msgbox("Busy", "Another maintenance job is still running.", icon="warning")
+            return
         try:
-            subprocess.run([sys.executable, script], check=True)
-            msgbox("Done", done, icon="check")
-        except subprocess.CalledProcessError as e:
+            from src.services import jobs
+            app = get_app()
+            if app is None:
+                msgbox("Busy", "Maintenance tools are still starting - try again in a moment.", icon="warning")
+                return
+            with app.app_context():
+                job_id = jobs.submit(kind, params, submitted_by="launcher", app=app)
+        except Exception as e:
             msgbox("Error", str(e), icon="cancel")
+            return
+        if not job_id:
+            msgbox("Busy", "Job queue is full - try again shortly.", icon="warning")
+            return
+        current["id"] = job_id
+        cancel_btn.configure(state="normal")
+        tab.after(500, lambda: poll(done))
+
+    def poll(done):
+        from src.services import jobs
+        with get_app().app_context():
+            st = jobs.status(current["id"])
+        pct = int(st["progress"] * 100)
+        job_var.set(f"{st['kind']}: {st['status']} {pct}% — {st['message'] or ''}"[:120])
+        if st["status"] in jobs.FINISHED:
+            current["id"] = None
+            cancel_btn.configure(state="disabled")
+            if st["status"] == jobs.SUCCEEDED:
+                msgbox("Done", done(st), icon="check")
+            elif st["status"] == jobs.FAILED:
+                msgbox("Error", st["error"] or "Job failed.", icon="cancel")
+            return
+        tab.after(500, lambda: poll(done))
+
+    def cancel():
+        if current["id"]:
+            from src.services import jobs
+            with get_app().app_context():
+                jobs.cancel(current["id"])
+
+    def run_script(pyfile, done):
+        submit("script", {"name": pyfile}, lambda st: done)
+
+    def export_db():
+        submit("export_db", {}, lambda st: "Export zip written to /data/jobs/" + st["id"])
+
+    def export_changes():
+        submit("export_changes", {}, lambda st: st["message"] + " → /data/logs")
+
     ctk.CTkButton(tools, text="✂ Split Masterlist",
                   command=lambda: run_script("build_student_periods.py","Masterlist split.")
                   ).pack(pady=3)
     ctk.CTkButton(tools, text="🗄 Rebuild Database",
                   command=lambda: run_script("rebuild_db.py","Database rebuilt.")
                   ).pack(pady=3)
-
-    def export_db():
-        try:
-            db_path, log_dir = "data/hallpass.db", "data/logs"
-            os.makedirs(log_dir, exist_ok=True)
-            today = datetime.now().strftime("%Y%m%d")
-            conn = sqlite3.connect(db_path)
-            for tbl in ["users","student_periods","passes","pass_events","audit_log","active_rooms"]:
-                pd.read_sql(f"SELECT * FROM {tbl}", conn).to_csv(
-                    os.path.join(log_dir, f"{today}_{tbl}.csv"), index=False)
-            # nested JSON
-            dfp = pd.read_sql("SELECT * FROM passes", conn)
-            dfe = pd.read_sql("SELECT * FROM pass_events", conn)
-            grouped={}
-            for _, p in dfp.iterrows():
-                rec = p.to_dict()
-                rec["logs"] = dfe[dfe.pass_id == p.id][["station","event","timestamp"]].to_dict("records")
-                grouped.setdefault(p.student_id, []).append(rec)
-            with open(os.path.join(log_dir, f"{today}_passlog.json"), "w") as fh:
-                json.dump(grouped, fh, indent=2)
-            conn.close()
-            msgbox("Export", "CSV + JSON written to /data/logs", icon="check")
-        except Exception as e:
-            msgbox("Error", str(e), icon="cancel")
     ctk.CTkButton(tools, text="⬇ Export DB", command=export_db).pack(pady=3)
+    ctk.CTkButton(tools, text="🔁 Export Changes", command=export_changes).pack(pady=3)
+    ctk.CTkLabel(tools, textvariable=job_var, anchor="w").pack(fill="x", pady=(6,0))
+    cancel_btn = ctk.CTkButton(tools, text="✖ Cancel Job", command=cancel, state="disabled")
+    cancel_btn.pack(pady=3)
 
 # ── MAIN GUI ────────────────────────────────────────────────────────────────
 def build_gui():
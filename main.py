@@ -1,4 +1,5 @@
 from src.database import create_app
+from werkzeug.serving import WSGIRequestHandler
 from threading import Thread
 from datetime import datetime, timezone
 import json, os, time, sys
@@ -9,7 +10,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "vendor"))
 def get_app():
     global _app
     if _app is None:
-        _app = create_app()
+        _app = create_app({"HALLPASS_BACKGROUND": True})
     return _app
 
 
@@ -19,6 +20,9 @@ if __name__ == "__main__":
 
     debug_enabled = os.getenv("DEBUG", "").lower() in {"1", "true", "yes"}
 
+    # Keep-alive for kiosks posting swipes back-to-back (waitress already speaks HTTP/1.1)
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+
     app.run(
         host="0.0.0.0",
         port=5000,
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# scripts/export_changes.py
+# Incremental change-feed export: writes every change since the last run to
+# data/logs/YYYYMMDD_HHMMSS_changes_<first>-<last>.csv and advances data/logs/changes_cursor.json.
+#
+#   python scripts/export_changes.py              # since the saved cursor
+#   python scripts/export_changes.py --since 0    # everything still in the feed
+
+import os, sys, argparse
+
+# ─── Path Setup ─────────────────────────────────────────────────────────────
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+from src.database import create_app
+from src.services import changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export change-feed rows added since the last export")
+    parser.add_argument("--since", type=int, help="start after this seq instead of the saved cursor")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        out = changes.export(args.since)
+
+    if not out["path"]:
+        print(f"✅ No changes since #{out['from']}")
+    else:
+        print(f"✅ Wrote {out['rows']} changes (#{out['from'] + 1}-#{out['to']}) to {out['path']}")
+
+if __name__ == "__main__":
+    main()
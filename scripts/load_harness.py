@@ -0,0 +1,838 @@
+#!/usr/bin/env python3
+# scripts/load_harness.py
+# Concurrency / load harness. Every scenario runs against a scratch SQLite file,
+# never data/hallpass.db.
+#
+#   python scripts/load_harness.py transitions [--threads 32] [--rounds 25]
+#   python scripts/load_harness.py open-pass   [--threads 32] [--rounds 25]
+#   python scripts/load_harness.py capacity    [--threads 32] [--rounds 25]
+#   python scripts/load_harness.py login       [--threads 8] [--users 400] [--method pbkdf2:sha256:260000]
+#   python scripts/load_harness.py rollover    [--days 365] [--per-day 300] [--dry-run]
+#   python scripts/load_harness.py analytics   [--passes 1000000] [--days 180] [--no-events]
+#   python scripts/load_harness.py swipe       [--swipes 2000] [--students 200]
+#   python scripts/load_harness.py snapshot    [--passes 300000] [--rate 20]
+#   python scripts/load_harness.py reports     [--passes 300000] [--rate 20] [--seconds 20]
+#   python scripts/load_harness.py audit       [--entries 1000000] [--pages 3]
+#   python scripts/load_harness.py directory   [--students 5000]
+#   python scripts/load_harness.py passroom    [--students 30] [--open 3]
+#   python scripts/load_harness.py weekly      [--passes 500000] [--students 1000]
+#   python scripts/load_harness.py reset       [--open 1500] [--rooms 40]
+
+import os, sys, argparse, tempfile, threading, time, contextlib, random, shutil, uuid
+from datetime import datetime, timedelta
+from sqlalchemy import event, select, func
+
+# ─── Path Setup ─────────────────────────────────────────────────────────────
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)  # config.json and log paths are relative to the repo root
+
+from src.database  import create_app
+from src.models    import db, User, Pass, PassEvent, PassArchive, PassEventArchive, AuditLog, StudentPeriod, ActiveRoom, RoomSlot, DailyRoomStat
+from src.services  import pass_manager, capacity, login, rollover, analytics, snapshots, replica, audit_log, audit_search, passroom, rollups, hot_store
+from src           import utils
+
+
+# ─── Helpers ────────────────────────────────────────────────────────────────
+def scratch_app():
+    fd, path = tempfile.mkstemp(prefix="hallpass_harness_", suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    audit_log.LOG_DIR = path + ".audit"  # keep data/logs clean
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    return app, path
+
+def cleanup(path):
+    for f in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(f):
+            os.remove(f)
+    shutil.rmtree(audit_log.LOG_DIR, ignore_errors=True)
+
+def seed_students(app, count, hashed=False):
+    ids = [f"S{i:05d}" for i in range(count)]
+    passwords = login.hash_many(ids) if hashed else ["x"] * count
+    with app.app_context():
+        db.session.bulk_insert_mappings(User, [
+            {"id": sid, "name": f"Student {sid}", "email": f"{sid}@example.org",
+             "role": "student", "password": pw}
+            for sid, pw in zip(ids, passwords)
+        ])
+        db.session.commit()
+
+def hammer(app, threads, fn):
+    # Release every worker at once so they all race on the same row.
+    # fn receives the worker index (0..threads-1).
+    barrier = threading.Barrier(threads)
+    wins, errors = [], []
+    ids = iter(range(threads))
+
+    def worker():
+        n = next(ids)
+        with app.app_context():
+            barrier.wait()
+            try:
+                if fn(n):
+                    wins.append(1)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):  # mute [AUDIT] echo
+        for t in pool: t.start()
+        for t in pool: t.join()
+    return len(wins), errors
+
+
+# ─── Scenario: racing lifecycle transitions on one pass ─────────────────────
+def run_transitions(args):
+    app, path = scratch_app()
+    seed_students(app, 1)
+    failures = 0
+    started = time.perf_counter()
+
+    for rnd in range(args.rounds):
+        with app.app_context():
+            p = Pass(student_id="S00000", date=datetime.now().date(), period="1",
+                     checkout_at=datetime.now(), origin_room="101",
+                     status=pass_manager.STATUS_PENDING_START)
+            db.session.add(p)
+            db.session.commit()
+            pass_id = p.id
+
+        def load():
+            return db.session.get(Pass, pass_id)
+
+        stages = [
+            ("approve", lambda _: pass_manager.approve_pass(pass_id)),
+            ("request_return", lambda _: pass_manager.request_return(pass_id)),
+            ("resume", lambda _: pass_manager.resume_pass(pass_id)),
+            ("return", lambda _: pass_manager.return_pass(load())),
+        ]
+        for label, fn in stages:
+            won, errors = hammer(app, args.threads, fn)
+            if won != 1 or errors:
+                failures += 1
+                print(f"❌ round {rnd} {label}: {won} winners, {len(errors)} errors {errors[:1]}")
+
+        with app.app_context():
+            final = db.session.get(Pass, pass_id)
+            if final.status != pass_manager.STATUS_RETURNED or final.total_pass_time is None:
+                failures += 1
+                print(f"❌ round {rnd}: final state {final.status} / {final.total_pass_time}")
+
+    elapsed = time.perf_counter() - started
+    cleanup(path)
+    print(f"{'✅' if not failures else '❌'} transitions: {args.rounds} rounds × "
+          f"{args.threads} threads in {elapsed:.2f}s — {failures} failures")
+    return 1 if failures else 0
+
+
+# ─── Scenario: many creates for one student, exactly one open pass ─────────
+def run_open_pass(args):
+    app, path = scratch_app()
+    seed_students(app, 1)
+    failures = 0
+    started = time.perf_counter()
+
+    for rnd in range(args.rounds):
+        won, errors = hammer(app, args.threads, lambda _: pass_manager.open_pass(
+            "S00000", "101", "1", status=pass_manager.STATUS_ACTIVE)[1])
+        with app.app_context():
+            open_count = Pass.query.filter_by(student_id="S00000", checkin_at=None).count()
+            if won != 1 or errors or open_count != 1:
+                failures += 1
+                print(f"❌ round {rnd}: {won} created, {open_count} open, {len(errors)} errors {errors[:1]}")
+            with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+                for p in Pass.query.filter_by(student_id="S00000", checkin_at=None):
+                    pass_manager.return_pass(p)
+
+    elapsed = time.perf_counter() - started
+    cleanup(path)
+    print(f"{'✅' if not failures else '❌'} open-pass: {args.rounds} rounds × "
+          f"{args.threads} threads in {elapsed:.2f}s — {failures} failures")
+    return 1 if failures else 0
+
+
+# ─── Scenario: bell-time burst of self-checkouts against one room ──────────
+def run_capacity(args):
+    app, path = scratch_app()
+    seed_students(app, args.threads)
+    limit = capacity.capacity_for("101")
+    failures = 0
+    started = time.perf_counter()
+
+    for rnd in range(args.rounds):
+        won, errors = hammer(app, args.threads, lambda n: pass_manager.open_pass(
+            f"S{n:05d}", "101", "1", status=pass_manager.STATUS_ACTIVE, reserve_slot=True)[1])
+        with app.app_context():
+            open_passes = Pass.query.filter_by(origin_room="101", checkin_at=None).all()
+            if won != limit or errors or len(open_passes) != limit:
+                failures += 1
+                print(f"❌ round {rnd}: {won} created, {len(open_passes)} open, limit {limit}, "
+                      f"{len(errors)} errors {errors[:1]}")
+            with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+                for p in open_passes:
+                    pass_manager.return_pass(p)
+
+    elapsed = time.perf_counter() - started
+    cleanup(path)
+    print(f"{'✅' if not failures else '❌'} capacity: {args.rounds} rounds × "
+          f"{args.threads} swipes (limit {limit}) in {elapsed:.2f}s — {failures} failures")
+    return 1 if failures else 0
+
+
+# ─── Benchmark: morning login rush ─────────────────────────────────────────
+def run_login(args):
+    if args.method:
+        login.set_hash_method(args.method)
+    app, path = scratch_app()
+    seed_students(app, args.users, hashed=True)
+    users = [f"S{i:05d}" for i in range(args.users)]
+
+    def rush(label):
+        chunks = [users[i::args.threads] for i in range(args.threads)]
+        codes = {}
+        lock = threading.Lock()
+
+        def worker(n):
+            client = app.test_client()
+            for sid in chunks[n]:
+                # One device per student, so per-IP limits behave like a real rush
+                r = client.post("/", data={"user": sid, "password": sid},
+                                environ_base={"REMOTE_ADDR": f"10.{n}.{int(sid[1:]) // 250}.{int(sid[1:]) % 250}"})
+                with lock:
+                    codes[r.status_code] = codes.get(r.status_code, 0) + 1
+
+        started = time.perf_counter()
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+        with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            for t in pool: t.start()
+            for t in pool: t.join()
+        elapsed = time.perf_counter() - started
+        print(f"   {label:<6} {len(users) / elapsed:8.1f} logins/s  ({elapsed:.2f}s, status {codes})")
+        return codes
+
+    print(f"🔐 login rush: {args.users} users × {args.threads} threads, "
+          f"method {login.METHOD_PREFIX}, {login.HASH_WORKERS} hash workers")
+    cold = rush("cold")
+    warm = rush("warm")   # verification cache hits
+    cleanup(path)
+    return 0 if set(cold) | set(warm) <= {302} else 1
+
+
+# ─── Benchmark: nightly rollover over a year of history ─────────────────────
+def seed_history(app, days, per_day, students):
+    rng = random.Random(7)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    pass_id = 0
+    with app.app_context():
+        for d in range(days, 0, -1):
+            day = today - timedelta(days=d)
+            passes, events, audits = [], [], []
+            for _ in range(per_day):
+                pass_id += 1
+                sid = f"S{rng.randrange(students):05d}"
+                out = day + timedelta(hours=8, seconds=rng.randrange(7 * 3600))
+                back = out + timedelta(seconds=rng.randrange(60, 1500))
+                mid = out + (back - out) / 2
+                passes.append({"id": pass_id, "student_id": sid, "date": day.date(), "period": "1",
+                               "checkout_at": out, "checkin_at": back, "origin_room": "101",
+                               "room_in": "101", "is_override": False, "status": "returned",
+                               "total_pass_time": int((back - out).total_seconds())})
+                events += [{"pass_id": pass_id, "station": "Bathroom", "event": "in", "timestamp": mid},
+                           {"pass_id": pass_id, "station": "Bathroom", "event": "out", "timestamp": mid + timedelta(seconds=90)}]
+                audits += [{"student_id": sid, "time": t, "reason": r}
+                           for t, r in ((out, "Created pass"), (out, "Approved pass"), (back, "Returned pass"))]
+            db.session.execute(Pass.__table__.insert(), passes)
+            db.session.execute(PassEvent.__table__.insert(), events)
+            db.session.execute(AuditLog.__table__.insert(), audits)
+            db.session.commit()
+    return pass_id
+
+def run_rollover(args):
+    app, path = scratch_app()
+    rollover.ARCHIVE_DIR = path + ".archive"
+    seed_students(app, 800)
+    started = time.perf_counter()
+    total = seed_history(app, args.days, args.per_day, 800)
+    print(f"🗓️  seeded {total} passes / {2 * total} events / {3 * total} audit rows "
+          f"over {args.days} days in {time.perf_counter() - started:.1f}s")
+
+    with app.app_context():
+        with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            summary = rollover.run(dry_run=args.dry_run)              # first run: whole backlog
+            nightly = rollover.run(now=datetime.now() + timedelta(days=1),
+                                   dry_run=args.dry_run)               # steady state: one day ages out
+        left = Pass.query.count()
+
+    archived = sum(os.path.getsize(os.path.join(rollover.ARCHIVE_DIR, f))
+                   for f in os.listdir(rollover.ARCHIVE_DIR)) if os.path.isdir(rollover.ARCHIVE_DIR) else 0
+    print(f"🌙 catch-up{' (dry run)' if args.dry_run else ''}: {summary['seconds']:.2f}s, "
+          f"batch {rollover.BATCH_SIZE}, {summary['archived_passes']} passes / {summary['archived_events']} events / "
+          f"{summary['archived_audit']} audit rows past {summary['cutoff']}; "
+          f"{left} passes left, {archived / 1e6:.1f} MB archived, db {os.path.getsize(path) / 1e6:.1f} MB")
+    print(f"   nightly: {nightly['seconds']:.3f}s for {nightly['archived_passes']} passes / "
+          f"{nightly['archived_audit']} audit rows")
+    shutil.rmtree(rollover.ARCHIVE_DIR, ignore_errors=True)
+    cleanup(path)
+    return 0
+
+
+# ─── Benchmark: analytics over a large pass history ────────────────────────
+def seed_archive(app, total, days, students, rooms, with_events, chunk=20000):
+    rng = random.Random(11)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    with app.app_context():
+        for base in range(0, total, chunk):
+            passes, events = [], []
+            for i in range(base + 1, min(total, base + chunk) + 1):
+                day = today - timedelta(days=rng.randrange(1, days + 1))
+                out = day + timedelta(hours=8, seconds=rng.randrange(7 * 3600))
+                secs = int(rng.expovariate(1 / 420)) + 30
+                back = out + timedelta(seconds=secs)
+                room = rooms[rng.randrange(len(rooms))]
+                passes.append({"id": i, "student_id": f"S{rng.randrange(students):05d}", "date": day.date(),
+                               "period": str(1 + (out.hour - 8)), "checkout_at": out, "checkin_at": back,
+                               "origin_room": room, "room_in": room, "is_override": rng.random() < 0.02,
+                               "status": "returned", "total_pass_time": secs})
+                if with_events:
+                    mid = out + timedelta(seconds=secs // 3)
+                    events += [{"pass_id": i, "station": "Bathroom", "event": "in", "timestamp": mid},
+                               {"pass_id": i, "station": "Bathroom", "event": "out", "timestamp": mid + timedelta(seconds=secs // 3)}]
+            db.session.execute(PassArchive.__table__.insert(), passes)
+            if events:
+                db.session.execute(PassEventArchive.__table__.insert(), events)
+            db.session.commit()
+
+def run_analytics(args):
+    app, path = scratch_app()
+    seed_students(app, 2000)
+    started = time.perf_counter()
+    seed_archive(app, args.passes, args.days, 2000, [str(r) for r in range(101, 141)], not args.no_events)
+    print(f"🗓️  seeded {args.passes} archived passes over {args.days} days in {time.perf_counter() - started:.1f}s")
+
+    end = datetime.now().date()
+    start = end - timedelta(days=args.days)
+    with app.app_context():
+        t0 = time.perf_counter()
+        f = analytics.load(start, end)
+        timings = {"load": time.perf_counter() - t0}
+        for name, fn in (("summary", lambda: analytics.summary(f)),
+                         ("by_room", lambda: analytics.percentiles_by(f.room, f.room_labels, f.duration)),
+                         ("by_period", lambda: analytics.percentiles_by(f.period, f.period_labels, f.duration)),
+                         ("heatmap", lambda: analytics.heatmap(f)),
+                         ("utilization", lambda: analytics.utilization(f)),
+                         ("outliers", lambda: analytics.outliers(f))):
+            t0 = time.perf_counter()
+            result = fn()
+            timings[name] = time.perf_counter() - t0
+    stats = sum(v for k, v in timings.items() if k != "load")
+    print(f"📊 {len(f)} passes: load {timings['load']:.2f}s, statistics {stats * 1000:.0f} ms "
+          f"({', '.join(f'{k} {v * 1000:.0f}' for k, v in timings.items() if k != 'load')} ms)")
+    print(f"   p50/p90/p99 {analytics.summary(f)['p50']}/{analytics.summary(f)['p90']}/{analytics.summary(f)['p99']}s, "
+          f"{len(result)} outlier students")
+    cleanup(path)
+    return 0
+
+
+# ─── Benchmark: kiosk swipes, form POST vs JSON ────────────────────────────
+# A classroom kiosk: each student's first swipe self-checks-out, the second
+# returns the pass, so every swipe is a real write.
+def time_swipes(app, count, students, send):
+    client = app.test_client()
+    client.get("/station_view/101")
+    client.get("/station_console")
+    ids = [f"S{i:05d}" for i in range(students)]
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        lat = []
+        for i in range(count):
+            t0 = time.perf_counter()
+            send(client, ids[(i // 2) % students])
+            lat.append(time.perf_counter() - t0)
+    lat.sort()
+    return count / sum(lat), lat[len(lat) // 2] * 1000, lat[int(len(lat) * 0.95)] * 1000
+
+def run_swipe(args):
+    paths = {
+        "form POST /station_console": lambda c, sid: c.post("/station_console", data={"student_id": sid}),
+        "JSON /station_swipe":        lambda c, sid: c.post("/station_swipe", json={"student_id": sid}),
+        "JSON /station_swipe + key":  lambda c, sid: c.post("/station_swipe", json={"student_id": sid,
+                                                                                  "key": uuid.uuid4().hex}),
+    }
+    for label, send in paths.items():
+        app, path = scratch_app()
+        seed_students(app, args.students)
+        rate, p50, p95 = time_swipes(app, args.swipes, args.students, send)
+        print(f"🪪 {label:28s} {rate:7.1f} swipes/s   p50 {p50:6.2f} ms   p95 {p95:6.2f} ms")
+        cleanup(path)
+    return 0
+
+
+# ─── Benchmark: swipe latency while a snapshot is taken ────────────────────
+# One thread swipes at a steady kiosk rate while the main thread snapshots the
+# DB, first with the live file in rollback-journal mode, then in WAL mode.
+def run_snapshot(args):
+    app, path = scratch_app()
+    seed_students(app, args.students)
+    seed_archive(app, args.passes, 180, args.students, [str(r) for r in range(101, 141)], True)
+    print(f"🗄️  live DB {os.path.getsize(path) / 2**20:.0f} MB, kiosk at {args.rate:g} swipes/s")
+
+    client = app.test_client()
+    client.get("/station_view/101")
+    client.get("/station_console")
+    ids = [f"S{i:05d}" for i in range(args.students)]
+
+    for mode in ("delete", "wal"):
+        with app.app_context():
+            db.engine.dispose()
+            with db.engine.connect() as conn:
+                conn.exec_driver_sql(f"PRAGMA journal_mode={mode}")
+        samples, stop = [], threading.Event()
+
+        def swiper():
+            i = 0
+            with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+                while not stop.is_set():
+                    t0 = time.perf_counter()
+                    client.post("/station_swipe", json={"student_id": ids[(i // 2) % args.students]})
+                    samples.append((t0, time.perf_counter() - t0))
+                    i += 1
+                    time.sleep(max(0.0, 1 / args.rate - (time.perf_counter() - t0)))
+
+        def window(t_from, t_to):   # swipes in flight at any point of [t_from, t_to)
+            lat = sorted(l for t, l in samples if t < t_to and t + l >= t_from)
+            if not lat:
+                return "no swipes"
+            return (f"{len(lat):4d} swipes   p50 {lat[len(lat) // 2] * 1000:6.2f} ms   "
+                    f"p99 {lat[int(len(lat) * 0.99)] * 1000:7.2f} ms")
+
+        thread = threading.Thread(target=swiper, daemon=True)
+        thread.start()
+        t_base = time.perf_counter()
+        time.sleep(args.baseline)
+        t_snap = time.perf_counter()
+        dst = path + ".snap"
+        stats = snapshots.backup(path, dst)
+        t_done = time.perf_counter()
+        os.remove(dst)
+        time.sleep(args.baseline)
+        stop.set()
+        thread.join()
+
+        print(f"🪪 {mode:6s} baseline        {window(t_base, t_snap)}")
+        print(f"📸 {mode:6s} snapshot {t_done - t_snap:5.2f}s {window(t_snap, t_done)}"
+              f"   ({stats['steps']} steps, {stats['restarts']} restarts)")
+    cleanup(path)
+    return 0
+
+
+# ─── Benchmark: swipe latency under semester reports ───────────────────────
+# Kiosk swipes at a steady rate while two admins pull semester analytics and
+# weekly CSVs back to back: once with reports on the primary pool, once routed
+# through @read_only to the read-only replica engine.
+def run_reports(args):
+    app, path = scratch_app()
+    seed_students(app, args.students)
+    seed_archive(app, args.passes, 180, args.students, [str(r) for r in range(101, 141)], True)
+    start = (datetime.now() - timedelta(days=180)).date().isoformat()
+    routed, slots = replica.engine_for, replica._slots
+    unrouted = lambda *a: (db.engine, "primary")
+
+    kiosk = app.test_client()
+    kiosk.get("/station_view/101")
+    kiosk.get("/station_console")
+    ids = [f"S{i:05d}" for i in range(args.students)]
+
+    # Baseline without reports; reports on the primary pool, ungated; reports routed
+    runs = (("no reports", unrouted, slots, 0), ("primary pool", unrouted, threading.BoundedSemaphore(64), 2),
+            ("read replica", routed, slots, 2))
+    for label, engine_for, gate, n_reporters in runs:
+        replica.engine_for, replica._slots = engine_for, gate
+        lat, reports, stop = [], [], threading.Event()
+
+        def swiper():
+            i = 0
+            with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+                while not stop.is_set():
+                    t0 = time.perf_counter()
+                    kiosk.post("/station_swipe", json={"student_id": ids[(i // 2) % args.students]})
+                    lat.append(time.perf_counter() - t0)
+                    i += 1
+                    time.sleep(max(0.0, 1 / args.rate - (time.perf_counter() - t0)))
+
+        def reporter():
+            admin = app.test_client()
+            with admin.session_transaction() as s:
+                s["logged_in"], s["role"] = True, "admin"
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                admin.get(f"/admin_analytics_data?start={start}")
+                admin.get("/admin_report_csv")
+                reports.append(time.perf_counter() - t0)
+
+        threads = [threading.Thread(target=swiper)] + [threading.Thread(target=reporter) for _ in range(n_reporters)]
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        lat.sort()
+        print(f"🪪 {label:12s} {len(lat):4d} swipes   p50 {lat[len(lat) // 2] * 1000:6.2f} ms   "
+              f"p99 {lat[int(len(lat) * 0.99)] * 1000:7.2f} ms   "
+              f"({len(reports)} report rounds, {sum(reports) / max(len(reports), 1):.2f}s each)")
+    replica.engine_for, replica._slots = routed, slots
+    cleanup(path)
+    return 0
+
+
+# ─── Benchmark: audit search over a year of audit_log ──────────────────────
+# Messages shaped like the ones pass_manager and the routes write, inserted through
+# the FTS triggers. Each query goes through the /admin_audit/search endpoint.
+def seed_audit(app, total, days, students, rooms, chunk=20000):
+    rng = random.Random(5)
+    start = datetime.now() - timedelta(days=days)
+    step = days * 86400 / total
+    shapes = (
+        lambda p, r: f"Created pass for room {r}",
+        lambda p, r: f"OUT at Bathroom (pass {p})",
+        lambda p, r: f"IN at Bathroom (pass {p})",
+        lambda p, r: f"Returned pass {p} at {r}",
+        lambda p, r: f"Approved pass {p}",
+        lambda p, r: f"Pass {p} overdue (15 min from {r})",
+        lambda p, r: f"Denied room access to {r}",
+    )
+    with app.app_context():
+        for base in range(0, total, chunk):
+            rows = []
+            for i in range(base, min(total, base + chunk)):
+                reason = shapes[rng.randrange(len(shapes))](i // 5 + 1, rooms[rng.randrange(len(rooms))])
+                rows.append({"student_id": f"S{rng.randrange(students):05d}", "reason": reason,
+                             "time": start + timedelta(seconds=i * step), **audit_search.parse(reason)})
+            db.session.execute(AuditLog.__table__.insert(), rows)
+            db.session.commit()
+
+def run_audit(args):
+    app, path = scratch_app()
+    seed_students(app, args.students)
+    started = time.perf_counter()
+    seed_audit(app, args.entries, 365, args.students, [str(r) for r in range(101, 141)])
+    print(f"🗂️  seeded {args.entries} audit entries over 365 days in {time.perf_counter() - started:.1f}s")
+
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s["logged_in"], s["role"] = True, "admin"
+    month = (datetime.now() - timedelta(days=120)).date()
+    queries = (
+        ("newest page", ""),
+        ("student", "student=S00042"),
+        ("student + text", "student=S00042&q=overdue"),
+        ("action + room", "action=pass_overdue&room=117"),
+        ("pass id", f"pass_id={args.entries // 10}"),
+        ("text", "q=overdue 117"),
+        ("text, rare", f"q=pass {args.entries // 10}"),
+        ("text, one month", f"q=bathroom&start={month}&end={month + timedelta(days=30)}"),
+        ("student, one month", f"student=S00042&start={month}&end={month + timedelta(days=30)}"),
+    )
+    for label, qs in queries:
+        times, found, before = [], 0, ""
+        for _ in range(args.pages):
+            t0 = time.perf_counter()
+            body = admin.get(f"/admin_audit/search?{qs}&limit=50{before}").get_json()
+            times.append(time.perf_counter() - t0)
+            found += len(body["results"])
+            if body["next"] is None:
+                break
+            before = f"&before={body['next']}"
+        print(f"🔎 {label:20s} {found:4d} rows / {len(times)} pages   "
+              f"first {times[0] * 1000:6.2f} ms   worst {max(times) * 1000:6.2f} ms")
+
+    # Before: the rare text query as a LIKE over reason, newest first
+    with app.app_context():
+        t0 = time.perf_counter()
+        AuditLog.query.filter(AuditLog.reason.like(f"%pass {args.entries // 10}%")).order_by(AuditLog.time.desc()).limit(50).all()
+        print(f"🐢 LIKE scan for the same text query: {(time.perf_counter() - t0) * 1000:.0f} ms")
+    cleanup(path)
+    return 0
+
+
+# ─── Benchmark: student directory type-ahead ───────────────────────────────
+# Each keystroke of a few searches, plus paging the whole roster, through
+# /students/directory. The first request pays for building the index.
+def run_directory(args):
+    app, path = scratch_app()
+    rng = random.Random(3)
+    first = ["Ana", "Ben", "Chloe", "Diego", "Emma", "Farah", "Gus", "Hana", "Ivan", "Jada", "Liam", "Mia"]
+    last = ["Lee", "Smith", "Garcia", "Nguyen", "Patel", "Kim", "Brown", "Lopez", "Khan", "Rossi"]
+    with app.app_context():
+        db.session.bulk_insert_mappings(User, [
+            {"id": f"{100000 + i}", "name": f"{rng.choice(first)} {rng.choice(last)}-{i}",
+             "email": f"{i}@example.org", "role": "student", "password": "x"} for i in range(args.students)])
+        db.session.bulk_insert_mappings(StudentPeriod, [
+            {"student_id": f"{100000 + i}", "period": str(p), "room": str(101 + rng.randrange(40))}
+            for i in range(args.students) for p in range(1, 8)])
+        db.session.commit()
+
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s["logged_in"], s["role"] = True, "admin"
+    t0 = time.perf_counter()
+    admin.get("/students/directory?limit=1")
+    print(f"📇 {args.students} students: index built on first request in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    for typed in ("1000", "mia", "nguy", "emma lo"):
+        times = []
+        for n in range(1, len(typed) + 1):
+            t0 = time.perf_counter()
+            found = admin.get(f"/students/directory?limit=10&q={typed[:n]}").get_json()["students"]
+            times.append(time.perf_counter() - t0)
+        print(f"⌨️  typing {typed!r:10s} {len(typed)} keystrokes   worst {max(times) * 1000:5.2f} ms   "
+              f"mean {sum(times) / len(times) * 1000:5.2f} ms   ({len(found)} shown)")
+
+    times, after, rows = [], "", 0
+    while True:
+        t0 = time.perf_counter()
+        body = admin.get(f"/students/directory?limit=100&after={after}").get_json()
+        times.append(time.perf_counter() - t0)
+        rows += len(body["students"])
+        if not body["next"]:
+            break
+        after = body["next"]
+    print(f"📄 paged {rows} students in {len(times)} pages   worst {max(times) * 1000:5.2f} ms   "
+          f"mean {sum(times) / len(times) * 1000:5.2f} ms")
+    cleanup(path)
+    return 0
+
+
+# ─── Benchmark: a class opening /passroom at the bell ──────────────────────
+# Every student in one room loads the pass page at once, with a few passes out.
+# Counts the slot-grid queries (the rest is each student's own session lookups),
+# cached view model vs. rebuilding it on every request (TTL 0).
+def run_passroom(args):
+    app, path = scratch_app()
+    seed_students(app, args.students)
+    ids = [f"S{i:05d}" for i in range(args.students)]
+    utils.PERIODS = [("1", datetime.min.time(), datetime.max.time())]   # always period 1
+    with app.app_context():
+        db.session.bulk_insert_mappings(StudentPeriod, [{"student_id": sid, "period": "1", "room": "101"} for sid in ids])
+        db.session.add(ActiveRoom(room="101"))
+        db.session.commit()
+        for sid in ids[:args.open]:
+            pass_manager.open_pass(sid, "101", "1")
+
+    grid_queries = []
+    def count(conn, cursor, statement, *a):
+        if "FROM passes LEFT OUTER JOIN users" in statement:
+            grid_queries.append(1)
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", count)
+
+    clients = []
+    for sid in ids:
+        c = app.test_client()
+        with c.session_transaction() as s:
+            s["logged_in"], s["role"], s["student_id"] = True, "student", sid
+        clients.append(c)
+
+    ttl = passroom.TTL_S
+    for label, ttl_s in (("rebuilt per request", 0), ("shared view model", ttl)):
+        passroom.TTL_S = ttl_s
+        passroom.invalidate()
+        grid_queries.clear()
+        lat = []
+        def load(c):
+            t0 = time.perf_counter()
+            c.get("/passroom/101")
+            lat.append(time.perf_counter() - t0)
+        threads = [threading.Thread(target=load, args=(c,)) for c in clients]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - t0
+        lat.sort()
+        print(f"🔔 {label:20s} {len(lat)} page loads in {wall * 1000:6.0f} ms   "
+              f"p50 {lat[len(lat) // 2] * 1000:6.2f} ms   {len(grid_queries)} grid queries")
+    passroom.TTL_S = ttl
+    cleanup(path)
+    return 0
+
+
+# ─── Benchmark: weekly summary page over a large pass history ──────────────
+# Cold (first hit after a return) vs memoized, for each filter combination.
+def run_weekly(args):
+    app, path = scratch_app()
+    seed_students(app, args.students)
+    started = time.perf_counter()
+    seed_archive(app, args.passes, 365, args.students, [str(r) for r in range(101, 141)], False)
+    with app.app_context():
+        rollups.rebuild()
+    print(f"🗓️  seeded {args.passes} archived passes + rollups in {time.perf_counter() - started:.1f}s")
+
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s["logged_in"], s["role"] = True, "admin"
+    week = (datetime.now() - timedelta(days=30)).date().isoformat()
+    for label, qs in (("all students", f"week={week}"), ("one room", f"week={week}&room=117"),
+                      ("one student", f"week={week}&student=S00042"),
+                      ("student + room", f"week={week}&student=S00042&room=117")):
+        rollups.invalidate()
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            admin.get(f"/admin_weekly_summary?{qs}")
+            times.append(time.perf_counter() - t0)
+        print(f"📋 {label:15s} cold {times[0] * 1000:7.2f} ms   memoized {min(times[1:]) * 1000:6.2f} ms")
+    cleanup(path)
+    return 0
+
+
+# ─── Benchmark: whole-building reset after a fire drill ─────────────────────
+# Every student out at once across the building, some with station swipes. Closes
+# them all one admin_checkin at a time (the old workaround), then with a single
+# /admin_rooms/reset, each on a fresh DB, and checks both leave the same state.
+def run_reset(args):
+    results = {}
+    for label in ("one admin_checkin per pass", "one /admin_rooms/reset"):
+        app, path = scratch_app()
+        seed_students(app, args.open)
+        now = datetime.now()
+        with app.app_context():
+            db.session.bulk_insert_mappings(Pass, [
+                {"id": i + 1, "student_id": f"S{i:05d}", "date": now.date(), "period": "1",
+                 "origin_room": str(101 + i % args.rooms), "status": "active",
+                 "checkout_at": now - timedelta(minutes=random.randint(1, 30)), "is_override": False}
+                for i in range(args.open)
+            ])
+            db.session.bulk_insert_mappings(PassEvent, [
+                {"pass_id": i + 1, "station": "Library", "event": ev,
+                 "timestamp": now - timedelta(minutes=m)}
+                for i in range(0, args.open, 4) for ev, m in (("in", 10), ("out", 5))
+            ])
+            db.session.commit()
+            capacity.rebuild()
+            hot_store.load()
+
+        admin = app.test_client()
+        with admin.session_transaction() as s:
+            s["logged_in"], s["role"] = True, "admin"
+        t0 = time.perf_counter()
+        if label.startswith("one admin_checkin"):
+            for pass_id in range(1, args.open + 1):
+                admin.post(f"/admin_checkin/{pass_id}")
+            cleared = args.open
+        else:
+            cleared = admin.post("/admin_rooms/reset", json={"all": True}).get_json()["cleared"]
+        elapsed = time.perf_counter() - t0
+
+        with app.app_context():
+            results[label] = (
+                db.session.scalar(select(func.count()).where(Pass.checkin_at.is_(None))),
+                db.session.scalar(select(func.sum(RoomSlot.in_use))),
+                hot_store.open_count(),
+                db.session.scalar(select(func.count(AuditLog.id))),
+                db.session.execute(select(func.sum(DailyRoomStat.passes), func.sum(DailyRoomStat.station_seconds))).one(),
+            )
+        print(f"🚨 {label:27s} {cleared} passes in {elapsed * 1000:8.1f} ms   "
+              f"(open {results[label][0]}, slots in use {results[label][1]}, hot {results[label][2]}, "
+              f"audit rows {results[label][3]}, rollup passes/station s {tuple(results[label][4])})")
+        cleanup(path)
+
+    a, b = results.values()
+    same = a[:3] == b[:3] and tuple(a[4]) == tuple(b[4])
+    print("✅ same end state" if same else "❌ end states differ")
+    return 0 if same else 1
+
+
+# ─── Entry Point ────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Hall-pass load / concurrency harness")
+    sub = parser.add_subparsers(dest="scenario", required=True)
+
+    t = sub.add_parser("transitions", help="race pass lifecycle transitions from many threads")
+    t.add_argument("--threads", type=int, default=32)
+    t.add_argument("--rounds", type=int, default=25)
+    t.set_defaults(func=run_transitions)
+
+    o = sub.add_parser("open-pass", help="race pass creation for one student from many threads")
+    o.add_argument("--threads", type=int, default=32)
+    o.add_argument("--rounds", type=int, default=25)
+    o.set_defaults(func=run_open_pass)
+
+    c = sub.add_parser("capacity", help="burst of self-checkouts from distinct students on one room")
+    c.add_argument("--threads", type=int, default=32)
+    c.add_argument("--rounds", type=int, default=25)
+    c.set_defaults(func=run_capacity)
+
+    l = sub.add_parser("login", help="benchmark logins/second during a morning rush")
+    l.add_argument("--threads", type=int, default=8)
+    l.add_argument("--users", type=int, default=400)
+    l.add_argument("--method", help="werkzeug hash method to benchmark, e.g. pbkdf2:sha256:260000")
+    l.set_defaults(func=run_login)
+
+    r = sub.add_parser("rollover", help="time the nightly rollover against a year of synthetic history")
+    r.add_argument("--days", type=int, default=365)
+    r.add_argument("--per-day", type=int, default=300)
+    r.add_argument("--dry-run", action="store_true")
+    r.set_defaults(func=run_rollover)
+
+    a = sub.add_parser("analytics", help="time the analytics engine over a large synthetic pass history")
+    a.add_argument("--passes", type=int, default=1_000_000)
+    a.add_argument("--days", type=int, default=180)
+    a.add_argument("--no-events", action="store_true", help="skip station events (faster seeding)")
+    a.set_defaults(func=run_analytics)
+
+    s = sub.add_parser("swipe", help="swipes/second and latency: form-POST kiosk vs JSON swipe endpoint")
+    s.add_argument("--swipes", type=int, default=2000)
+    s.add_argument("--students", type=int, default=200)
+    s.set_defaults(func=run_swipe)
+
+    n = sub.add_parser("snapshot", help="kiosk swipe latency while the DB is snapshotted (rollback journal vs WAL)")
+    n.add_argument("--passes", type=int, default=300_000)
+    n.add_argument("--students", type=int, default=200)
+    n.add_argument("--rate", type=float, default=20, help="kiosk swipes per second")
+    n.add_argument("--baseline", type=float, default=2.0, help="seconds of swiping before and after the copy")
+    n.set_defaults(func=run_snapshot)
+
+    p = sub.add_parser("reports", help="kiosk swipe latency while semester reports run (primary vs read replica)")
+    p.add_argument("--passes", type=int, default=300_000)
+    p.add_argument("--students", type=int, default=200)
+    p.add_argument("--rate", type=float, default=20, help="kiosk swipes per second")
+    p.add_argument("--seconds", type=float, default=20)
+    p.set_defaults(func=run_reports)
+
+    u = sub.add_parser("audit", help="time audit search queries over a year of audit_log entries")
+    u.add_argument("--entries", type=int, default=1_000_000)
+    u.add_argument("--students", type=int, default=2000)
+    u.add_argument("--pages", type=int, default=3, help="pages fetched per query via ?before=")
+    u.set_defaults(func=run_audit)
+
+    d = sub.add_parser("directory", help="student directory type-ahead and paging latency")
+    d.add_argument("--students", type=int, default=5000)
+    d.set_defaults(func=run_directory)
+
+    q = sub.add_parser("passroom", help="a whole class loading /passroom at the bell: shared vs per-request grid")
+    q.add_argument("--students", type=int, default=30)
+    q.add_argument("--open", type=int, default=3, help="passes already out in the room")
+    q.set_defaults(func=run_passroom)
+
+    w = sub.add_parser("weekly", help="weekly summary page: cold vs memoized over a year of passes")
+    w.add_argument("--passes", type=int, default=500_000)
+    w.add_argument("--students", type=int, default=1000)
+    w.add_argument("--repeat", type=int, default=5)
+    w.set_defaults(func=run_weekly)
+
+    x = sub.add_parser("reset", help="whole-building room reset: per-pass checkins vs one set-based reset")
+    x.add_argument("--open", type=int, default=1500, help="passes open across the building")
+    x.add_argument("--rooms", type=int, default=40)
+    x.set_defaults(func=run_reset)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
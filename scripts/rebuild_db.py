@@ -1,17 +1,23 @@
 # scripts/rebuild_db.py
 # Rebuilds the database from CSV seed files; optionally loads logs and passes in full mode.
+# --fast: bulk-load path for large seed sets, with per-stage timings.
 
-import os, sys, shutil, csv
+import os, sys, shutil, csv, time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from datetime import datetime, timedelta
 import pandas as pd
+from sqlalchemy import insert
 from werkzeug.security import generate_password_hash
 
 # ─── Path Setup ─────────────────────────────────────────────────────────────
 ROOT_DIR  = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, ROOT_DIR)
 
-from src.database import create_app
+from src.database import create_app, ensure_indexes
 from src.models   import db, User, StudentSchedule, TeacherSchedule, StudentPeriod, Pass, PassEvent, AuditLog
+from src.services import pass_manager, rollups, snapshots, audit_search, login as login_service
 
 SEED_DIR  = os.path.join(ROOT_DIR, "Seed")
 DATA_DIR  = os.path.join(ROOT_DIR, "data")
@@ -20,6 +26,7 @@ PURGE_DIR = os.path.join(DATA_DIR, "purge")
 os.makedirs(PURGE_DIR, exist_ok=True)
 
 FULL_MODE = "--full" in sys.argv
+FAST_MODE = "--fast" in sys.argv
 
 # ─── Archive Old Database ───────────────────────────────────────────────────
 def archive_existing_db():
@@ -36,7 +43,19 @@ def archive_existing_db():
             except Exception:
                 pass
     tag  = datetime.now().strftime("%Y%m%d_%H%M%S")
-    shutil.move(DB_FILE, os.path.join(PURGE_DIR, f"{tag}_hallpass.db"))
+    # Online backup, not a file move: consistent even if the server is mid-write
+    archived = os.path.join(PURGE_DIR, f"{tag}_hallpass.db")
+    try:
+        snapshots.backup(DB_FILE, archived)
+        snapshots.verify(archived)
+        for suffix in ("", "-wal", "-shm"):   # a stale WAL must not meet the new file
+            if os.path.exists(DB_FILE + suffix):
+                os.remove(DB_FILE + suffix)
+    except Exception as e:  # unreadable DB: keep the old file (and its WAL) as-is
+        print(f"⚠️  Backup failed ({e}); moving the file instead.")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(DB_FILE + suffix):
+                shutil.move(DB_FILE + suffix, archived + suffix)
     print(f"🗃️  Archived previous DB → purge/{tag}_hallpass.db")
 
 # ─── Helpers ────────────────────────────────────────────────────────────────
@@ -62,7 +81,7 @@ def rebuild_database():
             required = {"id", "name", "email", "role", "password"}
             if missing := (required - set(df.columns)):
                 raise ValueError(f"Missing columns in users.csv: {missing}")
-            df["password"] = df["password"].apply(lambda raw: generate_password_hash(str(raw)))
+            df["password"] = hash_passwords([str(raw) for raw in df["password"]])   # password_hash_method
             db.session.bulk_insert_mappings(User, df.to_dict("records"))
             print(f"✅ Loaded {len(df)} users.")
         except Exception as e:
@@ -119,8 +138,150 @@ def rebuild_database():
             print("🧹 Clean rebuild — skipped passes, events, audit logs.")
 
         db.session.commit()
+        print(f"✅ Indexed audit search ({audit_search.ensure()} entries parsed).")
+        if FULL_MODE:
+            counts = rollups.rebuild()
+            print(f"✅ Rebuilt rollups ({counts['daily_student_stats']} student-day rows).")
         print("🎉 Rebuild complete — data/hallpass.db ready.")
 
+# ─── Fast Mode (--fast) ─────────────────────────────────────────────────────
+# Same result as rebuild_database(), built for large seed sets: passwords hashed
+# across processes, whole-column datetime parsing, one reshape for student_periods,
+# chunked executemany inserts on one connection with durability pragmas relaxed
+# (the previous DB is already archived, so a crash just means rerun), and the
+# secondary indexes created once after the load.
+
+INSERT_CHUNK = 5000
+LOAD_PRAGMAS = ("synchronous=OFF", "journal_mode=MEMORY", "temp_store=MEMORY",
+                "cache_size=-200000", "locking_mode=EXCLUSIVE")
+TIMINGS = []
+
+@contextmanager
+def stage(label):
+    start = time.perf_counter()
+    yield
+    TIMINGS.append((label, time.perf_counter() - start))
+    print(f"⏱  {label}: {TIMINGS[-1][1]:.2f} s")
+
+def _hash(method, raw):
+    return generate_password_hash(raw, method=method) if method else generate_password_hash(raw)
+
+# Seed passwords hashed across CPU cores (the KDF is deliberately slow).
+def hash_passwords(raws):
+    if not raws:
+        return []
+    workers = os.cpu_count() or 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(partial(_hash, login_service.HASH_METHOD), raws,
+                             chunksize=max(1, len(raws) // (workers * 4))))
+
+# DataFrame → list of dicts with None for missing values (what executemany binds).
+def records(df):
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+# Datetime column → naive UTC datetimes / None in one vectorized pass.
+def to_utc(col):
+    parsed = pd.to_datetime(col, utc=True, errors="coerce", format="mixed").dt.tz_convert(None)
+    return parsed.astype(object).where(parsed.notna(), None)
+
+def insert_chunked(conn, model, rows):
+    stmt = insert(model.__table__)
+    for i in range(0, len(rows), INSERT_CHUNK):
+        conn.execute(stmt, rows[i:i + INSERT_CHUNK])
+    return len(rows)
+
+def student_periods(sched):
+    long = sched.melt(id_vars="student_id", var_name="period", value_name="room")
+    long = long[long["room"].notna() & (long["room"] != "")]
+    long["period"] = long["period"].str.removeprefix("period_").str.replace("_", "/", regex=False)
+    return long[["student_id", "period", "room"]]
+
+def rebuild_database_fast():
+    total = time.perf_counter()
+    with stage("archive + schema"):
+        archive_existing_db()
+        app = create_app()
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            indexes = [ix for t in db.metadata.sorted_tables for ix in t.indexes]
+            for ix in indexes:
+                ix.drop(db.engine)
+    print("✅ Fresh database created (secondary indexes deferred).")
+
+    with app.app_context():
+        # IDs stay strings ("01" is not 1)
+        with stage("read seed CSVs"):
+            users = pd.read_csv(os.path.join(SEED_DIR, "users.csv"), dtype=str)
+            users.columns = [c.strip().lower() for c in users.columns]
+            if missing := ({"id", "name", "email", "role", "password"} - set(users.columns)):
+                raise ValueError(f"Missing columns in users.csv: {missing}")
+            students = pd.read_csv(os.path.join(SEED_DIR, "student_schedule.csv"), dtype=str)
+            teachers = pd.read_csv(os.path.join(SEED_DIR, "teacher_schedule.csv"), dtype=str)
+
+        with stage(f"hash {len(users)} passwords"):
+            users["password"] = hash_passwords(users["password"].fillna("").tolist())
+
+        with stage("melt student_periods"):
+            periods = student_periods(students)
+
+        history = []
+        if FULL_MODE:
+            with stage("read + parse history CSVs"):
+                for fname, model, parse_map in [
+                    ("passes.csv", Pass, {"date": "date", "checkout_at": "datetime", "checkin_at": "datetime"}),
+                    ("pass_events.csv", PassEvent, {"timestamp": "datetime"}),
+                    ("audit_log.csv", AuditLog, {"time": "datetime"})
+                ]:
+                    try:
+                        df = pd.read_csv(os.path.join(SEED_DIR, fname), dtype={"student_id": str})
+                    except FileNotFoundError:
+                        print(f"ℹ️  {fname} not found – skipping.")
+                        continue
+                    for col, ptype in parse_map.items():
+                        if ptype == "date":
+                            df[col] = pd.to_datetime(df[col], errors="coerce").dt.date
+                        else:
+                            df[col] = to_utc(df[col])
+                    history.append((model, df))
+
+        with stage("insert rows"):
+            with db.engine.connect() as conn:
+                for pragma in LOAD_PRAGMAS:
+                    conn.exec_driver_sql(f"PRAGMA {pragma}")
+                for model, df, label in [
+                    (User, users, "users"),
+                    (StudentSchedule, students, "student schedules"),
+                    (TeacherSchedule, teachers, "teacher schedules"),
+                    (StudentPeriod, periods, "student-period rows"),
+                    *[(model, df, model.__tablename__) for model, df in history],
+                ]:
+                    print(f"✅ Loaded {insert_chunked(conn, model, records(df))} {label}.")
+                conn.commit()
+            db.engine.dispose()   # load pragmas are per-connection; drop them with it
+
+        with stage(f"build {len(indexes)} indexes"):
+            pass_manager.close_duplicate_open()   # seed rows may hold two open passes per student
+            ensure_indexes()
+
+        # drop_all took the FTS triggers with audit_log; recreate and re-index
+        with stage("audit search index"):
+            parsed = audit_search.ensure()
+        print(f"✅ Indexed audit search ({parsed} entries parsed).")
+
+        if FULL_MODE:
+            with stage("rebuild rollups"):
+                counts = rollups.rebuild()
+            print(f"✅ Rebuilt rollups ({counts['daily_student_stats']} student-day rows).")
+        else:
+            print("🧹 Clean rebuild — skipped passes, events, audit logs.")
+
+    print("─" * 40)
+    for label, secs in TIMINGS:
+        print(f"{label:<32}{secs:>7.2f} s")
+    print(f"{'total':<32}{time.perf_counter() - total:>7.2f} s")
+    print("🎉 Rebuild complete — data/hallpass.db ready.")
+
 if __name__ == "__main__":
-    rebuild_database()
+    rebuild_database_fast() if FAST_MODE else rebuild_database()
 
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+# scripts/rebuild_rollups.py
+# Recompute the daily rollup tables from passes + passes_archive (after imports or manual edits).
+
+import os, sys, time
+
+# ─── Path Setup ─────────────────────────────────────────────────────────────
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+from src.database import create_app
+from src.services import rollups
+
+
+def main():
+    app = create_app()
+    started = time.perf_counter()
+    with app.app_context():
+        counts = rollups.rebuild()
+    print(f"✅ Rollups rebuilt in {time.perf_counter() - started:.2f}s: "
+          + ", ".join(f"{n} {table}" for table, n in counts.items()))
+
+if __name__ == "__main__":
+    main()
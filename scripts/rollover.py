@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# scripts/rollover.py
+# Run the end-of-day rollover by hand (the server also runs it nightly at auto_reset_time).
+#
+#   python scripts/rollover.py --dry-run
+#   python scripts/rollover.py [--retention-days 30]
+
+import os, sys, argparse
+
+# ─── Path Setup ─────────────────────────────────────────────────────────────
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+from src.database import create_app
+from src.services import rollover
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-of-day rollover: close passes, clear rooms, archive old rows")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--retention-days", type=int, help=f"override data_retention_days ({rollover.RETENTION_DAYS})")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        summary = rollover.run(dry_run=args.dry_run, retention_days=args.retention_days)
+
+    verb = "Would close" if args.dry_run else "Closed"
+    print(f"✅ {verb} {summary['closed_passes']} passes, cleared {summary['rooms_cleared']} rooms; "
+          f"archived {summary['archived_passes']} passes / {summary['archived_events']} events / "
+          f"{summary['archived_audit']} audit rows older than {summary['cutoff']} "
+          f"in {summary['seconds']}s")
+
+if __name__ == "__main__":
+    main()
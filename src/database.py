@@ -8,8 +8,10 @@ Application factory + table-exist check
 
 import os
 from flask import Flask
-from sqlalchemy import inspect
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
 from .models import db
+from .utils  import load_config
 
 # ─────────────────────────── blueprint imports ──────────────────────────
 from .routes.admin    import admin_bp
@@ -18,9 +20,72 @@ from .routes.students import students_bp
 from .routes.report   import report_bp
 from .routes.passlog  import passlog_bp
 from .routes.core     import core_bp, ping_bp
+from .routes.jobs     import jobs_bp
+from .routes.changes  import changes_bp
 
 
-def create_app() -> Flask:
+# Add model columns missing from existing tables. Only nullable columns without a
+# server default are added this way, which is all ALTER TABLE ADD COLUMN needs.
+def ensure_columns():
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        have = {c["name"] for c in inspector.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in have or not col.nullable:
+                continue
+            ddl = col.type.compile(dialect=db.engine.dialect)
+            try:
+                db.session.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{col.name}" {ddl}'))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"[WARN] Could not add column {table.name}.{col.name}: {e}")
+
+
+# SQLite can't add AUTOINCREMENT to an existing table: rebuild any table whose model
+# asks for it (passes) under a temporary name, copy the rows, drop the original and
+# rename. Its indexes go with the old table; ensure_indexes() recreates them.
+def ensure_autoincrement():
+    for table in db.metadata.sorted_tables:
+        if not table.dialect_options["sqlite"]["autoincrement"]:
+            continue
+        ddl = db.session.scalar(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :n"),
+                                {"n": table.name})
+        if ddl is None or "AUTOINCREMENT" in ddl.upper():
+            continue
+        have = {c["name"] for c in inspect(db.engine).get_columns(table.name)}
+        cols = ", ".join(f'"{c.name}"' for c in table.columns if c.name in have)
+        tmp = f"{table.name}__rebuild"
+        create = str(CreateTable(table).compile(dialect=db.engine.dialect)).replace(
+            f"CREATE TABLE {table.name} (", f'CREATE TABLE "{tmp}" (', 1)
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{tmp}"')
+            conn.exec_driver_sql(create)
+            conn.exec_driver_sql(f'INSERT INTO "{tmp}" ({cols}) SELECT {cols} FROM "{table.name}"')
+            conn.exec_driver_sql(f'DROP TABLE "{table.name}"')
+            conn.exec_driver_sql(f'ALTER TABLE "{tmp}" RENAME TO "{table.name}"')
+        print(f"[INFO] Rebuilt {table.name} with AUTOINCREMENT")
+
+
+# Create any model index missing from an existing DB (create_all skips tables
+# that already exist, so indexes added later would otherwise never appear).
+# A unique index that can't be built stops startup: ON CONFLICT inserts
+# (pass_manager.open_pass) need it, so without it every write would fail instead.
+def ensure_indexes():
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(db.engine, checkfirst=True)
+            except Exception as e:
+                if index.unique:
+                    raise RuntimeError(f"Could not create unique index {index.name}: {e}") from e
+                print(f"[WARN] Could not create index {index.name}: {e}")
+
+
+def create_app(config: dict | None = None) -> Flask:
     base_dir    = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     template_dir = os.path.join(base_dir, "templates")
     static_dir   = os.path.join(base_dir, "static")
@@ -36,6 +101,8 @@ def create_app() -> Flask:
     app.secret_key = os.environ.get("SECRET_KEY", "Duck_Goon_Slap00")
     app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(data_dir, 'hallpass.db')}"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    if config:
+        app.config.update(config)  # scripts / harnesses point at a scratch DB
 
     db.init_app(app)
 
@@ -47,6 +114,8 @@ def create_app() -> Flask:
     app.register_blueprint(students_bp)
     app.register_blueprint(report_bp)
     app.register_blueprint(passlog_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(changes_bp)
 
     # ───── create tables only if needed ─────
     with app.app_context():
@@ -58,9 +127,63 @@ def create_app() -> Flask:
             "passes",
             "pass_events",
             "audit_log",
+            "room_slots",
+            "overdue_passes",
+            "passes_archive",
+            "pass_events_archive",
+            "daily_student_stats",
+            "daily_room_stats",
+            "daily_period_stats",
+            "swipe_receipts",
+            "jobs",
+            "change_log",
         }
         if not required.issubset(existing):
             db.create_all()
+        ensure_columns()
+        ensure_autoincrement()
+
+        # Duplicate open passes would block the one-open-pass unique index
+        from .services import pass_manager
+        closed = pass_manager.close_duplicate_open()
+        if closed:
+            print(f"[WARN] Closed {closed} duplicate open passes")
+        ensure_indexes()
+
+        # Pass ids stay unique across the hot and archive stores
+        from .services import history
+        history.reserve_ids()
+        db.session.commit()
+
+        # WAL: snapshots and report reads never block kiosk writes (persists in the file)
+        journal = load_config().get("sqlite_journal_mode", "wal")
+        try:
+            db.session.execute(text(f"PRAGMA journal_mode={journal}"))
+            db.session.commit()
+        except Exception as e:  # another process holds the file; keep its current mode
+            db.session.rollback()
+            print(f"[WARN] Could not set journal_mode={journal}: {e}")
+
+        # Slot counters and the open-pass index are derived state; rebuild on boot
+        from .services import capacity, hot_store, rollups, audit_search
+        capacity.rebuild()
+        hot_store.load()
+
+        # Full-text index and parsed columns for the audit search
+        audit_search.ensure()
+
+        # Rollup tables new to this DB: backfill them from existing passes
+        if "daily_student_stats" not in existing:
+            rollups.rebuild()
+
+    # ───── background services (server entry points only) ─────
+    if app.config.get("HALLPASS_BACKGROUND"):
+        from .services import overdue, rollover, jobs, snapshots
+        overdue.start(app)
+        rollover.start(app)
+        snapshots.start(app)
+        with app.app_context():
+            jobs.recover()      # jobs a previous server process left queued/running
 
     return app
 
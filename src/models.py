@@ -2,10 +2,22 @@
 # SQLAlchemy ORM models for users, schedules, passes, logs, and active rooms
 
 from datetime import datetime, date
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from sqlalchemy import func
 
-db = SQLAlchemy()
+
+# Handlers marked @replica.read_only (services/replica.py) put a read-only engine
+# on `g`; every query they make through db.session goes there instead.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            bind = g.get("read_engine")
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Active Room Tracker
@@ -17,6 +29,17 @@ class ActiveRoom(db.Model):
     added = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Room Capacity Counters (see services/capacity.py)
+# ─────────────────────────────────────────────────────────────────────────────
+class RoomSlot(db.Model):
+    __tablename__ = "room_slots"
+
+    room     = db.Column(db.String(20), primary_key=True)
+    capacity = db.Column(db.Integer, nullable=False)          # passes_available / station_slots
+    in_use   = db.Column(db.Integer, nullable=False, default=0)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Users Table
 # ─────────────────────────────────────────────────────────────────────────────
@@ -100,7 +123,7 @@ class Pass(db.Model):
     __tablename__ = "passes"
 
     id          = db.Column(db.Integer, primary_key=True)
-    date        = db.Column(db.Date, default=func.current_date())
+    date        = db.Column(db.Date, default=func.current_date(), index=True)
     student_id  = db.Column(db.String, db.ForeignKey("users.id"), nullable=False)
 
     checkout_at     = db.Column(db.DateTime(timezone=True), nullable=False)
@@ -118,9 +141,20 @@ class Pass(db.Model):
         db.CheckConstraint(
             "status IN ('pending_start','active','pending_return','returned')"
         ),
-        db.UniqueConstraint(
-            "student_id", "checkin_at", name="uq_student_one_open_pass"
+        # One open pass per student. Partial index: NULLs are distinct in SQLite,
+        # so a plain UNIQUE(student_id, checkin_at) never actually fired.
+        db.Index(
+            "uq_student_one_open_pass", "student_id",
+            unique=True, sqlite_where=db.text("checkin_at IS NULL")
         ),
+        # Open passes by checkout time: overdue scheduler rebuild on startup
+        db.Index(
+            "ix_passes_open_checkout", "checkout_at",
+            sqlite_where=db.text("checkin_at IS NULL")
+        ),
+        # Ids never restart when rollover empties the table: audit rows, the change feed
+        # and receipts keep pass ids by value, and the archive keeps the same id
+        {"sqlite_autoincrement": True},
     )
 
     # Legacy support — alias origin_room as .station
@@ -163,7 +197,7 @@ class PassEvent(db.Model):
     __tablename__ = "pass_events"
 
     id        = db.Column(db.Integer, primary_key=True)
-    pass_id   = db.Column(db.Integer, db.ForeignKey("passes.id", ondelete="CASCADE"), nullable=False)
+    pass_id   = db.Column(db.Integer, db.ForeignKey("passes.id", ondelete="CASCADE"), nullable=False, index=True)
     station   = db.Column(db.String(50), nullable=False)  # Where the swipe happened
     event     = db.Column(db.String(20), nullable=False)  # "in" or "out"
     timestamp = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
@@ -171,6 +205,148 @@ class PassEvent(db.Model):
     pass_ref = db.relationship("Pass", backref="events")
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Historical Store (cold) — append-only copies moved out of passes by rollover
+# ─────────────────────────────────────────────────────────────────────────────
+# `passes` / `pass_events` only hold today's and open passes. An archived pass keeps
+# its hot id: `passes` is AUTOINCREMENT and history.reserve_ids() keeps its sequence
+# above every id here, so an id names one pass in either store for good.
+class PassArchive(db.Model):
+    __tablename__ = "passes_archive"
+
+    id              = db.Column(db.Integer, primary_key=True)
+    date            = db.Column(db.Date, nullable=False, index=True)
+    student_id      = db.Column(db.String, db.ForeignKey("users.id"), nullable=False)
+    checkout_at     = db.Column(db.DateTime(timezone=True), nullable=False)
+    checkin_at      = db.Column(db.DateTime(timezone=True))
+    period          = db.Column(db.String(10))
+    origin_room     = db.Column(db.String(10), nullable=False)
+    room_in         = db.Column(db.String(10))
+    is_override     = db.Column(db.Boolean, default=False)
+    note            = db.Column(db.Text)
+    status          = db.Column(db.String, nullable=False)
+    total_pass_time = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index("ix_passes_archive_student_date", "student_id", "date"),
+        db.Index("ix_passes_archive_room_date", "origin_room", "date"),
+    )
+
+
+class PassEventArchive(db.Model):
+    __tablename__ = "pass_events_archive"
+
+    id        = db.Column(db.Integer, primary_key=True)
+    pass_id   = db.Column(db.Integer, db.ForeignKey("passes_archive.id"), nullable=False, index=True)
+    station   = db.Column(db.String(50), nullable=False)
+    event     = db.Column(db.String(20), nullable=False)
+    timestamp = db.Column(db.DateTime(timezone=True))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Daily Rollups (see services/rollups.py)
+# ─────────────────────────────────────────────────────────────────────────────
+# Pre-aggregated returned passes, bumped by pass_manager.return_pass so reports
+# read a few hundred rows per week instead of every pass.
+class _DailyStat:
+    passes          = db.Column(db.Integer, nullable=False, default=0)
+    total_seconds   = db.Column(db.Integer, nullable=False, default=0)
+    hallway_seconds = db.Column(db.Integer, nullable=False, default=0)
+    station_seconds = db.Column(db.Integer, nullable=False, default=0)
+    over_5          = db.Column(db.Integer, nullable=False, default=0)
+    over_10         = db.Column(db.Integer, nullable=False, default=0)
+    overrides       = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailyStudentStat(_DailyStat, db.Model):
+    __tablename__ = "daily_student_stats"
+
+    date       = db.Column(db.Date, primary_key=True)
+    student_id = db.Column(db.String, primary_key=True)
+    room       = db.Column(db.String(10), primary_key=True)  # origin room (weekly summary filter)
+
+
+class DailyRoomStat(_DailyStat, db.Model):
+    __tablename__ = "daily_room_stats"
+
+    date = db.Column(db.Date, primary_key=True)
+    room = db.Column(db.String(10), primary_key=True, index=True)   # DISTINCT room list
+
+
+class DailyPeriodStat(_DailyStat, db.Model):
+    __tablename__ = "daily_period_stats"
+
+    date   = db.Column(db.Date, primary_key=True)
+    period = db.Column(db.String(10), primary_key=True)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Overdue Flags (see services/overdue.py)
+# ─────────────────────────────────────────────────────────────────────────────
+class OverdueFlag(db.Model):
+    __tablename__ = "overdue_passes"
+
+    pass_id    = db.Column(db.Integer, db.ForeignKey("passes.id", ondelete="CASCADE"), primary_key=True)
+    flagged_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Kiosk Swipe Receipts (see services/swipes.py)
+# ─────────────────────────────────────────────────────────────────────────────
+# One row per client idempotency key: a retried batch gets the stored result
+# back instead of applying the swipe twice.
+class SwipeReceipt(db.Model):
+    __tablename__ = "swipe_receipts"
+
+    key         = db.Column(db.String(64), primary_key=True)
+    station     = db.Column(db.String(50), nullable=False)
+    student_id  = db.Column(db.String, nullable=False)
+    swiped_at   = db.Column(db.DateTime(timezone=True), nullable=False)   # kiosk clock (local)
+    received_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+    code        = db.Column(db.String(30), nullable=False, default="pending")
+    message     = db.Column(db.String(255))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Background Jobs (see services/jobs.py)
+# ─────────────────────────────────────────────────────────────────────────────
+class Job(db.Model):
+    __tablename__ = "jobs"
+
+    id               = db.Column(db.String(32), primary_key=True)          # uuid hex
+    kind             = db.Column(db.String(40), nullable=False)
+    status           = db.Column(db.String(20), nullable=False, default="queued", index=True)
+    progress         = db.Column(db.Float, nullable=False, default=0.0)    # 0..1
+    message          = db.Column(db.String(255))
+    params           = db.Column(db.Text)                                  # JSON
+    result_path      = db.Column(db.String(255))                           # file offered for download
+    error            = db.Column(db.Text)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    submitted_by     = db.Column(db.String(50))
+    created_at       = db.Column(db.DateTime(timezone=True), nullable=False)
+    started_at       = db.Column(db.DateTime(timezone=True))
+    finished_at      = db.Column(db.DateTime(timezone=True))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Change Feed (see services/changes.py)
+# ─────────────────────────────────────────────────────────────────────────────
+# Append-only. AUTOINCREMENT: seq never goes back or reuses a value, and since
+# SQLite has one writer at a time, seq order is commit order — a consumer that
+# reads past seq N never misses a row committed later with a smaller seq.
+class Change(db.Model):
+    __tablename__ = "change_log"
+
+    seq       = db.Column(db.Integer, primary_key=True)
+    at        = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+    entity    = db.Column(db.String(20), nullable=False)   # pass | pass_event | room | student | roster
+    entity_id = db.Column(db.String(50))
+    op        = db.Column(db.String(20), nullable=False)   # created | status | returned | deleted | ...
+    data      = db.Column(db.Text)                         # JSON
+
+    __table_args__ = {"sqlite_autoincrement": True}
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Audit Log Table
 # ─────────────────────────────────────────────────────────────────────────────
@@ -178,7 +354,12 @@ class AuditLog(db.Model):
     __tablename__ = "audit_log"
 
     id         = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    student_id = db.Column(db.String, db.ForeignKey("users.id"))
-    time       = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
+    student_id = db.Column(db.String, db.ForeignKey("users.id"), index=True)
+    time       = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, index=True)
     reason     = db.Column(db.String(255), nullable=False)
+
+    # Parsed from `reason` by services/audit_search.py; indexed for the admin audit search
+    action     = db.Column(db.String(30), index=True)
+    pass_id    = db.Column(db.Integer, index=True)
+    room       = db.Column(db.String(50), index=True)
 
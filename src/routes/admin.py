@@ -6,6 +6,7 @@ from flask import (
     redirect, url_for, Response
 )
 from datetime import datetime, date
+from sqlalchemy import select
 import json, csv, io
 
 from src.models import db, Pass, User, StudentPeriod
@@ -13,7 +14,8 @@ from src.utils import (
     activate_room, deactivate_room, get_active_rooms, get_current_periods,
     log_audit, is_station
 )
-from src.services import pass_manager
+from src.services import pass_manager, authz, overdue, rollups, station_usage, changes
+from src.services.replica import read_only
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -65,7 +67,8 @@ def admin_view():
             "time_out": p.checkout_at.strftime('%H:%M:%S') if p.checkout_at else '-',
             "note": p.note or "",
             "override": "✔️" if p.is_override else "",
-            "status": p.status
+            "status": p.status,
+            "overdue": overdue.is_overdue(p.id)
         }
         if p.status == STATUS_PENDING_START:
             pending_starts.append(rec)
@@ -106,10 +109,7 @@ def admin_view():
 
     needs_setup = False
     if session.get("role") == "teacher":
-        from src.models import TeacherSchedule
-        sched = TeacherSchedule.query.filter_by(teacher_id=session.get("teacher_id")).first()
-        if not sched or not any(getattr(sched, f"period_{i}", None) for i in range(13)):
-            needs_setup = True
+        needs_setup = not authz.rooms_for(session.get("teacher_id"))
 
     return render_template(
         "admin.html",
@@ -135,8 +135,7 @@ def admin_passes():
 
     query = Pass.query.filter(Pass.checkin_at == None, Pass.status == STATUS_ACTIVE)
     if session.get("role") == "teacher":
-        allowed_rooms = session.get("teacher_rooms", [])
-        query = query.filter(Pass.origin_room.in_(allowed_rooms))
+        query = query.filter(authz.pass_filter(session.get("teacher_id"), Pass))
 
     open_passes = query.all()
     now = datetime.now()
@@ -165,7 +164,8 @@ def admin_passes():
             "station_time": f"{station_time//60}m {station_time%60}s" if station_time else "-",
             "note": p.note or "",
             "is_override": p.is_override,
-            "status": p.status
+            "status": p.status,
+            "overdue": overdue.is_overdue(p.id)
         })
 
     return jsonify(response)
@@ -187,9 +187,6 @@ def admin_create_pass():
     if not student:
         return jsonify({'message': 'User not found.'})
 
-    if Pass.query.filter_by(student_id=student.id, checkin_at=None).first():
-        return jsonify({'message': 'User already has an active pass.'})
-
     room_in = None
     if session.get("role") == "teacher":
         teacher_id = session.get("teacher_id", session.get("user_id"))
@@ -197,27 +194,17 @@ def admin_create_pass():
             current_periods = get_current_periods()
             period = current_periods[0] if current_periods else "0"
 
-        from src.models import TeacherSchedule
-        ts = TeacherSchedule.query.filter_by(teacher_id=teacher_id).first()
-        if ts:
-            safe_period = f"period_{period.replace('/', '_')}"
-            room_in = getattr(ts, safe_period, None)
+        room_in = next(iter(authz.rooms_for(teacher_id, [period])), None)
 
     if not room_in and room_out.isdigit():
         room_in = room_out
 
-    new_pass = Pass(
-        student_id=student.id,
-        date=datetime.now().date(),
-        period=period,
-        origin_room=room_out,
-        room_in=room_in,
-        checkout_at=datetime.now(),
-        is_override=True,
-        status=STATUS_PENDING_START
+    _, created = pass_manager.open_pass(
+        student.id, room_out, period, is_override=True, room_in=room_in
     )
-    db.session.add(new_pass)
-    db.session.commit()
+    if not created:
+        return jsonify({'message': 'User already has an active pass.'})
+
     log_audit("admin", f"Created override pass for {student.name} from {room_out} returning to {room_in or 'None'}")
     return jsonify({'message': f'Override pass created for {student.name} leaving {room_out}.'})
 
@@ -255,11 +242,8 @@ def admin_checkin(pass_id):
     if not p or p.checkin_at:
         return jsonify({'message': 'Invalid or already returned pass'})
 
-    if not p.room_in:
-        p.room_in = p.origin_room
-
     success = pass_manager.return_pass(p)
-    return jsonify({'message': f'Pass {pass_id} marked as returned.' if success else 'Return failed'})
+    return jsonify({'message': f'Pass {pass_id} marked as returned.' if success else pass_manager.CONFLICT_MESSAGE})
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -290,47 +274,46 @@ def admin_add_note(student_id):
 # Route: Weekly Summary Table (HTML)
 # ─────────────────────────────────────────────────────────────────────────────
 @admin_bp.route('/admin_weekly_summary', methods=['GET'])
+@read_only
 def admin_weekly_summary():
     if not session.get('logged_in'):
         return redirect(url_for('auth.login'))
 
+    selected_student = request.args.get("student") or None
+    selected_room = request.args.get("room") or None
+    week_start, _ = rollups.week_bounds(rollups.week_of(request.args.get("week")))
+
+    # The page only changes when a pass in that week is returned (or the roster is
+    # reloaded), so the rendered HTML is memoized alongside the rollup reads
+    key = ("page", week_start, selected_student, selected_room, session.get('role'))
+    return rollups.cached(key, lambda: _weekly_summary_page(week_start, selected_student, selected_room))
+
+def _weekly_summary_page(week_start, selected_student, selected_room):
     DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-    selected_student = request.args.get("student")
-    selected_room = request.args.get("room")
-    all_students = User.query.filter_by(role="student").order_by(User.name).all()
-    all_rooms = sorted(set(p.origin_room for p in Pass.query.all() if p.origin_room))
+    # Dropdown lists: (id, name) pairs only, and the memoized DISTINCT room list
+    all_students = db.session.execute(
+        select(User.id, User.name).where(User.role == "student").order_by(User.name)
+    ).all()
+    all_rooms = rollups.rooms()
 
-    # Filter by student
+    # Filter by student (the aggregate below filters in SQL too)
     if selected_student:
-        students = [User.query.get(selected_student)]
+        students = [s for s in all_students if s.id == selected_student]
     else:
         students = all_students
 
     report_data = []
+    week = rollups.student_week(week_start, student_id=selected_student, room=selected_room)
 
     for stu in students:
-        records = Pass.query.filter_by(student_id=stu.id).all()
-        if selected_room:
-            records = [r for r in records if r.origin_room == selected_room]
-
-        day_totals = {d: 0 for d in DAYS}
-        over_5 = sum(1 for r in records if (r.total_pass_time or 0) > 300)
-        over_10 = sum(1 for r in records if (r.total_pass_time or 0) > 600)
-        used_override = any(r.is_override for r in records)
-
-        for r in records:
-            dname = r.date.strftime('%A')
-            if dname in day_totals:
-                day_totals[dname] += r.total_pass_time or 0
-
-        weekly = ' '.join(f"{d[0]}:{day_totals[d]//60}" for d in DAYS)
+        rec = week.get(stu.id)
         report_data.append({
             "student_name": stu.name,
             "student_id": stu.id,
-            "weekly_report": weekly,
-            "passes_over_5_min": over_5,
-            "passes_over_10_min": over_10,
-            "used_override": "✔️" if used_override else ""
+            "weekly_report": rollups.weekly_string(rec, DAYS),
+            "passes_over_5_min": rec["over_5"] if rec else 0,
+            "passes_over_10_min": rec["over_10"] if rec else 0,
+            "used_override": "✔️" if rec and rec["overrides"] else ""
         })
 
     return render_template(
@@ -339,7 +322,8 @@ def admin_weekly_summary():
         all_students=all_students,
         all_rooms=all_rooms,
         selected_student=selected_student,
-        selected_room=selected_room
+        selected_room=selected_room,
+        week_start=week_start.isoformat()
     )
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -367,7 +351,6 @@ def admin_rooms():
     config.setdefault("stations", [])
 
     role = session.get("role")
-    teacher_rooms = session.get("teacher_rooms", [])
 
     # GET: Return all rooms with slot info
     if request.method == 'GET':
@@ -423,7 +406,7 @@ def admin_rooms():
         return jsonify({'error': 'missing room'}), 400
 
     if role == "teacher":
-        if not is_station(room, config=config) and room not in teacher_rooms:
+        if not is_station(room, config=config) and not authz.can_manage(session.get("teacher_id"), room):
             return jsonify({'error': 'Not authorized for this room'}), 403
 
     if request.method == 'POST':
@@ -476,12 +459,47 @@ def rename_room():
         db.session.delete(rec)
         db.session.commit()
         db.session.add(ActiveRoom(room=new.strip()))
+        changes.record("room", old, "renamed", to=new.strip())
         db.session.commit()
         log_audit("admin", f'Renamed room "{old}" → "{new}"')
         return '', 204
     return jsonify({'error': 'Room not found'}), 404
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Reset Room(s) — close every open pass today
+# ─────────────────────────────────────────────────────────────────────────────
+# Body: {"room": "101"}, {"rooms": ["101", "102"]} or {"all": true} (admins only: the
+# whole building after a fire drill). Reply: {"cleared": <passes closed>}.
+@admin_bp.route('/admin_rooms/reset', methods=['POST'])
+def reset_rooms():
+    if not session.get('logged_in'):
+        return jsonify({'error': 'unauthorized'}), 403
+
+    payload = request.get_json(force=True, silent=True) or {}
+    role = session.get("role")
+
+    if payload.get("all"):
+        if role != "admin":
+            return jsonify({'error': 'Only admins can reset every room'}), 403
+        rooms = None
+    else:
+        rooms = payload.get("rooms") or [payload.get("room", "")]
+        if not isinstance(rooms, list) or not all(isinstance(r, str) for r in rooms):
+            return jsonify({'error': 'rooms must be a list of room names'}), 400
+        rooms = sorted({r.strip() for r in rooms if r.strip()})
+        if not rooms:
+            return jsonify({'error': 'missing room'}), 400
+        if role == "teacher":
+            config = load_config()
+            for room in rooms:
+                if not is_station(room, config=config) and not authz.can_manage(session.get("teacher_id"), room):
+                    return jsonify({'error': f'Not authorized for room {room}'}), 403
+
+    cleared = pass_manager.reset_rooms(rooms, by=session.get("teacher_id") or role or "admin")
+    return jsonify({'cleared': cleared, 'rooms': rooms or 'all'})
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Route: Room Stats Summary
 # ─────────────────────────────────────────────────────────────────────────────
@@ -499,6 +517,26 @@ def room_stats(room):
     return jsonify(stats)
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Station Occupancy / Dwell Time Series (rooms UI chart)
+# ─────────────────────────────────────────────────────────────────────────────
+@admin_bp.route('/admin_rooms/usage')
+def station_usage_series():
+    if not session.get('logged_in'):
+        return jsonify({'error': 'unauthorized'}), 403
+
+    try:
+        day = date.fromisoformat(request.args.get("date") or datetime.now().date().isoformat())
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+
+    usage = station_usage.day_usage(day)
+    station = request.args.get("station")
+    if station:
+        usage = {**usage, "stations": [s for s in usage["stations"] if s["station"] == station]}
+    return jsonify(usage)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Route: Pending Pass Count + Detail for Admin Panel
 # ─────────────────────────────────────────────────────────────────────────────
@@ -512,7 +550,8 @@ def admin_pending_count():
 
     return jsonify({
         "pending_start" : start_count,
-        "pending_return": return_count
+        "pending_return": return_count,
+        "overdue"       : len(overdue.overdue_ids)
     })
 
 
@@ -527,8 +566,7 @@ def admin_pending_passes():
     )
 
     if session.get("role") == "teacher":
-        allowed_rooms = session.get("teacher_rooms", [])
-        query = query.filter(Pass.origin_room.in_(allowed_rooms))
+        query = query.filter(authz.pass_filter(session.get("teacher_id"), Pass))
 
     pending = query.all()
 
@@ -540,7 +578,8 @@ def admin_pending_passes():
             "student_name": p.student.name if p.student else "-",
             "room": p.origin_room,
             "time": p.checkout_at.strftime("%H:%M:%S") if p.checkout_at else "-",
-            "status": p.status
+            "status": p.status,
+            "overdue": overdue.is_overdue(p.id)
         })
 
     return jsonify(results)
@@ -607,6 +646,7 @@ def setup_schedule():
             setattr(schedule, key, val.strip() if val else None)
 
     db.session.commit()
+    authz.invalidate(teacher_id)
     log_audit(teacher_id, "Updated their schedule via popup")
     return jsonify({"success": True, "message": "Schedule updated."})
 
@@ -628,4 +668,4 @@ def get_teacher_schedule():
         for attr in inspect(sched).mapper.column_attrs
         if attr.key.startswith("period_")
     })
-
+
@@ -7,9 +7,7 @@ from flask import (
 )
 from datetime import timedelta
 import json
-from werkzeug.security import check_password_hash, generate_password_hash
 from sqlalchemy import func
-from sqlalchemy.orm import class_mapper
 
 from src.models import db, AuditLog, User, TeacherSchedule
 from src.utils import (
@@ -20,6 +18,7 @@ from src.utils import (
     log_audit,
     load_config
 )
+from src.services import authz, login as login_service
 
 auth_bp = Blueprint('auth', __name__)
 config = load_config()
@@ -52,6 +51,10 @@ def login():
         password = request.form.get('password', '').strip()
         admin_username = config.get("admin_username", "admin")
 
+        # Throttle per client address and per (address, typed ID) before any hashing
+        if not login_service.allow_attempt(request.remote_addr, user_input):
+            return render_template('login.html', error="Too many login attempts. Wait a minute and try again."), 429
+
         # Admin login case
         if user_input.lower() == admin_username.lower():
             if password == config.get("admin_password"):
@@ -63,6 +66,7 @@ def login():
                 return redirect(url_for('admin.admin_view'))
             else:
                 log_audit("admin", f"Failed admin login by {user_input}")
+                login_service.record_failure(request.remote_addr, user_input)
                 return render_template('login.html', error="Incorrect admin password.")
 
         # User login case
@@ -73,9 +77,15 @@ def login():
             user = db.session.get(User, user_input)
 
         if not user:
+            login_service.record_failure(request.remote_addr, user_input)
             return render_template('login.html', error="ID or Email not recognized.")
-        if not check_password_hash(user.password, password):
-            return render_template('login.html', error="Incorrect password.")
+        try:
+            if not login_service.verify(user, password):
+                login_service.record_failure(request.remote_addr, user_input)
+                return render_template('login.html', error="Incorrect password.")
+            login_service.rehash_if_needed(user, password)
+        except login_service.LoginBusy:
+            return render_template('login.html', error="Server is busy. Please try again in a moment."), 503
 
         # Valid login — create session
         session.clear()
@@ -96,15 +106,8 @@ def login():
                 db.session.add(schedule)
                 db.session.commit()
 
-            # Pull list of non-empty room assignments
-            period_cols = [c.key for c in class_mapper(TeacherSchedule).columns if c.key.startswith("period_")]
-            rooms = set()
-            for col in period_cols:
-                val = getattr(schedule, col)
-                if val:
-                    rooms.add(val.strip())
-
-            session['teacher_rooms'] = list(rooms)
+            # Room rights live server-side (services/authz.py), not in the cookie
+            authz.invalidate(user.id)
             session['logged_in'] = True
             log_audit(user.id, "Teacher logged in successfully")
             return redirect(url_for('admin.admin_view'))
@@ -128,13 +131,16 @@ def change_user_password():
     new = data.get("new_password", "")
     confirm = data.get("confirm_password", "")
 
-    if not check_password_hash(user.password, current):
-        return jsonify({ "success": False, "message": "Incorrect current password" })
+    try:
+        if not login_service.verify(user, current):
+            return jsonify({ "success": False, "message": "Incorrect current password" })
 
-    if new != confirm:
-        return jsonify({ "success": False, "message": "Passwords do not match" })
+        if new != confirm:
+            return jsonify({ "success": False, "message": "Passwords do not match" })
 
-    user.password = generate_password_hash(new)
+        user.password = login_service.hash_password(new)
+    except login_service.LoginBusy:
+        return jsonify({ "success": False, "message": "Server is busy. Please try again." }), 503
     db.session.commit()
     return jsonify({ "success": True, "message": "Password changed successfully" })
 
@@ -0,0 +1,39 @@
+# src/routes/changes.py
+# Change feed API for downstream systems: GET /changes?since=<seq>[&limit=&entity=]
+
+import hmac
+from flask import Blueprint, jsonify, request, session
+from src.utils import load_config
+from src.services import changes
+from src.services.replica import read_only
+
+changes_bp = Blueprint('changes', __name__)
+config = load_config()
+
+API_TOKEN = config.get("changes_api_token")   # lets district systems read without a login session
+
+
+# Admin session, or "Authorization: Bearer <changes_api_token>" when one is configured.
+def _authorized():
+    if session.get('logged_in') and session.get('role') == "admin":
+        return True
+    auth = request.headers.get("Authorization", "")
+    return bool(API_TOKEN) and hmac.compare_digest(auth, f"Bearer {API_TOKEN}")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Changes After a Cursor
+# ─────────────────────────────────────────────────────────────────────────────
+# Reply: {"changes": [{seq, at, entity, entity_id, op, data}], "next", "more", "oldest"}.
+# Poll again with since=<next>; while "more" is true there is another page waiting.
+@changes_bp.route('/changes')
+@read_only
+def list_changes():
+    if not _authorized():
+        return jsonify({'message': 'Unauthorized'}), 403
+    try:
+        since = int(request.args.get("since", 0))
+        limit = min(max(int(request.args.get("limit", changes.PAGE_LIMIT)), 1), changes.PAGE_LIMIT)
+    except ValueError:
+        return jsonify({'message': 'since and limit must be integers'}), 400
+    return jsonify(changes.since(since, limit, entity=request.args.get("entity")))
@@ -4,16 +4,19 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, jsonify
 from datetime import datetime, date
 from sqlalchemy import select
+from werkzeug.http import http_date
 
 from src.models import db, User, Pass, StudentPeriod
 from src.utils import (
     load_config,
     get_current_periods,
+    next_period_boundary,
     get_room,
     get_active_rooms,
     log_audit,
     is_station
 )
+from src.services import pass_manager, overdue, history, passroom
 
 core_bp = Blueprint('core', __name__)
 ping_bp = Blueprint('ping', __name__)
@@ -57,14 +60,18 @@ def my_passes():
 
     student_id = session['student_id']
 
-    passes = Pass.query.filter_by(
-        student_id=student_id,
-        status="returned"
-    ).order_by(Pass.date.desc(), Pass.checkout_at.desc()).limit(50).all()
+    h = history.ALL
+    passes = history.rows(
+        h.c.student_id == student_id,
+        h.c.status == STATUS_RETURNED,
+        order_by=(h.c.date.desc(), h.c.checkout_at.desc()),
+        limit=50
+    )
+    events = history.events_for(passes)
 
     rows = []
     for p in passes:
-        logs = sorted(p.events, key=lambda l: l.timestamp)
+        logs = events[(p.store, p.id)]
         station_in = next((l for l in logs if l.event == "in"), None)
         station_out = next((l for l in logs if l.event == "out"), None)
 
@@ -75,7 +82,7 @@ def my_passes():
         rows.append({
             "date": p.date.strftime('%Y-%m-%d'),
             "period": p.period or "-",
-            "room_out": p.room_out or "-",
+            "room_out": p.origin_room or "-",
             "station": f"{station_in.station} → {station_out.station}" if station_in and station_out else "-",
             "hallway": f"{int(hallway_time//60)}m {int(hallway_time%60)}s" if hallway_time else "-",
             "station_time": f"{int(station_time//60)}m {int(station_time%60)}s" if station_time else "-",
@@ -111,66 +118,69 @@ def passroom_view(room):
         if student_id_form != student.id:
             session['passroom_message'] = "That ID doesn't match your login."
         else:
-            existing = Pass.query.filter_by(student_id=student.id, checkin_at=None).first()
-            if existing:
-                if existing.status == STATUS_ACTIVE:
-                    existing.status = STATUS_PENDING_RETURN
-                    db.session.commit()
+            existing, created = pass_manager.open_pass(
+                student.id, room, current_period, room_in=room, reserve_slot=True
+            )
+            if created:
+                session['passroom_message'] = "Pass request submitted."
+            elif not existing:
+                session['passroom_message'] = f"All passes for Room {room} are in use."
+            elif existing.status == STATUS_ACTIVE:
+                if pass_manager.request_return(existing.id):
                     session['passroom_message'] = "Return request submitted."
                 else:
-                    session['passroom_message'] = "You already have a pending pass."
+                    session['passroom_message'] = pass_manager.CONFLICT_MESSAGE
             else:
-                new_pass = Pass(
-                    student_id=student.id,
-                    date=datetime.now().date(),
-                    period=current_period,
-                    origin_room=room,
-                    room_in=room,
-                    checkout_at=datetime.now(),
-                    status=STATUS_PENDING_START
-                )
-                db.session.add(new_pass)
-                db.session.commit()
-                session['passroom_message'] = "Pass request submitted."
+                session['passroom_message'] = "You already have a pending pass."
 
         return redirect(url_for('core.passroom_view', room=room))
 
-    message = session.pop('passroom_message', '')
-
-    passes = Pass.query.filter(
-        Pass.date == datetime.now().date(),
-        Pass.period.in_(periods),
-        Pass.origin_room == room,
-        Pass.checkin_at == None,
-        Pass.is_override == False
-    ).order_by(Pass.checkout_at).all()
-
-    display_passes = []
-    for p in passes:
-        student_name = "-"
-        if p.student_id:
-            s = db.session.get(User, p.student_id)
-            if s:
-                student_name = s.name
-        display_passes.append({
-            "student_name": student_name,
-            "status": p.status
-        })
-
-    while len(display_passes) < config.get("passes_available", 3):
-        display_passes.append({"student_name": None, "status": "free"})
+    # Slot grid shared by everyone in the room this period (services/passroom.py);
+    # ?grid=1 is the page's 10-second refresh and gets just that fragment
+    view = passroom.view(room, periods)
+    if request.args.get("grid"):
+        return view["grid"]
 
+    message = session.pop('passroom_message', '')
     return render_template(
         "passreq.html",
         room=room,
         current_period=current_period,
         school_name=config.get("school_name", "TJMS"),
-        passes=display_passes,
+        grid=view["grid"],
+        holders=view["holders"],
         message=message,
         session=session
     )
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Current Period (clock header on every page)
+# ─────────────────────────────────────────────────────────────────────────────
+# {"periods": [...], "next_boundary": <ISO with offset>, "variant": <schedule>}. Nothing
+# changes before the next boundary, so the reply is built once per period and browsers
+# (and any proxy) are told to reuse it until then.
+_period_cache = None   # (payload, boundary)
+
+@core_bp.route('/period')
+def current_period():
+    global _period_cache
+    now = datetime.now()
+    if _period_cache is None or now >= _period_cache[1]:
+        boundary = next_period_boundary(now)
+        _period_cache = ({
+            "periods": get_current_periods(now),
+            "next_boundary": boundary.astimezone().isoformat(),
+            "variant": config.get("active_schedule", "regular"),
+        }, boundary)
+    payload, boundary = _period_cache
+
+    resp = jsonify(payload)
+    resp.headers["Cache-Control"] = f"public, max-age={max(int((boundary - now).total_seconds()), 0)}"
+    resp.headers["Expires"] = http_date(boundary.astimezone())
+    return resp
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Route: JSON View of Active Slots (used on student dashboard)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -234,10 +244,13 @@ def debug_period():
 def debug_rooms():
     return jsonify(sorted(list(get_active_rooms())))
 
+# Keyset-paged: ?after=<last id>&limit= (max 500)
 @core_bp.route('/debug_students')
 def debug_students():
-    students = User.query.all()
-    return jsonify([{ "id": s.id, "type": str(type(s.id)) } for s in students])
+    after = request.args.get("after", "")
+    limit = min(request.args.get("limit", 200, type=int), 500)
+    ids = db.session.scalars(select(User.id).where(User.id > after).order_by(User.id).limit(limit)).all()
+    return jsonify([{ "id": i, "type": str(type(i)) } for i in ids])
 
 @core_bp.route("/debug_audit")
 def debug_audit():
@@ -260,3 +273,15 @@ def debug_session():
 def ping():
     return "pong", 200
 
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Metrics Endpoint
+# ─────────────────────────────────────────────────────────────────────────────
+@ping_bp.route('/metrics')
+def metrics():
+    open_passes = Pass.query.filter(
+        Pass.checkin_at == None,
+        Pass.status.in_([STATUS_ACTIVE, STATUS_PENDING_RETURN])
+    ).count()
+    return jsonify({"open_passes": open_passes, "overdue": overdue.stats()})
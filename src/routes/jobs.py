@@ -0,0 +1,67 @@
+# src/routes/jobs.py
+# Admin routes for background jobs: submit, list, poll, cancel, download the result
+
+import os
+from flask import Blueprint, jsonify, session, send_file
+from src.services import jobs
+
+jobs_bp = Blueprint('jobs', __name__)
+
+# Kinds the web UI may start (maintenance scripts replace the DB file: launcher only)
+WEB_KINDS = {"export_db", "export_changes", "snapshot"}
+
+
+def _is_admin():
+    return session.get('logged_in') and session.get('role') == "admin"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Submit / List Jobs
+# ─────────────────────────────────────────────────────────────────────────────
+@jobs_bp.route('/jobs/<kind>', methods=['POST'])
+def submit_job(kind):
+    if not _is_admin():
+        return jsonify({'message': 'Unauthorized'}), 403
+    if kind not in WEB_KINDS:
+        return jsonify({'message': f'Unknown job type {kind}.'}), 404
+
+    job_id = jobs.submit(kind, submitted_by=session.get('name', 'admin'))
+    if not job_id:
+        return jsonify({'message': 'Too many jobs running - try again shortly.'}), 429
+    return jsonify({'id': job_id, 'message': 'Job queued.'}), 202
+
+@jobs_bp.route('/jobs')
+def list_jobs():
+    if not _is_admin():
+        return jsonify({'message': 'Unauthorized'}), 403
+    return jsonify({'jobs': jobs.recent()})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Job Status / Cancel / Download
+# ─────────────────────────────────────────────────────────────────────────────
+@jobs_bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    if not _is_admin():
+        return jsonify({'message': 'Unauthorized'}), 403
+    status = jobs.status(job_id)
+    if not status:
+        return jsonify({'message': 'Job not found.'}), 404
+    return jsonify(status)
+
+@jobs_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    if not _is_admin():
+        return jsonify({'message': 'Unauthorized'}), 403
+    if not jobs.cancel(job_id):
+        return jsonify({'message': 'Job not found or already finished.'}), 409
+    return jsonify({'message': 'Cancel requested.'})
+
+@jobs_bp.route('/jobs/<job_id>/download')
+def download_job(job_id):
+    if not _is_admin():
+        return jsonify({'message': 'Unauthorized'}), 403
+    path = jobs.result_path(job_id)
+    if not path:
+        return jsonify({'message': 'No result for this job.'}), 404
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=os.path.basename(path))
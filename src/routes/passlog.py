@@ -1,7 +1,10 @@
 # src/routes/passlog.py
 # Handles station kiosk logic: check-in/out flow, swipe validation, and shutdown
 
-from flask import Blueprint, request, session, jsonify, render_template, redirect, url_for
+from flask import (
+    Blueprint, request, session, jsonify, render_template, redirect, url_for,
+    send_from_directory, current_app
+)
 from datetime import datetime
 import json, os
 
@@ -10,7 +13,7 @@ from src.utils import (
     activate_room, deactivate_room, get_current_periods,
     load_config, log_audit, get_active_rooms, is_station
 )
-from src.services import pass_manager
+from src.services import pass_manager, swipes
 
 passlog_bp = Blueprint('passlog', __name__)
 
@@ -34,100 +37,68 @@ def station_console():
     station = session['station_id']
     activate_room(station)
 
-    periods = get_current_periods()
-    current_period = periods[0] if periods else "0"
     message = ""
-
     if request.method == 'POST':
-        student_id = request.form.get('student_id', '').strip()
-        student = db.session.get(User, student_id)
-
-        if not student or student.role != "student":
-            message = "Unauthorized user or invalid ID"
-        else:
-            active_pass = Pass.query.filter_by(student_id=student.id, checkin_at=None).first()
-
-            if active_pass:
-                if active_pass.status == STATUS_PENDING_START:
-                    message = "Your pass is waiting for approval."
-                else:
-                    logs_for_station = [l for l in active_pass.events if l.station == station]
-                    num_in = sum(1 for l in logs_for_station if l.event == "in")
-                    num_out = sum(1 for l in logs_for_station if l.event == "out")
-                    new_event = "in" if num_in <= num_out else "out"
-
-                    last_event = db.session.query(PassEvent).filter_by(pass_id=active_pass.id)\
-                        .order_by(PassEvent.timestamp.desc()).first()
-
-                    # Prevent double-swipe abuse
-                    if (
-                        last_event and
-                        last_event.station == station and
-                        last_event.event == "out" and
-                        new_event == "in" and
-                        (datetime.utcnow() - last_event.timestamp).total_seconds() < 30
-                    ):
-                        message = "Already swiped out - wait a moment before re-entering."
-                    else:
-                        # Set return room if valid station (not classroom)
-                        if (
-                            new_event == "in" and
-                            not active_pass.room_in and
-                            is_station(station, config=config) and
-                            station != active_pass.origin_room
-                        ):
-                            active_pass.room_in = station
-                            db.session.commit()
-
-                        pass_manager.record_pass_event(active_pass, station, new_event)
-
-                        # Clear return room if exiting it
-                        if new_event == "out" and active_pass.room_in == station:
-                            active_pass.room_in = None
-                            db.session.commit()
-
-                        # Check-in back to origin
-                        if new_event == "in" and station == active_pass.origin_room:
-                            if not active_pass.room_in:
-                                active_pass.room_in = station
-                            pass_manager.return_pass(active_pass, station=station)
-                            message = f"{student.name}'s pass ended at {station}."
-                        else:
-                            active_pass.status = STATUS_ACTIVE
-                            db.session.commit()
-                            message = f"{student.name} {new_event} recorded at {station}."
-            else:
-                # Self-checkout logic for classrooms
-                if not is_station(station):
-                    max_passes = config.get("passes_available", 2)
-                    active_count = Pass.query.filter(
-                        Pass.date == datetime.now().date(),
-                        Pass.period.in_(periods),
-                        Pass.origin_room == station,
-                        Pass.checkin_at == None
-                    ).count()
-
-                    if active_count >= max_passes:
-                        message = f"Max passes reached for Room {station}."
-                    else:
-                        new_pass = Pass(
-                            student_id=student.id,
-                            date=datetime.now().date(),
-                            period=current_period,
-                            checkout_at=datetime.now(),
-                            origin_room=station,
-                            status=STATUS_ACTIVE
-                        )
-                        db.session.add(new_pass)
-                        db.session.commit()
-                        log_audit(student.id, f"Checked out from classroom {station}")
-                        message = f"{student.name} checked out from Room {station}."
-                else:
-                    message = "You don’t have an active pass to use this station."
+        _, message = swipes.swipe(request.form.get('student_id', '').strip(), station)
 
     return render_template('station.html', station=station, passes=[], message=message)
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Batch Swipe API (kiosk offline queue)
+# ─────────────────────────────────────────────────────────────────────────────
+# Body: {"swipes": [{"key": <client uuid>, "student_id": ..., "ts": <epoch ms>}, ...]}
+# Reply: {"results": [{"key", "code", "ok", "message", "duplicate"}, ...]} in the
+# order the swipes were applied. Safe to retry: known keys are not re-applied.
+@passlog_bp.route('/station_swipes', methods=['POST'])
+def station_swipes():
+    if 'station_id' not in session:
+        return jsonify({'message': 'Station not set.'}), 403
+
+    data = request.get_json(silent=True) or {}
+    items = data.get('swipes')
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        return jsonify({'message': 'Expected {"swipes": [...]}.'}), 400
+
+    station = session['station_id']
+    activate_room(station)
+    return jsonify({'results': swipes.ingest(station, items)})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Single Swipe API (scanner kiosks)
+# ─────────────────────────────────────────────────────────────────────────────
+# Body: {"student_id": ..., "key": <optional client uuid>}. Reply: {"code", "message"}
+# only. The kiosk page activates the station once on load, so nothing per swipe
+# touches active_rooms. With a key, the key is claimed first and the result kept for
+# /station_swipes replays; a swipe that was not applied answers 503 so the kiosk queues it.
+@passlog_bp.route('/station_swipe', methods=['POST'])
+def station_swipe():
+    station = session.get('station_id')
+    if not station:
+        return jsonify({'code': 'no_station', 'message': 'Station not set.'}), 403
+
+    data = request.get_json(silent=True) or {}
+    student_id = str(data.get('student_id') or '').strip()
+    code, message = swipes.live(station, student_id, str(data.get('key') or '').strip())
+    if code == swipes.RETRY:
+        response = jsonify({'code': code, 'message': message})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    return jsonify({'code': code, 'message': message})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Kiosk Service Worker
+# ─────────────────────────────────────────────────────────────────────────────
+# Served from the root so its scope covers /station_console.
+@passlog_bp.route('/kiosk_sw.js')
+def kiosk_service_worker():
+    response = send_from_directory(os.path.join(current_app.static_folder, 'js'), 'kiosk_sw.js')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Route: Shutdown Station Kiosk
 # ─────────────────────────────────────────────────────────────────────────────
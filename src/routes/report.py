@@ -2,12 +2,14 @@
 # Admin-side reports: weekly summary, CSV exports, and pass history view
 
 from flask import Blueprint, render_template, session, redirect, url_for, jsonify, Response, request, make_response
-from datetime import datetime
+from datetime import datetime, timedelta
 import csv
 from io import StringIO
 
 from src.models import db, Pass, User
 from src.utils import log_audit, load_config, csv_response
+from src.services import history, rollups, analytics, snapshots, audit_search
+from src.services.replica import read_only
 
 report_bp = Blueprint('report', __name__)
 config = load_config()
@@ -20,41 +22,34 @@ THRESHOLDS = config.get("report_time_thresholds", {"over_5": 300, "over_10": 600
 # Route: Weekly Summary View (HTML)
 # ─────────────────────────────────────────────────────────────────────────────
 @report_bp.route('/admin_report')
+@read_only
 def admin_report():
     if not session.get('logged_in'):
         return redirect(url_for('auth.login'))
 
     report_data = []
+    week_start, _ = rollups.week_bounds(rollups.week_of(request.args.get("week")))
+    week = rollups.student_week(week_start)
 
     for student in User.query.filter_by(role="student"):
-        records = Pass.query.filter_by(student_id=student.id).all()
-        day_totals = {d: 0 for d in REPORT_DAYS}
-        over_5 = sum(1 for r in records if (r.total_pass_time or 0) > THRESHOLDS["over_5"])
-        over_10 = sum(1 for r in records if (r.total_pass_time or 0) > THRESHOLDS["over_10"])
-        used_override = any(r.is_override for r in records)
-
-        for r in records:
-            dname = r.date.strftime('%A')
-            if dname in day_totals:
-                day_totals[dname] += r.total_pass_time or 0
-
-        weekly = ' '.join(f"{d[0]}:{day_totals[d]//60}" for d in REPORT_DAYS)
+        rec = week.get(student.id)
         report_data.append({
             'student_name': student.name,
             'student_id': student.id,
-            'weekly_report': weekly,
-            'passes_over_5_min': over_5,
-            'passes_over_10_min': over_10,
-            'used_override': '✔️' if used_override else ''
+            'weekly_report': rollups.weekly_string(rec, REPORT_DAYS),
+            'passes_over_5_min': rec["over_5"] if rec else 0,
+            'passes_over_10_min': rec["over_10"] if rec else 0,
+            'used_override': '✔️' if rec and rec["overrides"] else ''
         })
 
-    return render_template('admin_report.html', report_data=report_data)
+    return render_template('admin_report.html', report_data=report_data, week_start=week_start.isoformat())
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Route: Weekly Summary CSV Export
 # ─────────────────────────────────────────────────────────────────────────────
 @report_bp.route('/admin_report_csv')
+@read_only
 def admin_report_csv():
     if not session.get('logged_in'):
         return redirect(url_for('auth.login'))
@@ -64,19 +59,14 @@ def admin_report_csv():
     writer.writerow(['Student Name', 'Student ID', 'Weekly Report', 'Passes Over 5 Min', 'Passes Over 10 Min'])
 
     days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+    week = rollups.student_week(rollups.week_of(request.args.get("week")))
 
     for student in User.query.filter_by(role="student"):
-        records = Pass.query.filter_by(student_id=student.id).all()
-        day_totals = {d: 0 for d in days}
-        over_5 = sum(1 for r in records if (r.total_pass_time or 0) > 300)
-        over_10 = sum(1 for r in records if (r.total_pass_time or 0) > 600)
-
-        for r in records:
-            if r.date.strftime('%A') in day_totals:
-                day_totals[r.date.strftime('%A')] += r.total_pass_time or 0
-
-        weekly = ' '.join(f"{d[0]}:{day_totals[d]//60}" for d in days)
-        writer.writerow([student.name, student.id, weekly, over_5, over_10])
+        rec = week.get(student.id)
+        writer.writerow([
+            student.name, student.id, rollups.weekly_string(rec, days),
+            rec["over_5"] if rec else 0, rec["over_10"] if rec else 0
+        ])
 
     return csv_response(output, "weekly_report")
 
@@ -85,13 +75,18 @@ def admin_report_csv():
 # Route: Pass History Table and Export
 # ─────────────────────────────────────────────────────────────────────────────
 @report_bp.route('/admin_pass_history')
+@read_only
 def admin_pass_history():
     if not session.get('logged_in'):
         return redirect(url_for('auth.login'))
 
-    passes = Pass.query.filter(Pass.checkin_at != None).order_by(
-        Pass.date.desc(), Pass.checkout_at.desc()
-    ).limit(100).all()
+    h = history.ALL
+    passes = history.rows(
+        h.c.checkin_at != None,
+        order_by=(h.c.date.desc(), h.c.checkout_at.desc()),
+        limit=100
+    )
+    events = history.events_for(passes)
 
     # CSV Export
     if request.args.get("export") == "csv":
@@ -104,7 +99,7 @@ def admin_pass_history():
         ])
 
         for p in passes:
-            logs = sorted(p.events, key=lambda l: l.timestamp)
+            logs = events[(p.store, p.id)]
             station_in = next((l for l in logs if l.event == "in"), None)
             station_out = next((l for l in logs if l.event == "out"), None)
 
@@ -114,10 +109,10 @@ def admin_pass_history():
 
             writer.writerow([
                 p.student_id,
-                p.student.name if p.student else "-",
+                p.student_name or "-",
                 p.date.strftime('%Y-%m-%d'),
                 p.period,
-                f"{p.room_out} @ {p.checkout_at.strftime('%H:%M:%S')}" if p.checkout_at else "-",
+                f"{p.origin_room} @ {p.checkout_at.strftime('%H:%M:%S')}" if p.checkout_at else "-",
                 f"{station_in.station} @ {station_in.timestamp.strftime('%H:%M:%S')}" if station_in else "-",
                 f"{station_out.station} @ {station_out.timestamp.strftime('%H:%M:%S')}" if station_out else "-",
                 f"{p.room_in} @ {p.checkin_at.strftime('%H:%M:%S')}" if p.checkin_at else "-",
@@ -133,7 +128,7 @@ def admin_pass_history():
     # HTML Fallback
     rows = []
     for p in passes:
-        logs = sorted(p.events, key=lambda l: l.timestamp)
+        logs = events[(p.store, p.id)]
         station_in = next((l for l in logs if l.event == "in"), None)
         station_out = next((l for l in logs if l.event == "out"), None)
 
@@ -143,10 +138,10 @@ def admin_pass_history():
 
         rows.append({
             "id": p.student_id,
-            "student": p.student.name if p.student else "-",
+            "student": p.student_name or "-",
             "date": p.date.strftime('%Y-%m-%d'),
             "period": p.period,
-            "room_out": f"{p.room_out} @ {p.checkout_at.strftime('%H:%M:%S')}" if p.checkout_at else "-",
+            "room_out": f"{p.origin_room} @ {p.checkout_at.strftime('%H:%M:%S')}" if p.checkout_at else "-",
             "station_in": f"{station_in.station} @ {station_in.timestamp.strftime('%H:%M:%S')}" if station_in else "-",
             "station_out": f"{station_out.station} @ {station_out.timestamp.strftime('%H:%M:%S')}" if station_out else "-",
             "room_in": f"{p.room_in} @ {p.checkin_at.strftime('%H:%M:%S')}" if p.checkin_at else "-",
@@ -158,4 +153,53 @@ def admin_pass_history():
         })
 
     return render_template("admin_pass_history.html", rows=rows)
-
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Analytics (percentiles, heatmap, utilization, outliers)
+# ─────────────────────────────────────────────────────────────────────────────
+@report_bp.route('/admin_analytics')
+def admin_analytics():
+    if not session.get('logged_in'):
+        return redirect(url_for('auth.login'))
+    start, end = analytics.date_range(request.args.get("start"), request.args.get("end"))
+    return render_template("admin_analytics.html", start=start.isoformat(), end=end.isoformat())
+
+
+@report_bp.route('/admin_analytics_data')
+@read_only
+def admin_analytics_data():
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 403
+    start, end = analytics.date_range(request.args.get("start"), request.args.get("end"))
+
+    # A snapshot taken after the range closed holds all of it: read that, not the live DB
+    closed = snapshots.fresh(datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    if closed:
+        with snapshots.session(closed) as snap:
+            return jsonify({**analytics.report(start, end, snap), "source": "snapshot"})
+    return jsonify({**analytics.report(start, end), "source": "live"})
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Audit Search (JSON)
+# ─────────────────────────────────────────────────────────────────────────────
+# ?q=<words>&student=&action=&room=&pass_id=&start=<ISO>&end=<ISO>&limit=
+# Newest first; pass the reply's "next" back as ?before= for the following page.
+@report_bp.route('/admin_audit/search')
+@read_only
+def admin_audit_search():
+    if not session.get('logged_in') or session.get('role') != "admin":
+        return jsonify({'error': 'Unauthorized'}), 403
+    args = request.args
+    try:
+        start = datetime.fromisoformat(args["start"]) if args.get("start") else None
+        end = datetime.fromisoformat(args["end"]) if args.get("end") else None
+        pass_id = int(args["pass_id"]) if args.get("pass_id") else None
+        before = int(args["before"]) if args.get("before") else None
+        limit = int(args.get("limit", 50))
+    except ValueError:
+        return jsonify({'error': 'start/end must be ISO dates; pass_id, before and limit integers'}), 400
+    return jsonify(audit_search.search(
+        q=args.get("q"), student_id=args.get("student"), action=args.get("action"),
+        room=args.get("room"), pass_id=pass_id, start=start, end=end, before=before, limit=limit,
+    ))
@@ -1,12 +1,13 @@
 # src/routes/students.py
 # Admin routes to view, upload, download, and add student schedules
 
-from flask import Blueprint, render_template, request, redirect, url_for, session, Response
+from flask import Blueprint, render_template, request, redirect, url_for, session, Response, jsonify
 from src.models import db, User, StudentPeriod
 from src.utils import log_audit, load_config
 import csv
 import io
-from werkzeug.security import generate_password_hash
+from src.services import login as login_service, jobs, changes, directory
+from src.services.replica import read_only
 
 students_bp = Blueprint('students', __name__)
 config = load_config()
@@ -20,14 +21,30 @@ def manage_students():
     if not session.get('logged_in'):
         return redirect(url_for('auth.login'))
 
-    students = User.query.filter_by(role="student").all()
-    return render_template('students.html', students=students)
+    # Rows are paged in by students.js from /students/directory
+    return render_template('students.html')
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Route: Student Directory (JSON, keyset-paged, type-ahead search)
+# ─────────────────────────────────────────────────────────────────────────────
+# ?q=<ID or name prefix>&after=<last ID of the previous page>&limit=
+@students_bp.route('/students/directory')
+def student_directory():
+    if not session.get('logged_in') or session.get('role') not in ("admin", "teacher"):
+        return jsonify({'error': 'Unauthorized'}), 403
+    try:
+        limit = int(request.args.get("limit", 50))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify(directory.page(request.args.get("q"), request.args.get("after") or None, limit))
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Route: Download Student Schedule CSV
 # ─────────────────────────────────────────────────────────────────────────────
 @students_bp.route('/students/download')
+@read_only
 def download_students_csv():
     if not session.get('logged_in'):
         return redirect(url_for('auth.login'))
@@ -71,54 +88,14 @@ def upload_students_csv():
     if not file:
         return "No file uploaded", 400
 
-    try:
-        from src.models import StudentSchedule, StudentPeriod
-
-        StudentSchedule.query.delete()
-        StudentPeriod.query.delete()
-        User.query.filter_by(role="student").delete()
-        db.session.commit()
-
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        reader = csv.DictReader(stream)
-
-        for row in reader:
-            student_id = row['ID'].strip()
-            name = row['Name'].strip()
-            email = f"{student_id}@school.org"
-            password = generate_password_hash(student_id)
-
-            student = User(
-                id=student_id,
-                name=name,
-                email=email,
-                role="student",
-                password=password
-            )
-            db.session.add(student)
-
-            sched = StudentSchedule(student_id=student_id)
-            for key in row:
-                if key.startswith("period_"):
-                    setattr(sched, key, row[key].strip())
-            db.session.add(sched)
-
-        db.session.commit()
-
-        # Sync to StudentPeriod
-        all_scheds = StudentSchedule.query.all()
-        for sched in all_scheds:
-            for key, val in vars(sched).items():
-                if key.startswith("period_") and val:
-                    period = key.replace("period_", "").replace("_", "/")
-                    db.session.add(StudentPeriod(student_id=sched.student_id, period=period, room=val))
-        db.session.commit()
-
-        log_audit("admin", "Uploaded student roster and synced schedules")
-        return redirect(url_for('students.manage_students'))
-
-    except Exception as e:
-        return f"Upload failed: {str(e)}", 500
+    # Parsed, hashed and swapped in on the job runner; the page polls the job
+    job_id = jobs.submit("roster_upload", {
+        "csv_text": file.stream.read().decode("UTF8"),
+        "submitted_by": session.get('name', 'admin'),
+    }, submitted_by=session.get('name', 'admin'))
+    if not job_id:
+        return "Too many jobs running - try again shortly.", 429
+    return redirect(url_for('students.manage_students', job=job_id))
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -138,7 +115,7 @@ def add_student():
         student = User.query.get(student_id)
         if not student:
             email = f"{student_id}@school.org"
-            password = generate_password_hash(student_id)
+            password = login_service.hash_password(student_id)
             student = User(
                 id=student_id,
                 name=name,
@@ -150,7 +127,9 @@ def add_student():
 
         sp = StudentPeriod(student_id=student_id, period=period, room=room)
         db.session.add(sp)
+        changes.record("student", student_id, "period_added", name=name, period=period, room=room)
         db.session.commit()
+        directory.invalidate()
 
         log_audit("admin", f"Manually added student {student_id} period {period} → {room}")
         return redirect(url_for('students.manage_students'))
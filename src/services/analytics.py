@@ -0,0 +1,206 @@
+# src/services/analytics.py
+# Pass-duration analytics over a date range: closed passes from both stores are loaded once into
+# NumPy column arrays (epoch seconds + integer-coded students/rooms/periods) and every statistic
+# is a vectorized grouping (bincount / argsort / percentile) instead of a Python loop over ORM rows
+
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import select, union_all, func, Integer
+from src.models import db, Pass, PassEvent, PassArchive, PassEventArchive, User
+from src.utils import load_config
+from src.services import rollups, capacity
+
+config = load_config()
+
+PERCENTILES   = (50, 90, 99)
+BUCKET_MIN    = config.get("analytics_bucket_minutes", 5)    # utilization curve resolution
+OUTLIER_Z     = config.get("analytics_outlier_z", 2.0)
+OUTLIER_MIN   = config.get("analytics_outlier_min_passes", 3)
+OUTLIER_LIMIT = 25
+WEEKDAYS      = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Column Loading
+# ─────────────────────────────────────────────────────────────────────────────
+
+class PassFrame:
+    # Parallel arrays, one element per closed pass.
+    def __init__(self, checkout, duration, station, override, students, rooms, periods):
+        self.checkout = np.asarray(checkout, dtype=np.int64)     # epoch seconds (school-local clock)
+        self.duration = np.asarray(duration, dtype=np.int64)     # total_pass_time
+        self.station  = np.asarray(station, dtype=np.int64)      # seconds inside a station
+        self.override = np.asarray(override, dtype=bool)
+        self.student_labels, self.student = np.unique(np.asarray(students, dtype=str), return_inverse=True)
+        self.room_labels, self.room       = np.unique(np.asarray(rooms, dtype=str), return_inverse=True)
+        self.period_labels, self.period   = np.unique(np.asarray(periods, dtype=str), return_inverse=True)
+        self.day     = self.checkout // 86400
+        self.weekday = (self.day + 3) % 7                           # 1970-01-01 was a Thursday
+        self.minute  = (self.checkout % 86400) // 60
+
+    def __len__(self):
+        return len(self.checkout)
+
+# Closed passes from passes + passes_archive with checkout date in [start, end].
+# `session` may be a snapshot session (services/snapshots.py); default is the live DB.
+def load(start, end, session=None):
+    parts = []
+    for pass_model, event_model in ((Pass, PassEvent), (PassArchive, PassEventArchive)):
+        parts.append(rollups.closed_passes(pass_model, event_model).where(pass_model.date.between(start, end)))
+    src = union_all(*parts).subquery()
+    rows = (session or db.session).execute(
+        select(
+            func.cast(func.strftime("%s", src.c.checkout_at), Integer),
+            func.coalesce(src.c.total_pass_time, 0),
+            src.c.station,
+            func.coalesce(src.c.is_override, False),
+            src.c.student_id,
+            src.c.origin_room,
+            func.coalesce(src.c.period, rollups.NO_PERIOD),
+        )
+    ).all()
+    cols = list(zip(*rows)) if rows else [()] * 7
+    return PassFrame(*cols)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Statistics
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _pcts(values):
+    if not len(values):
+        return {f"p{p}": None for p in PERCENTILES}
+    return {f"p{p}": round(float(v), 1) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+# Whole-range duration distribution.
+def summary(f):
+    d = f.duration
+    return {
+        "passes": len(f),
+        "students": int(len(np.unique(f.student))) if len(f) else 0,
+        "days": int(len(np.unique(f.day))) if len(f) else 0,
+        "mean": round(float(d.mean()), 1) if len(f) else None,
+        **_pcts(d),
+        "station_share": round(float(f.station.sum() / d.sum()), 3) if d.sum() else 0.0,
+        "overrides": int(f.override.sum()),
+    }
+
+# Percentiles per group: one argsort, then split at the code boundaries.
+def percentiles_by(codes, labels, values):
+    if not len(codes):
+        return []
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    cuts = np.flatnonzero(np.diff(sorted_codes)) + 1
+    starts = np.r_[0, cuts]
+    return [
+        {"key": str(labels[sorted_codes[s]]), "passes": int(len(g)), **_pcts(g)}
+        for s, g in zip(starts, np.split(values[order], cuts))
+    ]
+
+# Period × weekday grid of pass counts and mean durations.
+def heatmap(f):
+    P = len(f.period_labels)
+    idx = f.period * 7 + f.weekday
+    counts = np.bincount(idx, minlength=P * 7).reshape(P, 7)
+    totals = np.bincount(idx, weights=f.duration, minlength=P * 7).reshape(P, 7)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, totals / counts, 0)
+    return {
+        "periods": f.period_labels.tolist(),
+        "weekdays": WEEKDAYS,
+        "counts": counts.tolist(),
+        "mean_seconds": np.round(means, 1).tolist(),
+    }
+
+# Average passes out per room across the school day, from a +1/-1 difference array.
+def utilization(f):
+    if not len(f):
+        return {"bucket_minutes": BUCKET_MIN, "start_minute": 0, "rooms": []}
+    back = np.minimum(f.minute + f.duration // 60, 24 * 60 - 1)   # passes left open overnight stop at midnight
+    first = int(f.minute.min()) // BUCKET_MIN * BUCKET_MIN
+    B = (int(back.max()) - first) // BUCKET_MIN + 1
+    R = len(f.room_labels)
+
+    start_b = (f.minute - first) // BUCKET_MIN
+    end_b   = (back - first) // BUCKET_MIN + 1
+    diff = (np.bincount(f.room * (B + 1) + start_b, minlength=R * (B + 1))
+            - np.bincount(f.room * (B + 1) + end_b, minlength=R * (B + 1))).reshape(R, B + 1)
+    out = np.cumsum(diff, axis=1)[:, :B] / max(1, len(np.unique(f.day)))
+
+    rooms = []
+    for r, label in enumerate(f.room_labels.tolist()):
+        cap = capacity.capacity_for(label) or 1
+        curve = out[r]
+        rooms.append({
+            "room": label,
+            "capacity": cap,
+            "avg_out": np.round(curve, 2).tolist(),
+            "peak_avg_out": round(float(curve.max()), 2),
+            "peak_minute": first + int(curve.argmax()) * BUCKET_MIN,
+            "mean_utilization": round(float(curve.mean() / cap), 3),
+        })
+    rooms.sort(key=lambda x: -x["mean_utilization"])
+    return {"bucket_minutes": BUCKET_MIN, "start_minute": first, "rooms": rooms}
+
+# Students whose pass count or mean duration sits OUTLIER_Z deviations above their peers.
+def outliers(f, session=None):
+    S = len(f.student_labels)
+    if not S:
+        return []
+    counts = np.bincount(f.student, minlength=S)
+    totals = np.bincount(f.student, weights=f.duration, minlength=S)
+    eligible = counts >= OUTLIER_MIN
+    if eligible.sum() < 2:
+        return []
+    means = np.where(counts > 0, totals / np.maximum(counts, 1), 0)
+
+    def z(x):
+        mu, sd = x[eligible].mean(), x[eligible].std()
+        return np.where(eligible, (x - mu) / sd, 0) if sd else np.zeros(S)
+
+    z_count, z_mean = z(counts.astype(float)), z(means)
+    score = np.maximum(z_count, z_mean)
+    picked = np.flatnonzero(score >= OUTLIER_Z)
+    picked = picked[np.argsort(-score[picked])][:OUTLIER_LIMIT]
+
+    ids = f.student_labels[picked].tolist()
+    names = dict((session or db.session).execute(select(User.id, User.name).where(User.id.in_(ids))).all())
+    return [{
+        "student_id": sid,
+        "student_name": names.get(sid, "-"),
+        "passes": int(counts[i]),
+        "mean_seconds": round(float(means[i]), 1),
+        "total_seconds": int(totals[i]),
+        "z_count": round(float(z_count[i]), 2),
+        "z_mean": round(float(z_mean[i]), 2),
+    } for sid, i in zip(ids, picked)]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Report
+# ─────────────────────────────────────────────────────────────────────────────
+
+# ?start=&end= as dates; defaults to the last 30 days.
+def date_range(start=None, end=None):
+    try:
+        end = date.fromisoformat(end) if end else date.today()
+        start = date.fromisoformat(start) if start else end - timedelta(days=29)
+    except ValueError:
+        end = date.today()
+        start = end - timedelta(days=29)
+    return min(start, end), max(start, end)
+
+# Everything the analytics view shows, as plain JSON types.
+def report(start, end, session=None):
+    f = load(start, end, session)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "summary": summary(f),
+        "by_room": percentiles_by(f.room, f.room_labels, f.duration),
+        "by_period": percentiles_by(f.period, f.period_labels, f.duration),
+        "heatmap": heatmap(f),
+        "utilization": utilization(f),
+        "outliers": outliers(f, session),
+    }
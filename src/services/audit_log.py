@@ -0,0 +1,355 @@
+# src/services/audit_log.py
+# Audit file sink: JSON lines in data/logs/audit/audit.jsonl, rotated by size and age into
+# gzip segments, with index.json listing each segment's time range. Range reads open only
+# the segments that overlap; tail() follows the live file across rotations, woken by
+# inotify on Linux and by a short poll elsewhere.
+
+import os, json, gzip, time, select, threading, ctypes, ctypes.util
+from datetime import datetime, timedelta
+from src.utils import load_config
+
+config = load_config()
+
+LOG_DIR       = os.path.join("data", "logs", "audit")
+MAX_BYTES     = config.get("audit_log_max_bytes", 5 * 1024 * 1024)   # rotate at this size ...
+ROTATE_HOURS  = config.get("audit_log_rotate_hours", 24)             # ... or once this old
+KEEP_SEGMENTS = config.get("audit_log_keep_segments", 90)            # gzip segments kept
+POLL_S        = 1.0     # tail wake-up without inotify (and inotify's safety timeout)
+GZIP_LEVEL    = 6
+
+CURRENT = "audit.jsonl"
+INDEX   = "index.json"
+
+_lock      = threading.Lock()   # appends and the rename in rotate()
+_gzip_lock = threading.Lock()   # compression and index updates
+_live      = {}                 # live file as last seen: inode, size, time of first entry
+
+
+def _path(name):
+    return os.path.join(LOG_DIR, name)
+
+def _parse(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+def _first_time(path):
+    with open(path, encoding="utf-8") as f:
+        entry = _parse(f.readline())
+    return datetime.fromisoformat(entry["t"]) if entry else None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Writing
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Append one entry. Each write opens the file in append mode, so other processes
+# (scripts, a second server) can append and rotate the same folder safely. An entry
+# past the age limit starts a new segment; one that fills the size limit ends one.
+def write(who, msg, at=None):
+    write_many([(who, msg, at or datetime.now())])
+
+# Several entries [(who, msg, at)] in one append (bulk operations like a room reset).
+def write_many(entries):
+    if not entries:
+        return
+    lines = "".join(
+        json.dumps({"t": at.isoformat(timespec="microseconds"), "who": who, "msg": msg},
+                   ensure_ascii=False) + "\n"
+        for who, msg, at in entries
+    )
+    with _lock:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        path = _path(CURRENT)
+        rotated = _expired(path, entries[0][2]) and _move_live()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            size = os.fstat(f.fileno()).st_size
+        if size >= MAX_BYTES:
+            rotated = _move_live() or rotated
+    if rotated:
+        threading.Thread(target=compress_pending, daemon=True).start()
+
+# Whether the live file's first entry is older than ROTATE_HOURS at `at`. The first
+# entry is cached per inode; a new inode or a shrunk file means another process rotated.
+def _expired(path, at):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if _live.get("ino") != st.st_ino or _live.get("size", 0) > st.st_size:
+        _live.update(ino=st.st_ino, first=_first_time(path) or at)
+    _live["size"] = st.st_size
+    return at - _live["first"] >= timedelta(hours=ROTATE_HOURS)
+
+# Rename the live file aside (caller holds _lock). False if another process got there
+# first, or, on Windows, while a reader has it open: the next write tries again.
+def _move_live():
+    try:
+        os.replace(_path(CURRENT), _path(f"audit_{datetime.now():%Y%m%d_%H%M%S_%f}.jsonl"))
+    except OSError:
+        return False
+    _live.clear()
+    return True
+
+# Start a new segment now (compressed in the background).
+def rotate():
+    with _lock:
+        moved = _move_live()
+    if moved:
+        threading.Thread(target=compress_pending, daemon=True).start()
+
+# Gzip every rotated plain segment (including any a crash left behind), index it, prune.
+# The plain file goes only once the gzip copy is indexed, so a tail always finds one.
+def compress_pending():
+    with _gzip_lock:
+        if _load_index() is None:
+            rebuild_index()
+        names = sorted(n for n in os.listdir(LOG_DIR) if n.startswith("audit_") and n.endswith(".jsonl"))
+        for name in names:
+            entry = _compress(name)
+            if entry:
+                _update_index(add=entry)
+            os.remove(_path(name))
+        _prune()
+
+def _compress(name):
+    src, dst = _path(name), _path(name + ".gz")
+    first = last = None
+    lines = 0
+    with open(src, "rb") as fin, gzip.open(dst + ".part", "wb", GZIP_LEVEL) as fout:
+        for raw in fin:
+            fout.write(raw)
+            entry = _parse(raw)
+            if entry:
+                first = first or entry["t"]
+                last = entry["t"]
+                lines += 1
+    os.replace(dst + ".part", dst)
+    if not lines:
+        os.remove(dst)
+        return None
+    return {"file": name + ".gz", "first": first, "last": last, "lines": lines, "bytes": os.path.getsize(dst)}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Segment Index
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Segments oldest first: [{"file", "first", "last", "lines", "bytes"}]. Only the
+# compressor writes index.json; it rebuilds it from the gzip files if it goes missing.
+def segments():
+    return _load_index() or []
+
+def _load_index():
+    try:
+        with open(_path(INDEX), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def rebuild_index():
+    entries = []
+    for name in sorted(n for n in os.listdir(LOG_DIR) if n.endswith(".jsonl.gz")):
+        with gzip.open(_path(name), "rt", encoding="utf-8") as f:
+            times = [e["t"] for e in map(_parse, f) if e]
+        if times:
+            entries.append({"file": name, "first": times[0], "last": times[-1],
+                            "lines": len(times), "bytes": os.path.getsize(_path(name))})
+    _save_index(entries)
+    return entries
+
+def _save_index(entries):
+    tmp = _path(INDEX + ".part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=1)
+    for attempt in range(5):
+        try:
+            os.replace(tmp, _path(INDEX))
+            return
+        except PermissionError:   # Windows: a reader has index.json open for a moment
+            time.sleep(0.05 * (attempt + 1))
+    os.replace(tmp, _path(INDEX))
+
+def _update_index(add=None, drop=()):
+    entries = [e for e in segments() if e["file"] not in drop]
+    if add and all(e["file"] != add["file"] for e in entries):
+        entries.append(add)
+    _save_index(sorted(entries, key=lambda e: e["first"]))
+
+def _prune():
+    entries = segments()
+    old = entries[:-KEEP_SEGMENTS] if KEEP_SEGMENTS else []
+    for e in old:
+        try:
+            os.remove(_path(e["file"]))
+        except OSError:
+            pass
+    if old:
+        _update_index(drop={e["file"] for e in old})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reading
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Entries between `start` and `end` (datetimes, either may be None), oldest first.
+# Segments whose index range misses the window are never opened.
+def read(start=None, end=None):
+    lo = start.isoformat() if start else ""
+    hi = end.isoformat() if end else "~"
+    files = [(gzip.open, e["file"]) for e in segments() if e["last"] >= lo and e["first"] <= hi]
+    if os.path.isdir(LOG_DIR):   # rotated but not compressed yet, then the live file
+        files += [(open, n) for n in sorted(os.listdir(LOG_DIR)) if n.startswith("audit_") and n.endswith(".jsonl")]
+        files.append((open, CURRENT))
+    for opener, name in files:
+        try:
+            with opener(_path(name), "rt", encoding="utf-8") as f:
+                for entry in map(_parse, f):
+                    if entry and lo <= entry["t"] <= hi:
+                        yield entry
+        except FileNotFoundError:   # rotated or pruned while we were reading
+            continue
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tail
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Linux inotify through libc (no extra package): wakes on any write, rename or
+# create in the log folder.
+class _Inotify:
+    MASK = 0x2 | 0x40 | 0x80 | 0x100 | 0x200      # MODIFY | MOVED_FROM | MOVED_TO | CREATE | DELETE
+
+    def __init__(self, folder):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), self.MASK) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def wait(self, timeout):
+        if select.select([self.fd], [], [], timeout)[0]:
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+class _Poll:
+    def wait(self, timeout):
+        time.sleep(timeout)
+
+    def close(self):
+        pass
+
+# Rotated segments oldest first, as (time of first entry, opener, file name): plain files
+# still waiting for compression, then the indexed gzip segments.
+def _rotated():
+    found = []
+    for name in (n for n in os.listdir(LOG_DIR) if n.startswith("audit_") and n.endswith(".jsonl")):
+        try:
+            with open(_path(name), "rb") as f:
+                entry = _parse(f.readline())
+        except FileNotFoundError:
+            continue
+        if entry:
+            found.append((entry["t"], open, name))
+    found += [(e["first"], gzip.open, e["file"]) for e in segments()]
+    return sorted({s[0]: s for s in found}.values(), key=lambda s: s[0])   # indexed copy wins
+
+def _watcher(folder):
+    try:
+        return _Inotify(folder)
+    except (OSError, AttributeError):   # not Linux, or inotify unavailable
+        return _Poll()
+
+# Follow the log: yields each new entry as it is written, carrying on across rotations.
+# from_start: begin at the top of the live file instead of its end.
+# The live file is opened per wake-up rather than held, so the writer can rename it
+# even on Windows. After rotations, the rest of the followed segment and every segment
+# rotated since are read (plain or gzip) before moving on to the new live file.
+def tail(stop=None, from_start=False):
+    os.makedirs(LOG_DIR, exist_ok=True)
+    watcher = _watcher(LOG_DIR)
+    path = _path(CURRENT)
+    segment, offset = None, 0     # first-entry time of the file being followed, bytes read
+    finished = None               # first-entry time of the last rotated segment read to the end
+    lost_at = None
+
+    def live_head():
+        try:
+            with open(path, "rb") as f:
+                raw = f.readline()
+        except FileNotFoundError:
+            return None, False
+        entry = _parse(raw) if raw.endswith(b"\n") else None
+        return (entry or {}).get("t"), bool(raw)
+
+    if not from_start:
+        segment, _ = live_head()
+        offset = os.path.getsize(path) if segment else 0
+
+    try:
+        while not (stop and stop.is_set()):
+            head, exists = live_head()
+            if exists and head is None:          # first line still being written
+                watcher.wait(POLL_S / 10)
+                continue
+
+            if segment is None and finished:
+                # Between segments: the next one may have rotated before the live file reappeared
+                later = [s for s in _rotated() if s[0] > finished]
+                if later:
+                    segment, offset = later[0][0], 0
+                    continue
+                if not head:
+                    watcher.wait(POLL_S)
+                    continue
+
+            if segment and head != segment:
+                # Rotated since the last read: finish this segment, then step to the next one
+                rotated = _rotated()
+                pos = next((i for i, s in enumerate(rotated) if s[0] == segment), None)
+                if pos is None:
+                    lost_at = lost_at or time.monotonic()
+                    if time.monotonic() - lost_at < 10 * POLL_S:
+                        watcher.wait(POLL_S / 10)   # between rename and index update
+                        continue
+                    finished, segment, offset, lost_at = segment, None, 0, None   # pruned: skip ahead
+                    continue
+                _, opener, name = rotated[pos]
+                try:
+                    with opener(_path(name), "rb") as f:
+                        f.seek(offset)
+                        for raw in f:
+                            if entry := _parse(raw):
+                                yield entry
+                except FileNotFoundError:            # compressed under us: retry from the index
+                    continue
+                finished, segment, offset, lost_at = segment, None, 0, None
+                continue
+
+            if head:
+                try:
+                    with open(path, "rb") as f:
+                        if (_parse(f.readline()) or {}).get("t") != head:
+                            continue                 # rotated since live_head()
+                        f.seek(offset)
+                        chunk = f.read()
+                except FileNotFoundError:
+                    continue
+                complete = chunk[:chunk.rfind(b"\n") + 1]   # leave a half-written line for later
+                segment, offset, finished = head, offset + len(complete), None
+                for raw in complete.splitlines():
+                    if entry := _parse(raw):
+                        yield entry
+            watcher.wait(POLL_S)
+    finally:
+        watcher.close()
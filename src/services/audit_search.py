@@ -0,0 +1,189 @@
+# src/services/audit_search.py
+# Audit search: each audit_log row carries an action, pass id and room parsed from its
+# message, and audit_fts (an FTS5 index over audit_log.reason and student_id, kept in
+# sync by triggers) answers free-text queries. search() pages newest-first by id, so every page is one
+# index walk no matter how much history the table holds.
+
+import re
+from datetime import timedelta
+from sqlalchemy import select, update, text, bindparam, table, literal_column
+from src.models import db, AuditLog
+
+BACKFILL_BATCH = 5000
+PAGE_LIMIT     = 200
+BOUND_SLACK    = timedelta(minutes=1)
+
+# (action, pattern) tried in order; named groups pass_id / room fill those columns.
+PATTERNS = [
+    ("pass_created",    r"^Created pass\s+(?:\(override\)\s+)?for room (?P<room>.+)$"),
+    ("pass_approved",   r"^Approved pass (?P<pass_id>\d+)"),
+    ("pass_rejected",   r"^Rejected pass (?P<pass_id>\d+)"),
+    ("pass_returned",   r"^Returned pass (?P<pass_id>\d+) at (?P<room>.+)$"),
+    ("pass_autoclosed", r"^Auto-closed pass (?P<pass_id>\d+)"),
+    ("pass_reset",      r"^Reset pass (?P<pass_id>\d+) in room (?P<room>.+) by \S+$"),
+    ("pass_overdue",    r"^Pass (?P<pass_id>\d+) overdue .* from (?P<room>[^)]+)\)$"),
+    ("swipe_in",        r"^IN at (?P<room>.+?)(?: \(pass (?P<pass_id>\d+)\))?$"),
+    ("swipe_out",       r"^OUT at (?P<room>.+?)(?: \(pass (?P<pass_id>\d+)\))?$"),
+    ("self_checkout",   r"^Checked out from classroom (?P<room>.+)$"),
+    ("override_created", r"^Created override pass for .+ from (?P<room>\S+) returning to"),
+    ("note_updated",    r"^Note updated on active pass"),
+    ("access_denied",   r"^Denied room access to (?P<room>.+)$"),
+    ("room_activated",  r"^Activated room (?P<room>.+)$"),
+    ("room_deactivated", r"^Deactivated room (?P<room>.+)$"),
+    ("room_removed",    r"^Removed room (?P<room>.+)$"),
+    ("room_renamed",    r'^Renamed room "(?P<room>[^"]*)"'),
+    ("student_added",   r"^Manually added student \S+ period \S+ → (?P<room>.+)$"),
+    ("roster_upload",   r"^Uploaded student roster"),
+    ("schedule_updated", r"^Updated their schedule"),
+    ("login_failed",    r"^Failed admin login"),
+    ("login",           r"logged in successfully$"),
+    ("logout",          r"logout$"),
+]
+_COMPILED = [(action, re.compile(p)) for action, p in PATTERNS]
+
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS audit_fts USING fts5("
+    "reason, student_id, content='audit_log', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS audit_fts_ai AFTER INSERT ON audit_log BEGIN "
+    "INSERT INTO audit_fts(rowid, reason, student_id) VALUES (new.id, new.reason, new.student_id); END",
+    "CREATE TRIGGER IF NOT EXISTS audit_fts_ad AFTER DELETE ON audit_log BEGIN "
+    "INSERT INTO audit_fts(audit_fts, rowid, reason, student_id) "
+    "VALUES ('delete', old.id, old.reason, old.student_id); END",
+    "CREATE TRIGGER IF NOT EXISTS audit_fts_au AFTER UPDATE OF reason, student_id ON audit_log BEGIN "
+    "INSERT INTO audit_fts(audit_fts, rowid, reason, student_id) "
+    "VALUES ('delete', old.id, old.reason, old.student_id); "
+    "INSERT INTO audit_fts(rowid, reason, student_id) VALUES (new.id, new.reason, new.student_id); END",
+]
+
+
+# Structured fields for one audit message: {"action", "pass_id", "room"}.
+def parse(reason):
+    for action, pattern in _COMPILED:
+        m = pattern.search(reason or "")
+        if m:
+            found = m.groupdict()
+            room = found.get("room")
+            return {
+                "action": action,
+                "pass_id": int(found["pass_id"]) if found.get("pass_id") else None,
+                "room": None if room in (None, "room", "None") else room.strip(),
+            }
+    return {"action": "other", "pass_id": None, "room": None}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Setup (create_app, rebuild_db.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Create the FTS table and triggers if missing (drop_all/create_all in rebuild_db.py
+# drops the triggers with audit_log), re-index when either was missing, and parse
+# rows written before the structured columns existed.
+def ensure():
+    def present(kind, name):
+        return db.session.scalar(text("SELECT 1 FROM sqlite_master WHERE type = :k AND name = :n"),
+                                 {"k": kind, "n": name})
+
+    stale = not present("table", "audit_fts") or not present("trigger", "audit_fts_ai")
+    for ddl in FTS_DDL:
+        db.session.execute(text(ddl))
+    if stale:
+        db.session.execute(text("INSERT INTO audit_fts(audit_fts) VALUES ('rebuild')"))
+    db.session.commit()
+    return backfill()
+
+def backfill():
+    stmt = (update(AuditLog.__table__)
+            .where(AuditLog.__table__.c.id == bindparam("_id"))
+            .values(action=bindparam("action"), pass_id=bindparam("pass_id"), room=bindparam("room")))
+    done = 0
+    while True:
+        rows = db.session.execute(
+            select(AuditLog.id, AuditLog.reason).where(AuditLog.action.is_(None)).limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            return done
+        db.session.execute(stmt, [{"_id": r.id, **parse(r.reason)} for r in rows])
+        db.session.commit()
+        done += len(rows)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Search
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Free text → FTS5 query: every word must appear in the message, each as a prefix
+# ("overd" finds "overdue"). Quoting each word keeps FTS5 operators in user input
+# inert. With a student the id goes into the match too, so FTS5 intersects the two
+# posting lists instead of walking every hit for the text and checking the student.
+def fts_query(q, student_id=None):
+    words = re.findall(r"\w+", q or "")
+    if not words:
+        return ""
+    match = "reason : (" + " ".join(f'"{w}"*' for w in words) + ")"
+    if student_id:
+        match += ' AND student_id : "' + student_id.replace('"', '""') + '"'
+    return match
+
+# Time bounds → id bounds, one seek each on the time index. Ids follow time except
+# for writers racing to commit, so the seeks are widened by BOUND_SLACK; the time
+# filter stays on the query, which keeps the result exact, while every other filter
+# walks its own index (which ends in the rowid) backwards between the bounds.
+def _id_bounds(start, end):
+    a = AuditLog
+    lo = hi = None
+    if start:
+        lo = db.session.scalar(select(a.id).where(a.time >= start - BOUND_SLACK).order_by(a.time).limit(1))
+    if end:
+        hi = db.session.scalar(select(a.id).where(a.time < end + BOUND_SLACK).order_by(a.time.desc()).limit(1))
+    return lo, hi
+
+# Newest first, `limit` rows per page. Pass the returned `next` back as `before` for
+# the following page (None: no more rows).
+def search(q=None, student_id=None, action=None, room=None, pass_id=None,
+           start=None, end=None, before=None, limit=50):
+    a = AuditLog
+    limit = max(1, min(limit, PAGE_LIMIT))
+    stmt = select(a.id, a.time, a.student_id, a.reason, a.action, a.pass_id, a.room)
+
+    lo, hi = _id_bounds(start, end)
+    if (start and lo is None) or (end and hi is None):
+        return {"results": [], "next": None}
+
+    match = fts_query(q, student_id)
+    if match:
+        # Bounds and order on the FTS rowid: FTS5 applies both while walking its index
+        key = literal_column("audit_fts.rowid")
+        stmt = (stmt.join(table("audit_fts"), key == a.id)
+                .where(literal_column("audit_fts").op("MATCH")(match)))
+    else:
+        key = a.id
+    for cond in (lo is not None and key >= lo, hi is not None and key <= hi,
+                 before is not None and key < before):
+        if cond is not False:
+            stmt = stmt.where(cond)
+    stmt = stmt.order_by(key.desc())
+
+    if start:
+        stmt = stmt.where(a.time >= start)
+    if end:
+        stmt = stmt.where(a.time < end)
+    if student_id:
+        stmt = stmt.where(a.student_id == student_id)
+    if action:
+        stmt = stmt.where(a.action == action)
+    if room:
+        stmt = stmt.where(a.room == room)
+    if pass_id is not None:
+        stmt = stmt.where(a.pass_id == pass_id)
+
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+    page = rows[:limit]
+    return {
+        "results": [
+            {"id": r.id, "time": r.time.isoformat() if r.time else None, "student_id": r.student_id,
+             "reason": r.reason, "action": r.action, "pass_id": r.pass_id, "room": r.room}
+            for r in page
+        ],
+        "next": page[-1].id if len(rows) > limit else None,
+    }
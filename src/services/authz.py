@@ -0,0 +1,78 @@
+# src/services/authz.py
+# Server-side teacher → room authorization cache (per period), invalidated on schedule edits
+
+from sqlalchemy import or_, and_, false
+from src.models import db, TeacherSchedule
+
+# Schedule columns → period labels ("period_4_5" → "4/5"), resolved once.
+PERIOD_COLUMNS = {
+    c.key: c.key.replace("period_", "").replace("_", "/")
+    for c in TeacherSchedule.__table__.columns if c.key.startswith("period_")
+}
+
+# teacher_id → {"by_period": {period: frozenset(rooms)}, "by_room": {room: frozenset(periods)}, "all": frozenset}
+_cache = {}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cache Build / Invalidate
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Compile one teacher's schedule row into frozenset lookups.
+def _compile(teacher_id):
+    sched = db.session.get(TeacherSchedule, teacher_id)
+    by_period, by_room = {}, {}
+    if sched:
+        for col, period in PERIOD_COLUMNS.items():
+            room = (getattr(sched, col) or "").strip()
+            if room:
+                by_period[period] = frozenset({room})
+                by_room.setdefault(room, set()).add(period)
+    return {
+        "by_period": by_period,
+        "by_room": {room: frozenset(ps) for room, ps in by_room.items()},
+        "all": frozenset(by_room),
+    }
+
+# Cached compiled entry for a teacher.
+def teacher_entry(teacher_id):
+    entry = _cache.get(teacher_id)
+    if entry is None:
+        entry = _cache[teacher_id] = _compile(teacher_id)
+    return entry
+
+# Drop one teacher (schedule edit) or everyone (roster reload).
+def invalidate(teacher_id=None):
+    if teacher_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(teacher_id, None)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Lookups
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Rooms a teacher holds in the given periods (all periods when None).
+def rooms_for(teacher_id, periods=None):
+    entry = teacher_entry(teacher_id)
+    if periods is None:
+        return entry["all"]
+    return frozenset().union(*(entry["by_period"].get(p, frozenset()) for p in periods))
+
+# O(1) check used for room activation / control.
+def can_manage(teacher_id, room):
+    return room in teacher_entry(teacher_id)["all"]
+
+# SQL filter: passes that left one of the teacher's rooms during a period they teach there.
+def pass_filter(teacher_id, pass_model):
+    by_room = teacher_entry(teacher_id)["by_room"]
+    if not by_room:
+        return false()
+    return or_(*(
+        and_(
+            pass_model.origin_room == room,
+            or_(pass_model.period.in_(periods), pass_model.period.is_(None))
+        )
+        for room, periods in by_room.items()
+    ))
@@ -0,0 +1,133 @@
+# src/services/capacity.py
+# Per-room slot counters: atomic reserve/release alongside pass creation, swipes, and returns
+
+from sqlalchemy import update, delete, select, func, case, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models import db, RoomSlot, Pass, PassEvent
+from src.utils import load_config, is_station
+
+config = load_config()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Capacity Lookup
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Classrooms use passes_available; stations use station_slots.
+def capacity_for(room):
+    if is_station(room, config):
+        return config.get("station_slots", 3)
+    return config.get("passes_available", 2)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reserve / Release
+# ─────────────────────────────────────────────────────────────────────────────
+# Neither call commits: the caller commits (or rolls back) together with the
+# pass row or swipe event it is guarding, so the counter never drifts from it.
+
+# Take one slot in `room`. Returns False (without touching passes) when full.
+def reserve(room):
+    cap = capacity_for(room)
+    if cap <= 0:
+        return False
+    stmt = sqlite_insert(RoomSlot).values(room=room, capacity=cap, in_use=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RoomSlot.room],
+        set_={"in_use": RoomSlot.in_use + 1, "capacity": stmt.excluded.capacity},
+        where=RoomSlot.in_use < stmt.excluded.capacity
+    )
+    return db.session.execute(stmt).rowcount == 1
+
+# Give one slot back to `room`.
+def release(room):
+    db.session.execute(
+        update(RoomSlot)
+        .where(RoomSlot.room == room, RoomSlot.in_use > 0)
+        .values(in_use=RoomSlot.in_use - 1)
+    )
+
+# Stations a pass is currently inside (more "in" than "out" swipes).
+def stations_held(pass_id):
+    net = func.sum(case((PassEvent.event == "in", 1), else_=-1))
+    rows = db.session.execute(
+        select(PassEvent.station)
+        .where(PassEvent.pass_id == pass_id)
+        .group_by(PassEvent.station)
+        .having(net > 0)
+    ).scalars()
+    return [s for s in rows if is_station(s, config)]
+
+# Release everything a closing pass holds: its classroom slot and any station.
+def release_for_pass(pass_obj):
+    if not pass_obj.is_override:
+        release(pass_obj.origin_room)
+    for station in stations_held(pass_obj.id):
+        if station != pass_obj.origin_room:
+            release(station)
+
+# release_for_pass() for many closing passes (rows: id, origin_room, is_override): the
+# stations still held come from one grouped query, and each room's counter drops once.
+def release_for_passes(closed):
+    freed = {}
+    for r in closed:
+        if not r.is_override:
+            freed[r.origin_room] = freed.get(r.origin_room, 0) + 1
+
+    origin = {r.id: r.origin_room for r in closed}
+    net = func.sum(case((PassEvent.event == "in", 1), else_=-1))
+    for pass_id, station in db.session.execute(
+        select(PassEvent.pass_id, PassEvent.station)
+        .where(PassEvent.pass_id.in_(list(origin)))
+        .group_by(PassEvent.pass_id, PassEvent.station)
+        .having(net > 0)
+    ):
+        if is_station(station, config) and station != origin[pass_id]:
+            freed[station] = freed.get(station, 0) + 1
+
+    if freed:
+        slots = RoomSlot.__table__
+        db.session.execute(
+            update(slots)
+            .where(slots.c.room == bindparam("b_room"))
+            .values(in_use=func.max(slots.c.in_use - bindparam("b_n"), 0)),
+            [{"b_room": room, "b_n": n} for room, n in freed.items()]
+        )
+    return freed
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rebuild From Source of Truth
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Recount every room from open passes + unmatched station swipes (startup/rollover).
+def rebuild():
+    counts = {}
+
+    for room, n in db.session.execute(
+        select(Pass.origin_room, func.count())
+        .where(Pass.checkin_at.is_(None), Pass.is_override.is_not(True))
+        .group_by(Pass.origin_room)
+    ):
+        counts[room] = counts.get(room, 0) + n
+
+    net = func.sum(case((PassEvent.event == "in", 1), else_=-1)).label("net")
+    inside = (
+        select(PassEvent.station, net)
+        .join(Pass, Pass.id == PassEvent.pass_id)
+        .where(Pass.checkin_at.is_(None), PassEvent.station != Pass.origin_room)
+        .group_by(PassEvent.pass_id, PassEvent.station)
+        .subquery()
+    )
+    for station, n in db.session.execute(
+        select(inside.c.station, func.count()).where(inside.c.net > 0).group_by(inside.c.station)
+    ):
+        if is_station(station, config):
+            counts[station] = counts.get(station, 0) + n
+
+    db.session.execute(delete(RoomSlot))
+    db.session.add_all(
+        RoomSlot(room=room, capacity=capacity_for(room), in_use=n) for room, n in counts.items()
+    )
+    db.session.commit()
+    return counts
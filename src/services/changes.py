@@ -0,0 +1,128 @@
+# src/services/changes.py
+# Change-data feed: one append-only change_log row per pass, swipe, room and roster
+# change, added to the same transaction as the change itself. Consumers page through
+# it by sequence number (GET /changes?since=<seq>) or take incremental CSV exports
+# that pick up where the previous one stopped.
+
+import os, csv, json
+from datetime import datetime
+from sqlalchemy import select, insert, delete, func
+from src.models import db, Change
+
+EXPORT_DIR  = os.path.join("data", "logs")
+CURSOR_FILE = os.path.join(EXPORT_DIR, "changes_cursor.json")
+PAGE_LIMIT  = 1000
+COLUMNS     = ["seq", "at", "entity", "entity_id", "op", "data"]
+
+
+def _json(data):
+    return json.dumps(data, default=str, separators=(",", ":")) if data else None
+
+def _row(entity, entity_id, op, data, at):
+    return {"at": at, "entity": entity, "entity_id": None if entity_id is None else str(entity_id),
+            "op": op, "data": _json(data)}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Recording (the caller commits)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def record(entity, entity_id, op, **data):
+    db.session.execute(insert(Change).values(_row(entity, entity_id, op, data, datetime.now())))
+
+# Many changes of one kind: `rows` is [(entity_id, data dict), ...]
+def record_many(entity, op, rows):
+    now = datetime.now()
+    values = [_row(entity, entity_id, op, data, now) for entity_id, data in rows]
+    if values:
+        db.session.execute(insert(Change), values)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reading
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _as_dict(c):
+    return {"seq": c.seq, "at": c.at.isoformat(), "entity": c.entity, "entity_id": c.entity_id,
+            "op": c.op, "data": json.loads(c.data) if c.data else {}}
+
+# One page of changes after `seq`. `next` is the cursor for the following call;
+# `oldest` lets a consumer notice it fell behind rollover pruning (since < oldest - 1).
+def since(seq=0, limit=PAGE_LIMIT, entity=None):
+    stmt = select(Change).where(Change.seq > seq).order_by(Change.seq).limit(limit + 1)
+    if entity:
+        stmt = stmt.where(Change.entity == entity)
+    rows = db.session.scalars(stmt).all()
+    page = rows[:limit]
+    return {
+        "changes": [_as_dict(c) for c in page],
+        "next": page[-1].seq if page else seq,
+        "more": len(rows) > limit,
+        "oldest": db.session.scalar(select(func.min(Change.seq))),
+    }
+
+def head():
+    return db.session.scalar(select(func.max(Change.seq))) or 0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Incremental Export
+# ─────────────────────────────────────────────────────────────────────────────
+
+def read_cursor():
+    try:
+        with open(CURSOR_FILE) as f:
+            return json.load(f).get("seq", 0)
+    except (OSError, ValueError):
+        return 0
+
+def _write_cursor(seq, path):
+    tmp = CURSOR_FILE + ".part"
+    with open(tmp, "w") as f:
+        json.dump({"seq": seq, "file": os.path.basename(path),
+                   "exported_at": datetime.now().isoformat(timespec="seconds")}, f)
+    os.replace(tmp, CURSOR_FILE)
+
+# Write every change after the saved cursor (or `from_seq`) to
+# data/logs/YYYYMMDD_HHMMSS_changes_<first>-<last>.csv, then advance the cursor. The cursor only
+# moves once the file is complete, so a failed export is simply repeated.
+# Returns {"path", "from", "to", "rows"}; path is None when there was nothing new.
+def export(from_seq=None, progress=None):
+    start = read_cursor() if from_seq is None else from_seq
+    last, rows, path = start, 0, None
+    target = head()
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    stamp = f"{datetime.now():%Y%m%d_%H%M%S}"
+    part = os.path.join(EXPORT_DIR, f"{stamp}_changes.csv.part")
+    try:
+        with open(part, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(COLUMNS)
+            while last < target:
+                page = db.session.execute(
+                    select(*(Change.__table__.c[c] for c in COLUMNS))
+                    .where(Change.seq > last, Change.seq <= target)
+                    .order_by(Change.seq).limit(PAGE_LIMIT)
+                ).all()
+                if not page:
+                    break
+                writer.writerows(page)
+                rows += len(page)
+                last = page[-1].seq
+                if progress:
+                    progress((last - start) / (target - start), f"Exported {rows} changes")
+        if rows:
+            path = os.path.join(EXPORT_DIR, f"{stamp}_changes_{start + 1}-{last}.csv")
+            os.replace(part, path)
+            _write_cursor(last, path)
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
+    return {"path": path, "from": start, "to": last, "rows": rows}
+
+# Drop changes older than `before` (rollover). Returns the number removed.
+def prune(before):
+    result = db.session.execute(delete(Change).where(Change.at < before))
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,95 @@
+# src/services/directory.py
+# In-memory student directory for the roster page and the override-pass picker: students
+# sorted by ID for keyset paging, plus a sorted prefix index over IDs and name words
+# searched with bisect. Built on first use; invalidate() after any roster change.
+
+import threading
+from bisect import bisect_left, bisect_right
+from heapq import nsmallest
+from itertools import islice
+from src.models import db, User, StudentPeriod
+
+PAGE_LIMIT = 200
+
+_lock  = threading.Lock()
+_index = None   # (ids sorted, {id: row}, [(prefix key, id)] sorted, {id: keys})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Index Build / Invalidate
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Search keys for one student: the ID, the full name, and each later word of the name
+# ("ann", "ann lee", "lee"), so "lee" and "ann l" both find Ann Lee.
+def _keys(student_id, name):
+    keys = {student_id.lower()}
+    words = (name or "").lower().split()
+    for i in range(len(words)):
+        keys.add(" ".join(words[i:]))
+    return keys
+
+def _build():
+    periods = {}
+    for sid, period, room in db.session.execute(
+            db.select(StudentPeriod.student_id, StudentPeriod.period, StudentPeriod.room)):
+        periods.setdefault(sid, {})[period] = room
+
+    rows, keys, keys_by_id = {}, [], {}
+    for sid, name in db.session.execute(db.select(User.id, User.name).where(User.role == "student")):
+        rows[sid] = {"id": sid, "name": name, "periods": periods.get(sid, {})}
+        keys_by_id[sid] = tuple(_keys(sid, name))
+        keys.extend((key, sid) for key in keys_by_id[sid])
+    keys.sort()
+    return sorted(rows), rows, keys, keys_by_id
+
+def _get():
+    global _index
+    index = _index
+    if index is None:
+        with _lock:
+            if _index is None:
+                _index = _build()
+            index = _index
+    return index
+
+# Roster upload, manual add, rebuild: the next lookup rebuilds from the DB.
+def invalidate():
+    global _index
+    with _lock:
+        _index = None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Lookups
+# ─────────────────────────────────────────────────────────────────────────────
+
+# One page of students in ID order after the cursor `after`. With `q`, only students
+# whose ID, name or a name word starts with it (case-insensitive). Reply:
+# {"students": [{id, name, periods}], "next": <cursor for the following page or None>}.
+def page(q=None, after=None, limit=50):
+    ids, rows, keys, keys_by_id = _get()
+    limit = max(1, min(limit, PAGE_LIMIT))
+    start = bisect_right(ids, after) if after is not None else 0
+
+    if q and q.strip():
+        q = " ".join(q.lower().split())
+        lo = bisect_left(keys, (q,))
+        hi = bisect_left(keys, (q + "\uffff",), lo)
+        if hi - lo > len(ids) // 8:
+            # Short prefix matching much of the roster: walk in ID order, stop at a page
+            chosen = []
+            for sid in islice(ids, start, None):
+                if any(k.startswith(q) for k in keys_by_id[sid]):
+                    chosen.append(sid)
+                    if len(chosen) > limit:
+                        break
+        else:
+            matches = {sid for _, sid in keys[lo:hi]}
+            if after is not None:
+                matches = {sid for sid in matches if sid > after}
+            chosen = nsmallest(limit + 1, matches)
+    else:
+        chosen = ids[start:start + limit + 1]
+
+    found = [rows[sid] for sid in chosen[:limit]]
+    return {"students": found, "next": found[-1]["id"] if len(chosen) > limit else None}
@@ -0,0 +1,122 @@
+# src/services/history.py
+# Reporting reads across both stores: hot `passes` (today + open) UNION ALL cold `passes_archive`
+
+from sqlalchemy import select, union_all, literal, func, text
+from src.models import db, Pass, PassEvent, PassArchive, PassEventArchive, OverdueFlag, User
+from src.services import changes
+
+COLUMNS = ("id", "date", "student_id", "checkout_at", "checkin_at", "period",
+           "origin_room", "room_in", "is_override", "note", "status", "total_pass_time")
+
+# One row shape for both stores; `store` tells which events table a row's id points into.
+def _union():
+    hot  = select(*(Pass.__table__.c[c] for c in COLUMNS), literal("hot").label("store"))
+    cold = select(*(PassArchive.__table__.c[c] for c in COLUMNS), literal("cold").label("store"))
+    return union_all(hot, cold).subquery("all_passes")
+
+ALL = _union()   # callers filter on ALL.c.<column>
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Queries
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Pass rows (plus student_name) from both stores.
+def rows(*criteria, order_by=(), limit=None):
+    stmt = (
+        select(ALL, User.name.label("student_name"))
+        .outerjoin(User, User.id == ALL.c.student_id)
+        .where(*criteria)
+        .order_by(*order_by)
+    )
+    if limit:
+        stmt = stmt.limit(limit)
+    return db.session.execute(stmt).all()
+
+# Distinct origin rooms seen in either store.
+def rooms():
+    return db.session.execute(
+        select(ALL.c.origin_room).where(ALL.c.origin_room.is_not(None))
+        .distinct().order_by(ALL.c.origin_room)
+    ).scalars().all()
+
+# Swipe events for a list of rows, keyed (store, id) and sorted by time.
+def events_for(pass_rows):
+    hot  = [r.id for r in pass_rows if r.store == "hot"]
+    cold = [r.id for r in pass_rows if r.store == "cold"]
+    out = {(r.store, r.id): [] for r in pass_rows}
+    for store, model, ids in (("hot", PassEvent, hot), ("cold", PassEventArchive, cold)):
+        if not ids:
+            continue
+        for e in db.session.execute(
+            select(model).where(model.pass_id.in_(ids)).order_by(model.timestamp)
+        ).scalars():
+            out[(store, e.pass_id)].append(e)
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Hot → Cold Migration (rollover)
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Keep the hot id sequence above every archived id, so a new pass never takes an id
+# an archived pass already has. No commit: the caller's transaction (startup, migration).
+def reserve_ids():
+    floor = max(db.session.scalar(select(func.max(PassArchive.id))) or 0,
+                db.session.scalar(select(func.max(Pass.id))) or 0)
+    seq = db.session.scalar(text("SELECT seq FROM sqlite_sequence WHERE name = 'passes'"))
+    if seq is None:
+        db.session.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('passes', :s)"), {"s": floor})
+    elif seq < floor:
+        db.session.execute(text("UPDATE sqlite_sequence SET seq = :s WHERE name = 'passes'"), {"s": floor})
+
+# Move closed passes and their events into the archive, one short transaction per batch.
+# A pass keeps its id; only rows hot since before ids were kept can collide with an
+# archived id, and those get a fresh one (announced in the change feed).
+def migrate_closed(batch_size, before=None, dry_run=False):
+    hot_t, events_t = Pass.__table__, PassEvent.__table__
+    closed = [hot_t.c.checkin_at.is_not(None)]
+    if before is not None:
+        closed.append(hot_t.c.checkin_at < before)
+    if dry_run:
+        return db.session.scalar(select(func.count()).where(*closed))
+
+    moved = 0
+    while True:
+        batch = db.session.execute(
+            select(hot_t).where(*closed).order_by(hot_t.c.id).limit(batch_size)
+        ).mappings().all()
+        if not batch:
+            break
+        hot_ids = [r["id"] for r in batch]
+
+        taken = set(db.session.scalars(select(PassArchive.id).where(PassArchive.id.in_(hot_ids))))
+        keep = [r for r in batch if r["id"] not in taken]
+        if keep:
+            db.session.execute(PassArchive.__table__.insert(), [{c: r[c] for c in COLUMNS} for r in keep])
+        remap = {r["id"]: r["id"] for r in keep}
+        renumber = [r for r in batch if r["id"] in taken]
+        if renumber:
+            new_ids = db.session.execute(
+                PassArchive.__table__.insert().returning(PassArchive.id, sort_by_parameter_order=True),
+                [{c: r[c] for c in COLUMNS if c != "id"} for r in renumber]
+            ).scalars().all()
+            remap.update(zip((r["id"] for r in renumber), new_ids))
+            reserve_ids()
+        changes.record_many("pass", "archived", [(h, {"archive_id": a}) for h, a in remap.items()])
+
+        events = db.session.execute(
+            select(events_t).where(events_t.c.pass_id.in_(hot_ids)).order_by(events_t.c.id)
+        ).mappings().all()
+        if events:
+            db.session.execute(PassEventArchive.__table__.insert(), [
+                {"pass_id": remap[e["pass_id"]], "station": e["station"],
+                 "event": e["event"], "timestamp": e["timestamp"]}
+                for e in events
+            ])
+
+        for table, col in ((events_t, "pass_id"), (OverdueFlag.__table__, "pass_id"), (hot_t, "id")):
+            db.session.execute(table.delete().where(table.c[col].in_(hot_ids)))
+        db.session.commit()
+        moved += len(hot_ids)
+    return moved
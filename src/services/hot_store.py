@@ -0,0 +1,49 @@
+# src/services/hot_store.py
+# Hot store: open passes indexed in memory (student_id → pass_id) in front of the small
+# `passes` table, so kiosk and passroom lookups stay constant-time as history grows
+
+import threading
+from sqlalchemy import select
+from src.models import db, Pass
+
+_open   = {}     # student_id → open pass id
+_lock   = threading.Lock()
+_loaded = False  # until load() runs, lookups fall through to the DB
+
+
+# Fill the index from the hot table (startup, after rollover).
+def load():
+    global _loaded
+    rows = db.session.execute(
+        select(Pass.student_id, Pass.id).where(Pass.checkin_at.is_(None))
+    ).all()
+    with _lock:
+        _open.clear()
+        _open.update(rows)
+        _loaded = True
+    return len(rows)
+
+def opened(student_id, pass_id):
+    with _lock:
+        _open[student_id] = pass_id
+
+def closed(student_id, pass_id=None):
+    with _lock:
+        if pass_id is None or _open.get(student_id) == pass_id:
+            _open.pop(student_id, None)
+
+def open_count():
+    return len(_open)
+
+# The student's open pass, or None. A miss is answered from memory.
+def open_pass_for(student_id):
+    if not _loaded:
+        return Pass.query.filter_by(student_id=student_id, checkin_at=None).first()
+    pass_id = _open.get(student_id)
+    if pass_id is None:
+        return None
+    p = db.session.get(Pass, pass_id)
+    if p is not None and p.checkin_at is None:
+        return p
+    closed(student_id, pass_id)  # closed by another process (script, rollover CLI)
+    return None
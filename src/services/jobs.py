@@ -0,0 +1,266 @@
+# src/services/jobs.py
+# In-process background jobs: a bounded thread pool in front of the `jobs` table. Routes and
+# the launcher submit work here instead of running it inline, then poll status, cancel it,
+# or download what it produced. Live progress is kept in memory; the table holds the record.
+
+import os, sys, json, uuid, shutil, threading, subprocess, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models import db, Job
+from src.utils import load_config
+
+config = load_config()
+
+WORKERS       = config.get("job_workers", 2)
+QUEUE_LIMIT   = config.get("job_queue_limit", 8)      # jobs allowed to wait for a worker
+CANCEL_POLL_S = 2                                     # how often a running job re-reads its cancel flag
+JOB_DIR       = os.path.join("data", "jobs")
+ROOT_DIR      = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+TASKS = {}       # kind → fn(ctx, **params)
+
+_pool   = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="job")
+_lock   = threading.Lock()
+_local  = {}     # job id → _Context for jobs queued or running in this process
+
+
+class JobCancelled(Exception):
+    pass
+
+# Register a task body under `kind`.
+def task(kind):
+    def wrap(fn):
+        TASKS[kind] = fn
+        return fn
+    return wrap
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Task Context (what a running task sees)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _Context:
+    def __init__(self, job_id):
+        self.id        = job_id
+        self.progress_ = 0.0
+        self.message   = "Queued"
+        self._cancel   = threading.Event()
+        self._polled   = time.monotonic()
+        self.poll_db   = True     # also watch cancel_requested in the table
+
+    # Report progress (0..1) and a status line; raises JobCancelled when asked to stop.
+    def progress(self, fraction, message=None):
+        self.progress_ = max(0.0, min(1.0, fraction))
+        if message is not None:
+            self.message = message[:255]
+        self.check()
+
+    # Cancel can come from this process (event) or another one (flag in the table).
+    def cancelled(self):
+        if self.poll_db and not self._cancel.is_set() and time.monotonic() - self._polled > CANCEL_POLL_S:
+            self._polled = time.monotonic()
+            with db.engine.connect() as conn:   # own connection: the task may hold a write transaction
+                if conn.scalar(select(Job.cancel_requested).where(Job.id == self.id)):
+                    self._cancel.set()
+        return self._cancel.is_set()
+
+    def check(self):
+        if self.cancelled():
+            raise JobCancelled()
+
+    # Path for a result file under data/jobs/<id>/.
+    def output(self, filename):
+        folder = os.path.join(JOB_DIR, self.id)
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, filename)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Submit / Run
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Queue a job. Returns its id, or None when every worker and queue slot is taken.
+def submit(kind, params=None, submitted_by=None, app=None):
+    if kind not in TASKS:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    app = app or current_app._get_current_object()
+    with _lock:
+        if len(_local) >= WORKERS + QUEUE_LIMIT:
+            return None
+        job_id = uuid.uuid4().hex
+        _local[job_id] = _Context(job_id)
+
+    db.session.add(Job(
+        id=job_id, kind=kind, status=QUEUED, params=json.dumps(params or {}),
+        submitted_by=submitted_by, created_at=datetime.now()
+    ))
+    db.session.commit()
+    _pool.submit(_run, app, job_id)
+    return job_id
+
+def _finish(job_id, status, **values):
+    ctx = _local.get(job_id)
+    db.session.execute(
+        update(Job).where(Job.id == job_id).values(
+            status=status, finished_at=datetime.now(),
+            progress=1.0 if status == SUCCEEDED else (ctx.progress_ if ctx else 0.0),
+            message=(ctx.message if ctx else None), **values
+        )
+    )
+    db.session.commit()
+
+def _run(app, job_id):
+    ctx = _local[job_id]
+    with app.app_context():
+        try:
+            job = db.session.get(Job, job_id)
+            if job.status != QUEUED or job.cancel_requested:
+                if job.status == QUEUED:
+                    _finish(job_id, CANCELLED)
+                return
+            job.status, job.started_at = RUNNING, datetime.now()
+            params = json.loads(job.params or "{}")
+            db.session.commit()
+
+            ctx.message = "Running"
+            result = TASKS[job.kind](ctx, **params)
+            db.session.commit()
+            _finish(job_id, SUCCEEDED, result_path=result if isinstance(result, str) else None)
+        except JobCancelled:
+            db.session.rollback()
+            ctx.message = "Cancelled"
+            _finish(job_id, CANCELLED)
+        except Exception as e:
+            db.session.rollback()
+            print(f"[JOB ERROR] {job_id}: {e}")
+            _finish(job_id, FAILED, error=str(e))
+        finally:
+            db.session.remove()
+            with _lock:
+                _local.pop(job_id, None)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Status / Cancel / Cleanup
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _as_dict(job):
+    ctx = _local.get(job.id)
+    live = ctx is not None and job.status == RUNNING
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": round(ctx.progress_ if live else job.progress, 3),
+        "message": ctx.message if live else job.message,
+        "error": job.error,
+        "has_result": bool(job.result_path) and os.path.exists(job.result_path),
+        "submitted_by": job.submitted_by,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+def status(job_id):
+    job = db.session.get(Job, job_id)
+    return _as_dict(job) if job else None
+
+# Result file of a finished job, if it produced one and it is still on disk.
+def result_path(job_id):
+    job = db.session.get(Job, job_id)
+    if job and job.status == SUCCEEDED and job.result_path and os.path.exists(job.result_path):
+        return job.result_path
+    return None
+
+def recent(limit=20):
+    return [_as_dict(j) for j in db.session.scalars(
+        select(Job).order_by(Job.created_at.desc()).limit(limit)
+    )]
+
+# Ask a job to stop. Queued jobs end right away; running ones stop at their next check.
+def cancel(job_id):
+    job = db.session.get(Job, job_id)
+    if not job or job.status in FINISHED:
+        return False
+    job.cancel_requested = True
+    if job.status == QUEUED and job_id not in _local:
+        job.status, job.finished_at = CANCELLED, datetime.now()   # queued in a process that is gone
+    db.session.commit()
+    ctx = _local.get(job_id)
+    if ctx:
+        ctx._cancel.set()
+    return True
+
+# Jobs left queued/running by a previous server process can never finish.
+def recover():
+    result = db.session.execute(
+        update(Job).where(Job.status.in_((QUEUED, RUNNING)), Job.id.not_in(list(_local)))
+        .values(status=FAILED, error="Interrupted by a server restart", finished_at=datetime.now())
+    )
+    db.session.commit()
+    return result.rowcount
+
+# Finished jobs older than `before`, with their result files (rollover).
+def prune(before):
+    old = db.session.scalars(
+        select(Job.id).where(Job.status.in_(FINISHED), Job.finished_at < before)
+    ).all()
+    for job_id in old:
+        shutil.rmtree(os.path.join(JOB_DIR, job_id), ignore_errors=True)
+    if old:
+        db.session.execute(Job.__table__.delete().where(Job.id.in_(old)))
+        db.session.commit()
+    return len(old)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Built-in Task: maintenance scripts (launcher only — they replace the DB file)
+# ─────────────────────────────────────────────────────────────────────────────
+
+SCRIPTS = {"build_student_periods.py", "rebuild_db.py", "rebuild_rollups.py", "rollover.py"}
+
+@task("script")
+def run_script(ctx, name, args=()):
+    if name not in SCRIPTS:
+        raise ValueError(f"Script {name!r} is not allowed")
+    log_path = ctx.output(name.replace(".py", ".log"))
+
+    # rebuild_db.py moves the DB file aside: hold no connection while it runs, then
+    # reconnect to whatever file is there and carry this job's row across.
+    row = dict(db.session.execute(select(Job.__table__).where(Job.id == ctx.id)).mappings().one())
+    db.session.commit()
+    db.engine.dispose()
+    ctx.poll_db = False
+
+    proc = subprocess.Popen(
+        [sys.executable, "-u", os.path.join(ROOT_DIR, "scripts", name), *args],
+        cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+    )
+    tail = []
+    try:
+        with open(log_path, "w", encoding="utf-8") as log:
+            for line in proc.stdout:
+                log.write(line)
+                tail = (tail + [line.rstrip()])[-5:]
+                ctx.progress(ctx.progress_, line.strip() or ctx.message)   # no total known: message only
+    except JobCancelled:
+        proc.terminate()
+        raise
+    finally:
+        proc.wait()
+        db.engine.dispose()
+        db.session.execute(sqlite_insert(Job).values(row).on_conflict_do_nothing(index_elements=[Job.id]))
+        db.session.commit()
+    if proc.returncode != 0:
+        raise RuntimeError(f"{name} exited with {proc.returncode}: {' | '.join(tail)}")
+    return log_path
+
+
+# Task modules register themselves with @task on import.
+from src.services import roster, exports, snapshots  # noqa: E402
@@ -0,0 +1,184 @@
+# src/services/login.py
+# Login throughput: tunable password hashing, rehash-on-login, a bounded verification
+# pool, a short-lived verification cache, and per-IP / per-(IP, ID) limits on failed logins
+
+import hashlib, hmac, os, threading, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+from src.models import db
+from src.utils import load_config
+
+config = load_config()
+
+HASH_WORKERS   = config.get("login_hash_workers", 2)         # concurrent KDF runs
+HASH_QUEUE     = config.get("login_hash_queue", 16)          # logins allowed to wait for a worker
+BULK_WORKERS   = config.get("roster_hash_workers", 1)        # roster hashing, apart from logins
+BUSY_WAIT_SECS = config.get("login_busy_wait_seconds", 3)
+CACHE_SIZE     = config.get("login_cache_size", 4096)
+CACHE_TTL_SECS = config.get("login_cache_ttl_seconds", 8 * 3600)
+RATE_PER_IP    = config.get("login_rate_per_ip", {"per_minute": 20, "burst": 10})
+RATE_PER_ID    = config.get("login_rate_per_id", {"per_minute": 6, "burst": 5})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Hash Parameters
+# ─────────────────────────────────────────────────────────────────────────────
+# password_hash_method is any werkzeug method string, e.g. "pbkdf2:sha256:260000"
+# or "scrypt:16384:8:1". Unset = werkzeug's default.
+
+def _method_prefix(method):
+    sample = generate_password_hash("", method=method) if method else generate_password_hash("")
+    return sample.split("$", 1)[0]
+
+# Switch hash parameters (config load, or the load harness comparing costs).
+def set_hash_method(method):
+    global HASH_METHOD, METHOD_PREFIX
+    HASH_METHOD = method
+    METHOD_PREFIX = _method_prefix(method)
+
+set_hash_method(config.get("password_hash_method"))
+
+# True when a stored hash was made with different parameters than configured.
+def needs_rehash(stored_hash):
+    return stored_hash.split("$", 1)[0] != METHOD_PREFIX
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Bounded Verification Pool
+# ─────────────────────────────────────────────────────────────────────────────
+# KDF work runs on a small fixed pool. At most HASH_WORKERS + HASH_QUEUE logins
+# hold a server thread at once; the rest get LoginBusy, which leaves waitress
+# threads free for kiosk swipes during the morning rush.
+
+class LoginBusy(Exception):
+    pass
+
+_pool  = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="login-hash")
+_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE)
+_bulk  = ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix="roster-hash")
+
+def _run(fn, *args):
+    if not _slots.acquire(timeout=BUSY_WAIT_SECS):
+        raise LoginBusy()
+    try:
+        return _pool.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+# Hash one password with the configured parameters.
+def hash_password(raw):
+    if HASH_METHOD:
+        return _run(generate_password_hash, raw, HASH_METHOD)
+    return _run(generate_password_hash, raw)
+
+# Hash many passwords (roster upload) on their own pool, so a whole roster never
+# queues ahead of logins on the verification workers.
+def hash_many(raws):
+    kwargs = {"method": HASH_METHOD} if HASH_METHOD else {}
+    return list(_bulk.map(lambda raw: generate_password_hash(raw, **kwargs), raws))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Verification Cache
+# ─────────────────────────────────────────────────────────────────────────────
+# Remembers a keyed fingerprint of (stored hash, password) per user after a
+# successful check, so a student logging in again on another device skips the
+# KDF. The key is random per process and the stored hash is part of the input,
+# so a password change invalidates the entry and nothing useful survives restart.
+
+_PEPPER = os.urandom(32)
+_cache  = OrderedDict()   # user_id → (fingerprint, expires_at)
+_cache_lock = threading.Lock()
+
+def _fingerprint(stored_hash, raw):
+    return hmac.new(_PEPPER, f"{stored_hash}\0{raw}".encode(), hashlib.sha256).digest()
+
+def _cache_hit(user_id, fp):
+    with _cache_lock:
+        entry = _cache.get(user_id)
+        if not entry or entry[1] < time.monotonic():
+            return False
+        _cache.move_to_end(user_id)
+        return hmac.compare_digest(entry[0], fp)
+
+def _cache_put(user_id, fp):
+    with _cache_lock:
+        _cache[user_id] = (fp, time.monotonic() + CACHE_TTL_SECS)
+        _cache.move_to_end(user_id)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+# Check a user's password. Raises LoginBusy when the pool is saturated.
+def verify(user, raw):
+    fp = _fingerprint(user.password, raw)
+    if _cache_hit(user.id, fp):
+        return True
+    ok = _run(check_password_hash, user.password, raw)
+    if ok:
+        _cache_put(user.id, fp)
+    return ok
+
+# Transparently upgrade a hash made with old parameters (call after verify()).
+def rehash_if_needed(user, raw):
+    if not needs_rehash(user.password):
+        return False
+    user.password = hash_password(raw)
+    db.session.commit()
+    _cache_put(user.id, _fingerprint(user.password, raw))
+    return True
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Token-Bucket Rate Limiter
+# ─────────────────────────────────────────────────────────────────────────────
+class TokenBucket:
+    def __init__(self, per_minute, burst, max_keys=50000):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets = {}   # key → (tokens, last_refill)
+        self.lock = threading.Lock()
+
+    # Spend one token for `key`; False when the bucket is empty.
+    def allow(self, key):
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self.buckets[key] = (tokens, now)
+                return False
+            self.buckets[key] = (tokens - 1, now)
+            if len(self.buckets) > self.max_keys:
+                self._prune(now)
+            return True
+
+    # Whether `key` has a token left, without spending it.
+    def peek(self, key):
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(key, (self.burst, now))
+            return tokens + (now - last) * self.rate >= 1
+
+    # Forget buckets that have refilled completely.
+    def _prune(self, now):
+        full_after = self.burst / self.rate if self.rate else 0
+        self.buckets = {k: v for k, v in self.buckets.items() if now - v[1] < full_after}
+
+ip_limiter = TokenBucket(**RATE_PER_IP)
+id_limiter = TokenBucket(**RATE_PER_ID)
+
+def _id_key(ip, user_input):
+    return (ip or "?", (user_input or "").lower())
+
+# Both the address and the (address, typed ID) buckets must still have a token left.
+# Only failures spend tokens (record_failure): a classroom behind one school NAT address
+# logging in at the bell, or someone typing another student's ID, never locks anyone out.
+def allow_attempt(ip, user_input):
+    return ip_limiter.peek(ip or "?") and id_limiter.peek(_id_key(ip, user_input))
+
+# A wrong password or unknown ID for this typed ID from this address.
+def record_failure(ip, user_input):
+    ip_limiter.allow(ip or "?")
+    id_limiter.allow(_id_key(ip, user_input))
@@ -0,0 +1,113 @@
+# src/services/overdue.py
+# Overdue-pass detection: every open pass has a deadline (checkout_at + max_pass_time_seconds)
+# on the shared deadline heap, so flags fire on time without scanning the passes table
+
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models import db, Pass, OverdueFlag
+from src.utils import load_config, log_audit
+from src.services.scheduler import scheduler
+
+config = load_config()
+
+MAX_PASS_SECONDS = config.get("max_pass_time_seconds", 2400)
+OPEN_STATUSES = ("active", "pending_return")  # the clock runs once a pass is approved
+
+overdue_ids = set()   # open passes already past their deadline (mirrors overdue_passes)
+_app = None           # set by start(); tracking is a no-op until then
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tracking Hooks (called from pass_manager)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _key(pass_id):
+    return ("overdue", pass_id)
+
+def deadline_for(checkout_at):
+    return checkout_at + timedelta(seconds=MAX_PASS_SECONDS)
+
+# Arm (or re-arm) the deadline for a pass that just went active.
+def track(pass_id, checkout_at):
+    if _app is None or not checkout_at:
+        return
+    overdue_ids.discard(pass_id)
+    scheduler.schedule(_key(pass_id), deadline_for(checkout_at), lambda: _fire(pass_id))
+
+# Disarm a pass that closed (returned, rejected, rolled over).
+def untrack(pass_id):
+    overdue_ids.discard(pass_id)
+    if _app is not None:
+        scheduler.cancel(_key(pass_id))
+
+def is_overdue(pass_id):
+    return pass_id in overdue_ids
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Firing
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Deadline reached: confirm the pass is still out, then flag it once and notify.
+def _fire(pass_id):
+    with _app.app_context():
+        p = db.session.get(Pass, pass_id)
+        if not p or p.checkin_at or p.status not in OPEN_STATUSES:
+            return
+        if datetime.now() < deadline_for(p.checkout_at):
+            track(pass_id, p.checkout_at)  # checkout_at moved (re-approved)
+            return
+
+        flagged = db.session.execute(
+            sqlite_insert(OverdueFlag)
+            .values(pass_id=pass_id, flagged_at=datetime.now())
+            .on_conflict_do_nothing(index_elements=[OverdueFlag.pass_id])
+        ).rowcount
+        db.session.commit()
+        overdue_ids.add(pass_id)
+        if flagged:
+            log_audit(p.student_id, f"Pass {pass_id} overdue (out over {MAX_PASS_SECONDS // 60} min from {p.origin_room})")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Startup Rebuild
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Re-arm every open pass in one indexed query (ix_passes_open_checkout).
+def rebuild():
+    overdue_ids.clear()
+    rows = db.session.execute(
+        select(Pass.id, Pass.checkout_at, OverdueFlag.pass_id)
+        .outerjoin(OverdueFlag, OverdueFlag.pass_id == Pass.id)
+        .where(Pass.checkin_at.is_(None), Pass.status.in_(OPEN_STATUSES))
+        .order_by(Pass.checkout_at)
+    ).all()
+    for pass_id, checkout_at, flagged in rows:
+        if flagged:
+            overdue_ids.add(pass_id)
+        else:
+            track(pass_id, checkout_at)  # past deadlines fire immediately
+    return len(rows)
+
+def start(app):
+    global _app
+    _app = app
+    with app.app_context():
+        count = rebuild()
+    scheduler.start()
+    print(f"[OVERDUE] Tracking {count} open passes (limit {MAX_PASS_SECONDS}s)")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Metrics
+# ─────────────────────────────────────────────────────────────────────────────
+def stats():
+    nxt = scheduler.next_deadline()
+    return {
+        "max_pass_time_seconds": MAX_PASS_SECONDS,
+        "scheduled": len(scheduler),
+        "overdue": len(overdue_ids),
+        "next_deadline": datetime.fromtimestamp(nxt).isoformat(timespec="seconds") if nxt else None,
+        "running": _app is not None,
+    }
@@ -1,9 +1,14 @@
 # src/services/pass_manager.py
-# Core pass lifecycle management: creation, approval, rejection, return, and event logging
+# Core pass lifecycle management: creation, approval, rejection, return, and event logging.
+# Every change also lands in the change feed (services/changes.py) in the same transaction.
 
 from datetime import datetime
-from src.models import db, Pass, PassEvent
+from sqlalchemy import select, update, delete, insert, func, Integer
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models import db, Pass, PassEvent, AuditLog
 from src.utils import log_audit
+from src.services import capacity, overdue, hot_store, rollups, changes, passroom, audit_log, audit_search
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Status Constants
@@ -14,24 +19,160 @@ STATUS_PENDING_RETURN = "pending_return"
 STATUS_RETURNED       = "returned"
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Lifecycle State Machine
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Legal status transitions (from → allowed targets). Every change is applied as a
+# single conditional UPDATE guarded on the current status, so when two kiosks or
+# a kiosk and a teacher race on one pass, exactly one wins and the other sees 0 rows.
+TRANSITIONS = {
+    STATUS_PENDING_START:  {STATUS_ACTIVE, STATUS_RETURNED},
+    STATUS_ACTIVE:         {STATUS_PENDING_RETURN, STATUS_RETURNED},
+    STATUS_PENDING_RETURN: {STATUS_ACTIVE, STATUS_RETURNED},
+    STATUS_RETURNED:       set(),
+}
+
+CONFLICT_MESSAGE = "Pass was changed by another request — refresh and try again."
+
+# Return the statuses a pass may be in to legally move to `target`.
+def sources_for(target):
+    return {src for src, targets in TRANSITIONS.items() if target in targets}
+
+# Apply a status change as one guarded UPDATE. Returns True if this call won.
+def transition(pass_id, target, expected=None, **values):
+    allowed = sources_for(target)
+    if expected is not None:
+        allowed &= set(expected)
+    if not allowed:
+        raise ValueError(f"No legal transition into {target!r} from {expected!r}")
+
+    result = db.session.execute(
+        update(Pass)
+        .where(Pass.id == pass_id, Pass.status.in_(allowed))
+        .values(status=target, **values)
+        .returning(Pass.origin_room)
+        .execution_options(synchronize_session=False)
+    )
+    row = result.first()
+    if row:
+        changes.record("pass", pass_id, "status", status=target, **values)
+    db.session.commit()
+    if row:
+        passroom.invalidate(row.origin_room)
+    return row is not None
+
+# SQL expression for whole seconds between checkout_at and `now`.
+def _elapsed_seconds(now):
+    return func.cast(
+        func.round((func.julianday(now) - func.julianday(Pass.checkout_at)) * 86400, 3),
+        Integer
+    )
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Pass Lifecycle Operations
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Single creation path for every route. Inserts against the one-open-pass
+# partial index and returns (pass, created); on conflict the student's
+# existing open pass comes back instead, so no pre-check query is needed.
+# With reserve_slot, a classroom slot is taken in the same transaction and
+# (None, False) means the room is full.
+def open_pass(student_id, room, period, status=STATUS_PENDING_START,
+              is_override=False, room_in=None, reserve_slot=False, at=None):
+    now = at or datetime.now()
+    if reserve_slot and not capacity.reserve(room):
+        db.session.rollback()
+        return hot_store.open_pass_for(student_id), False
+
+    stmt = (
+        sqlite_insert(Pass)
+        .values(
+            student_id=student_id,
+            date=now.date(),
+            period=period,
+            checkout_at=now,
+            origin_room=room,
+            room_in=room_in,
+            is_override=is_override,
+            status=status
+        )
+        .on_conflict_do_nothing(
+            index_elements=[Pass.student_id],
+            index_where=Pass.checkin_at.is_(None)
+        )
+        .returning(Pass)
+    )
+    new_pass = db.session.scalars(stmt).first()
+    if new_pass:
+        changes.record("pass", new_pass.id, "created", student_id=student_id, room=room, period=period,
+                       status=status, is_override=is_override, room_in=room_in, checkout_at=now)
+        db.session.commit()
+        hot_store.opened(student_id, new_pass.id)
+        passroom.invalidate(room)
+        if status == STATUS_ACTIVE:
+            overdue.track(new_pass.id, now)
+        return new_pass, True
+
+    db.session.rollback()  # hands back the slot reserved above
+    existing = Pass.query.filter_by(student_id=student_id, checkin_at=None).first()
+    if existing:
+        hot_store.opened(student_id, existing.id)  # the index proved it exists; resync memory
+    return existing, False
+
+# Startup repair for DBs from before the one-open-pass index: a student holding several
+# open passes keeps the newest, the rest are closed (returned now) so the partial unique
+# index can be created. Returns the number closed.
+def close_duplicate_open(now=None):
+    now = now or datetime.now()
+    newer = aliased(Pass)
+    duplicate = (
+        select(newer.id)
+        .where(
+            newer.student_id == Pass.student_id,
+            newer.checkin_at.is_(None),
+            (newer.checkout_at > Pass.checkout_at)
+            | ((newer.checkout_at == Pass.checkout_at) & (newer.id > Pass.id))
+        )
+        .exists()
+    )
+    closed = db.session.execute(
+        update(Pass)
+        .where(Pass.checkin_at.is_(None), duplicate)
+        .values(
+            status=STATUS_RETURNED,
+            checkin_at=now,
+            total_pass_time=_elapsed_seconds(now),
+            room_in=func.coalesce(Pass.room_in, Pass.origin_room)
+        )
+        .returning(Pass.id, Pass.student_id, Pass.date, Pass.origin_room, Pass.period,
+                   Pass.room_in, Pass.total_pass_time, Pass.is_override)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not closed:
+        db.session.commit()
+        return 0
+    rollups.record_passes(closed)
+    changes.record_many("pass", "returned", [
+        (r.id, {"student_id": r.student_id, "checkin_at": now, "room_in": r.room_in,
+                "total_pass_time": r.total_pass_time, "duplicate": True})
+        for r in closed
+    ])
+    db.session.commit()
+    for r in closed:
+        log_audit(r.student_id, f"Auto-closed pass {r.id} (duplicate open pass)")
+    return len(closed)
+
 # Create a new pass for a student (override = immediate active pass).
 def create_pass(student_id, room, period, is_override=False):
-    now = datetime.now()
-    new_pass = Pass(
-        student_id=student_id,
-        date=now.date(),
-        period=period,
-        checkout_at=now,
-        origin_room=room,
-        is_override=is_override,
-        status=STATUS_ACTIVE if is_override else STATUS_PENDING_START
+    new_pass, created = open_pass(
+        student_id, room, period,
+        status=STATUS_ACTIVE if is_override else STATUS_PENDING_START,
+        is_override=is_override
     )
-    db.session.add(new_pass)
-    db.session.commit()
+    if not created:
+        return None
     log_audit(student_id, f"Created pass {'(override)' if is_override else ''} for room {room}")
     return new_pass
 
@@ -40,9 +181,10 @@ def approve_pass(pass_id):
     p = db.session.get(Pass, pass_id)
     if not p or p.status != STATUS_PENDING_START:
         return False
-    p.status = STATUS_ACTIVE
-    p.checkout_at = datetime.now()
-    db.session.commit()
+    now = datetime.now()
+    if not transition(pass_id, STATUS_ACTIVE, expected={STATUS_PENDING_START}, checkout_at=now):
+        return False
+    overdue.track(pass_id, now)
     log_audit(p.student_id, f"Approved pass {pass_id}")
     return True
 
@@ -51,41 +193,142 @@ def reject_pass(pass_id):
     p = db.session.get(Pass, pass_id)
     if not p or p.status != STATUS_PENDING_START:
         return False
-    log_audit(p.student_id, f"Rejected pass {pass_id}")
-    db.session.delete(p)
+    student_id = p.student_id
+    result = db.session.execute(
+        delete(Pass)
+        .where(Pass.id == pass_id, Pass.status == STATUS_PENDING_START)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.session.commit()
+        return False
+    capacity.release_for_pass(p)
+    changes.record("pass", pass_id, "deleted", student_id=student_id)
     db.session.commit()
+    hot_store.closed(student_id, pass_id)
+    passroom.invalidate(p.origin_room)
+    log_audit(student_id, f"Rejected pass {pass_id}")
     return True
 
-# Mark a pass as returned and calculate duration.
-def return_pass(pass_obj, station=None):
-    now = datetime.now()
+# Ask for a return on an active pass (student taps "return" in the room).
+def request_return(pass_id):
+    return transition(pass_id, STATUS_PENDING_RETURN, expected={STATUS_ACTIVE})
+
+# Put a pass back to active after a station swipe (clears a pending return).
+def resume_pass(pass_id):
+    return transition(pass_id, STATUS_ACTIVE, expected={STATUS_PENDING_RETURN})
+
+# Mark a pass as returned and calculate duration (`at`: kiosk swipe time, local).
+def return_pass(pass_obj, station=None, at=None):
     if pass_obj.checkin_at:
         return False
-    pass_obj.checkin_at = now
-    pass_obj.status = STATUS_RETURNED
-    if pass_obj.checkout_at:
-        delta = now - pass_obj.checkout_at
-        pass_obj.total_pass_time = int(delta.total_seconds())
-    if station:
-        pass_obj.room_in = station
+    pass_id, student_id = pass_obj.id, pass_obj.student_id   # pass_obj is expired after the commit
+    now = at or datetime.now()
+    room_in = station if station else func.coalesce(Pass.room_in, Pass.origin_room)
+    result = db.session.execute(
+        update(Pass)
+        .where(
+            Pass.id == pass_id,
+            Pass.checkin_at.is_(None),
+            Pass.status.in_(sources_for(STATUS_RETURNED))
+        )
+        .values(
+            status=STATUS_RETURNED,
+            checkin_at=now,
+            total_pass_time=_elapsed_seconds(now),
+            room_in=room_in
+        )
+        .returning(Pass.date, Pass.period, Pass.origin_room, Pass.room_in, Pass.total_pass_time, Pass.is_override)
+        .execution_options(synchronize_session=False)
+    )
+    closed = result.first()
+    if closed is None:
+        db.session.commit()
+        return False
+    rollups.record_pass(pass_id, closed.date, student_id, closed.origin_room,
+                        closed.period, closed.total_pass_time, closed.is_override)
+    capacity.release_for_pass(pass_obj)
+    changes.record("pass", pass_id, "returned", student_id=student_id, checkin_at=now,
+                   room_in=closed.room_in, total_pass_time=closed.total_pass_time)
+    log_audit(student_id, f"Returned pass {pass_id} at {station or 'room'}", commit=False)
     db.session.commit()
-    log_audit(pass_obj.student_id, f"Returned pass {pass_obj.id} at {station or 'room'}")
+    overdue.untrack(pass_id)
+    hot_store.closed(student_id, pass_id)
+    passroom.invalidate(closed.origin_room)
+    rollups.invalidate(closed.date)
     return True
 
+# Room reset (admin rooms page, end of a fire drill): close every pass still open today
+# from `rooms` (every room when None) as one UPDATE, with rollups, slot counters, change
+# feed and one audit row per pass written in bulk in the same transaction. Returns the
+# number of passes cleared.
+def reset_rooms(rooms=None, by="admin", at=None):
+    now = at or datetime.now()
+    where = [
+        Pass.date == now.date(),
+        Pass.checkin_at.is_(None),
+        Pass.status.in_(sources_for(STATUS_RETURNED)),
+    ]
+    if rooms is not None:
+        where.append(Pass.origin_room.in_(rooms))
+
+    closed = db.session.execute(
+        update(Pass)
+        .where(*where)
+        .values(
+            status=STATUS_RETURNED,
+            checkin_at=now,
+            total_pass_time=_elapsed_seconds(now),
+            room_in=func.coalesce(Pass.room_in, Pass.origin_room)
+        )
+        .returning(Pass.id, Pass.student_id, Pass.date, Pass.origin_room, Pass.period,
+                   Pass.room_in, Pass.total_pass_time, Pass.is_override)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not closed:
+        db.session.commit()
+        return 0
+
+    rollups.record_passes(closed)
+    capacity.release_for_passes(closed)
+    changes.record_many("pass", "returned", [
+        (r.id, {"student_id": r.student_id, "checkin_at": now, "room_in": r.room_in,
+                "total_pass_time": r.total_pass_time, "reset": True})
+        for r in closed
+    ])
+    audit = [(r.student_id, f"Reset pass {r.id} in room {r.origin_room} by {by}", now) for r in closed]
+    db.session.execute(insert(AuditLog), [
+        {"student_id": who, "reason": msg, "time": when, **audit_search.parse(msg)}
+        for who, msg, when in audit
+    ])
+    db.session.commit()
+
+    for r in closed:
+        overdue.untrack(r.id)
+        hot_store.closed(r.student_id, r.id)
+    audit_log.write_many(audit)
+    for room in {r.origin_room for r in closed}:
+        passroom.invalidate(room)
+    rollups.invalidate(now.date())
+    return len(closed)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Event Logging (Swipe Events)
 # ─────────────────────────────────────────────────────────────────────────────
 
 # Record a swipe event (either "in" or "out") for a pass at a station.
-def record_pass_event(pass_obj, station, event_type):
+# `timestamp` (UTC) is the kiosk's swipe time when replaying a queued swipe.
+def record_pass_event(pass_obj, station, event_type, timestamp=None):
     event = PassEvent(
         pass_id=pass_obj.id,
         station=station,
         event=event_type,
-        timestamp=datetime.utcnow()
+        timestamp=timestamp or datetime.utcnow()
     )
     db.session.add(event)
+    db.session.flush()
+    changes.record("pass_event", event.id, event_type, pass_id=pass_obj.id, student_id=pass_obj.student_id,
+                   station=station, timestamp=event.timestamp)
+    log_audit(pass_obj.student_id, f"{event_type.upper()} at {station} (pass {pass_obj.id})", commit=False)
     db.session.commit()
-    log_audit(pass_obj.student_id, f"{event_type.upper()} at {station}")
-
@@ -0,0 +1,101 @@
+# src/services/passroom.py
+# Shared view model for /passroom/<room>: a room's slot grid for the current periods is
+# queried and rendered once and reused for every student who opens the page, until a
+# pass in that room changes (pass_manager, rollover) or TTL_S runs out (writers in
+# other processes: scripts, the rollover CLI).
+
+import threading, time
+from datetime import datetime
+from flask import render_template
+from markupsafe import Markup
+from sqlalchemy import select
+from src.models import db, Pass, User
+from src.utils import load_config
+
+config = load_config()
+
+SLOTS = config.get("passes_available", 3)
+TTL_S = config.get("passroom_cache_seconds", 30)
+
+_lock     = threading.Lock()
+_views    = {}   # (date, room, periods) → (expires, view)
+_building = {}   # key → lock held by the one request building it; the rest wait for it.
+                 # Dropped when that build ends, so keys for past days don't pile up.
+_gen      = {}   # room → invalidation count; a build that raced a pass change isn't kept
+_epoch    = 0    # bumped by invalidate(None)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Build
+# ─────────────────────────────────────────────────────────────────────────────
+
+# One query: the room's open, non-override passes this period with their students' names.
+def _build(room, periods, today):
+    rows = db.session.execute(
+        select(Pass.student_id, Pass.status, User.name)
+        .outerjoin(User, User.id == Pass.student_id)
+        .where(
+            Pass.date == today,
+            Pass.period.in_(periods),
+            Pass.origin_room == room,
+            Pass.checkin_at.is_(None),
+            Pass.is_override.is_(False),
+        )
+        .order_by(Pass.checkout_at)
+    ).all()
+
+    passes = [{"student_name": name or "-", "status": status} for _, status, name in rows]
+    passes += [{"student_name": None, "status": "free"}] * max(SLOTS - len(passes), 0)
+    return {
+        "passes": passes,
+        "holders": frozenset(student_id for student_id, _, _ in rows),
+        "grid": Markup(render_template("passreq_grid.html", passes=passes)),
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Lookup / Invalidate
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _fresh(key):
+    cached = _views.get(key)
+    return cached[1] if cached and cached[0] > time.monotonic() else None
+
+# {"passes", "holders" (student ids with a pass in the grid), "grid" (rendered HTML)}.
+def view(room, periods):
+    key = (datetime.now().date(), room, tuple(periods))
+    found = _fresh(key)
+    if found:
+        return found
+
+    with _lock:
+        building = _building.setdefault(key, threading.Lock())
+    with building:
+        found = _fresh(key)   # built while this request waited
+        if found:
+            return found
+        with _lock:
+            token = (_epoch, _gen.get(room, 0))
+        built = None
+        try:
+            built = _build(room, periods, key[0])
+        finally:
+            with _lock:
+                if built is not None and token == (_epoch, _gen.get(room, 0)):
+                    _views[key] = (time.monotonic() + TTL_S, built)
+                if _building.get(key) is building:
+                    del _building[key]
+    return built
+
+# A pass in `room` changed (every room when None: rollover, roster reload).
+def invalidate(room=None):
+    global _epoch
+    with _lock:
+        if room is None:
+            _epoch += 1
+            _views.clear()
+            _building.clear()
+        else:
+            _gen[room] = _gen.get(room, 0) + 1
+            for key in [k for k in _views if k[1] == room]:
+                del _views[key]
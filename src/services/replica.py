@@ -0,0 +1,71 @@
+# src/services/replica.py
+# Read routing for reporting handlers. A route decorated with @read_only runs every
+# db.session query on a separate read-only engine: the newest snapshot when one is
+# within the staleness bound, otherwise a read-only connection to the live file. Long
+# report scans then never take a connection, or a lock, from the kiosk write path.
+
+import os, threading
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import g, make_response
+from sqlalchemy import create_engine
+from src.models import db
+from src.utils import load_config
+from src.services import snapshots
+
+config = load_config()
+
+MAX_STALENESS_S = config.get("report_max_staleness_seconds", 0)   # 0 = always the live file
+REPORT_SLOTS    = config.get("report_concurrency", 1)             # read-only handlers running at once
+SLOT_WAIT_S     = config.get("report_slot_wait_seconds", 10)      # then 503 + Retry-After
+
+_lock    = threading.Lock()
+_engines = {}     # live DB path → read-only engine
+_slots   = threading.BoundedSemaphore(REPORT_SLOTS)
+
+
+# Read-only engine on the live file, with its own small pool. Under WAL its
+# readers see the last committed state and never block a writer.
+def live_engine():
+    path = os.path.abspath(db.engine.url.database)
+    with _lock:
+        if path not in _engines:
+            _engines[path] = create_engine(
+                f"sqlite:///file:{path}?mode=ro&uri=true",
+                pool_size=REPORT_SLOTS, max_overflow=0, pool_timeout=30,
+                connect_args={"check_same_thread": False},
+            )
+        return _engines[path]
+
+# (engine, source) for a read that may be up to `max_staleness` seconds old.
+def engine_for(max_staleness=None):
+    max_staleness = MAX_STALENESS_S if max_staleness is None else max_staleness
+    if max_staleness > 0:
+        path = snapshots.fresh(datetime.now() - timedelta(seconds=max_staleness))
+        if path:
+            return snapshots.engine(path), "snapshot"
+    return live_engine(), "replica"
+
+# Route decorator: the handler only reads. Writes fail (the engine is read-only);
+# g.read_source and the response's X-Read-Source say snapshot | replica. A request that waits longer
+# than SLOT_WAIT_S for a report slot gets 503 with Retry-After instead of holding a worker.
+def read_only(fn=None, *, max_staleness=None):
+    def wrap(view):
+        @wraps(view)
+        def inner(*args, **kwargs):
+            if not _slots.acquire(timeout=SLOT_WAIT_S):
+                response = make_response("Reports are busy. Please try again in a moment.", 503)
+                response.headers["Retry-After"] = str(max(1, int(SLOT_WAIT_S)))
+                return response
+            previous = g.get("read_engine"), g.get("read_source")
+            try:
+                engine, source = engine_for(max_staleness)
+                g.read_engine, g.read_source = engine, source
+                response = make_response(view(*args, **kwargs))
+            finally:
+                g.read_engine, g.read_source = previous
+                _slots.release()
+            response.headers["X-Read-Source"] = source
+            return response
+        return inner
+    return wrap(fn) if fn else wrap
@@ -0,0 +1,225 @@
+# src/services/rollover.py
+# End-of-day rollover at auto_reset_time: force-close open passes, clear active rooms,
+# move the day's passes from the hot tables to the historical store, then archive history
+# older than data_retention_days to gzip files and delete it in small batches
+
+import os, json, gzip, time
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete, func
+from src.models import db, Pass, PassArchive, PassEventArchive, AuditLog, ActiveRoom
+from src.utils import load_config, log_audit
+from src.services import pass_manager, capacity, overdue, hot_store, history, rollups, station_usage, swipes, jobs, changes, passroom
+from src.services.scheduler import scheduler
+
+config = load_config()
+
+RESET_TIME     = config.get("auto_reset_time", "23:59")
+RETENTION_DAYS = config.get("data_retention_days", 30)
+BATCH_SIZE     = config.get("rollover_batch_size", 500)   # rows per delete transaction
+ARCHIVE_DIR    = os.path.join("data", "archive")
+JOB_KEEP_DAYS  = config.get("job_keep_days", 7)       # finished jobs and their result files
+CHANGE_KEEP_DAYS = config.get("change_keep_days", 90)  # change feed rows (consumers must read within this)
+GZIP_LEVEL     = 6   # near-max ratio on JSON lines at roughly half the CPU of level 9
+
+_app = None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Step 1 — Force-Close Open Passes
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Close every pass still out at reset time (pending requests included).
+def close_open_passes(now, dry_run=False):
+    open_ids = select(Pass.id, Pass.student_id).where(Pass.checkin_at.is_(None))
+    if dry_run:
+        return len(db.session.execute(open_ids).all())
+
+    closed = db.session.execute(
+        update(Pass)
+        .where(Pass.checkin_at.is_(None), Pass.status.in_(pass_manager.sources_for(pass_manager.STATUS_RETURNED)))
+        .values(
+            status=pass_manager.STATUS_RETURNED,
+            checkin_at=now,
+            total_pass_time=pass_manager._elapsed_seconds(now),
+            room_in=func.coalesce(Pass.room_in, Pass.origin_room)
+        )
+        .returning(Pass.id, Pass.student_id, Pass.date, Pass.origin_room, Pass.period,
+                   Pass.room_in, Pass.total_pass_time, Pass.is_override)
+        .execution_options(synchronize_session=False)
+    ).all()
+    rollups.record_passes(closed)
+    changes.record_many("pass", "returned", [
+        (r.id, {"student_id": r.student_id, "checkin_at": now, "room_in": r.room_in,
+                "total_pass_time": r.total_pass_time, "rollover": True})
+        for r in closed
+    ])
+    db.session.commit()
+
+    for pass_id, student_id, *_ in closed:
+        overdue.untrack(pass_id)
+        hot_store.closed(student_id, pass_id)
+        log_audit(student_id, f"Auto-closed pass {pass_id} at end-of-day rollover")
+    passroom.invalidate()
+    rollups.invalidate()
+    return len(closed)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Step 2 — Deactivate Rooms
+# ─────────────────────────────────────────────────────────────────────────────
+def clear_active_rooms(dry_run=False):
+    if dry_run:
+        return ActiveRoom.query.count()
+    count = ActiveRoom.query.delete()
+    if count:
+        changes.record("room", None, "cleared", rooms=count)
+    db.session.commit()
+    capacity.rebuild()  # nothing is open any more: every counter drops to zero
+    return count
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Step 3 — Hot → Cold
+# ─────────────────────────────────────────────────────────────────────────────
+# Every closed pass leaves `passes` for `passes_archive` (see services/history.py),
+# so the live tables start each day holding nothing but carry-over.
+def migrate_to_history(now, dry_run=False):
+    moved = history.migrate_closed(BATCH_SIZE, before=now + timedelta(seconds=1), dry_run=dry_run)
+    if not dry_run:
+        hot_store.load()
+    return moved
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Steps 4 + 5 — Archive Old History, Then Delete in Bounded Batches
+# ─────────────────────────────────────────────────────────────────────────────
+# Each batch is written (and flushed) to its gzip JSON-lines file before the
+# rows are deleted, and each delete is its own short transaction, so kiosks
+# never wait on one long write lock. Runs append to the same file as extra
+# gzip members, which gzip readers concatenate transparently.
+
+def _archive_path(table, now):
+    return os.path.join(ARCHIVE_DIR, f"{now:%Y%m%d}_{table}.jsonl.gz")
+
+def _write(fh, rows):
+    fh.write("".join(json.dumps(dict(r), default=str) + "\n" for r in rows).encode("utf-8"))
+    fh.flush()
+
+def _delete(table, column, ids):
+    db.session.execute(
+        delete(table).where(column.in_(ids)).execution_options(synchronize_session=False)
+    )
+
+# Historical passes older than the cutoff, with their swipe events.
+def purge_passes(cutoff, now, dry_run=False):
+    passes_t, events_t = PassArchive.__table__, PassEventArchive.__table__
+    old = (passes_t.c.date < cutoff.date(),)
+    if dry_run:
+        ids = select(passes_t.c.id).where(*old)
+        return (
+            db.session.scalar(select(func.count()).select_from(ids.subquery())),
+            db.session.scalar(select(func.count()).where(events_t.c.pass_id.in_(ids))),
+        )
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    passes = events = 0
+    with gzip.open(_archive_path("passes", now), "ab", GZIP_LEVEL) as pf, \
+         gzip.open(_archive_path("pass_events", now), "ab", GZIP_LEVEL) as ef:
+        while True:
+            batch = db.session.execute(
+                select(passes_t).where(*old).order_by(passes_t.c.id).limit(BATCH_SIZE)
+            ).mappings().all()
+            if not batch:
+                break
+            ids = [r["id"] for r in batch]
+            evs = db.session.execute(
+                select(events_t).where(events_t.c.pass_id.in_(ids)).order_by(events_t.c.id)
+            ).mappings().all()
+
+            _write(pf, batch)
+            _write(ef, evs)
+
+            _delete(PassEventArchive, PassEventArchive.pass_id, ids)
+            _delete(PassArchive, PassArchive.id, ids)
+            db.session.commit()
+            passes += len(ids)
+            events += len(evs)
+    if passes:
+        station_usage.invalidate()   # cached days may cover purged swipes
+    return passes, events
+
+# Audit rows older than the cutoff.
+def purge_audit(cutoff, now, dry_run=False):
+    audit_t = AuditLog.__table__
+    old = audit_t.c.time < cutoff
+    if dry_run:
+        return db.session.scalar(select(func.count()).where(old))
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    total = 0
+    with gzip.open(_archive_path("audit_log", now), "ab", GZIP_LEVEL) as af:
+        while True:
+            batch = db.session.execute(
+                select(audit_t).where(old).order_by(audit_t.c.id).limit(BATCH_SIZE)
+            ).mappings().all()
+            if not batch:
+                break
+            ids = [r["id"] for r in batch]
+            _write(af, batch)
+            _delete(AuditLog, AuditLog.id, ids)
+            db.session.commit()
+            total += len(ids)
+    return total
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Full Run
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Run every step and return a summary (counts only, nothing written, when dry_run).
+def run(now=None, dry_run=False, retention_days=None):
+    now = now or datetime.now()
+    days = RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = datetime.combine(now.date() - timedelta(days=days), datetime.min.time())
+    started = time.perf_counter()
+
+    summary = {"dry_run": dry_run, "cutoff": cutoff.date().isoformat()}
+    summary["closed_passes"] = close_open_passes(now, dry_run)
+    summary["rooms_cleared"] = clear_active_rooms(dry_run)
+    summary["migrated_passes"] = migrate_to_history(now, dry_run)
+    summary["archived_passes"], summary["archived_events"] = purge_passes(cutoff, now, dry_run)
+    summary["archived_audit"] = purge_audit(cutoff, now, dry_run)
+    summary["pruned_receipts"] = 0 if dry_run else swipes.prune(now - timedelta(days=1))
+    summary["pruned_jobs"] = 0 if dry_run else jobs.prune(now - timedelta(days=JOB_KEEP_DAYS))
+    summary["pruned_changes"] = 0 if dry_run else changes.prune(now - timedelta(days=CHANGE_KEEP_DAYS))
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+
+    print(f"[ROLLOVER] {summary}")
+    return summary
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scheduling
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Next occurrence of auto_reset_time after `now`.
+def next_run(now=None):
+    now = now or datetime.now()
+    hh, mm = (int(x) for x in RESET_TIME.split(":"))
+    at = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    return at if at > now else at + timedelta(days=1)
+
+def _scheduled_run():
+    try:
+        with _app.app_context():
+            run()
+    finally:
+        scheduler.schedule(("rollover",), next_run(), _scheduled_run)
+
+def start(app):
+    global _app
+    _app = app
+    when = next_run()
+    scheduler.schedule(("rollover",), when, _scheduled_run)
+    scheduler.start()
+    print(f"[ROLLOVER] Next run {when:%Y-%m-%d %H:%M} (retention {RETENTION_DAYS} days)")
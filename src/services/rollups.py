@@ -0,0 +1,290 @@
+# src/services/rollups.py
+# Daily rollups by (date, student, room), (date, room) and (date, period): bumped as passes
+# close, rebuilt from the hot + historical stores on demand, read by the weekly reports
+# (memoized per filter and week until a pass in that week is returned)
+
+import threading, time
+from datetime import date, timedelta
+from flask import g, has_app_context
+from sqlalchemy import select, delete, func, case, union_all, Integer
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models import (
+    db, Pass, PassEvent, PassArchive, PassEventArchive,
+    DailyStudentStat, DailyRoomStat, DailyPeriodStat
+)
+from src.utils import load_config
+
+config = load_config()
+
+THRESHOLDS = config.get("report_time_thresholds", {"over_5": 300, "over_10": 600})
+METRICS    = ("passes", "total_seconds", "hallway_seconds", "station_seconds", "over_5", "over_10", "overrides")
+NO_PERIOD  = "-"   # period is part of a primary key; NULL would never match on upsert
+CACHE_TTL_S = config.get("weekly_summary_cache_seconds", 300)   # bound for writers in other processes
+CACHE_MAX   = 256   # entries; one per filter combination viewed, the soonest to expire goes first
+
+_memo      = {}   # ("rooms",) | (kind, week_start, ...filters) → (expires, value)
+_memo_lock = threading.Lock()
+_memo_gen  = 0    # bumped by invalidate(); a read that raced a return isn't kept
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Per-Pass Contribution
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Metric deltas for one closed pass (station time = first "in" → first "out", as in the reports).
+def contribution(total_seconds, station_seconds, is_override):
+    total = total_seconds or 0
+    station = max(0, station_seconds or 0)
+    return {
+        "passes": 1,
+        "total_seconds": total,
+        "hallway_seconds": total - station if station else total,
+        "station_seconds": station,
+        "over_5": int(total > THRESHOLDS["over_5"]),
+        "over_10": int(total > THRESHOLDS["over_10"]),
+        "overrides": int(bool(is_override)),
+    }
+
+# Station seconds for a hot pass from its swipe events.
+def station_seconds(pass_id):
+    first_in, first_out = db.session.execute(
+        select(
+            func.min(case((PassEvent.event == "in", PassEvent.timestamp))),
+            func.min(case((PassEvent.event == "out", PassEvent.timestamp))),
+        ).where(PassEvent.pass_id == pass_id)
+    ).one()
+    if not first_in or not first_out:
+        return 0
+    return int((first_out - first_in).total_seconds())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Incremental Update
+# ─────────────────────────────────────────────────────────────────────────────
+
+# One upsert statement per rollup table, built once; rows are bound per call.
+_UPSERTS = {}
+
+def _upsert(model, key_cols):
+    stmt = _UPSERTS.get(model)
+    if stmt is None:
+        ins = sqlite_insert(model.__table__)
+        stmt = _UPSERTS[model] = ins.on_conflict_do_update(
+            index_elements=list(key_cols),
+            set_={m: model.__table__.c[m] + ins.excluded[m] for m in METRICS}
+        )
+    return stmt
+
+def _bump(model, keys, delta):
+    db.session.execute(_upsert(model, keys), {**keys, **delta})
+
+# Add one returned pass to all three rollups. No commit: rides the caller's transaction.
+def record(pass_date, student_id, room, period, delta):
+    _bump(DailyStudentStat, {"date": pass_date, "student_id": student_id, "room": room}, delta)
+    _bump(DailyRoomStat, {"date": pass_date, "room": room}, delta)
+    _bump(DailyPeriodStat, {"date": pass_date, "period": period or NO_PERIOD}, delta)
+
+# Convenience for pass_manager: one closed hot pass.
+def record_pass(pass_id, pass_date, student_id, room, period, total_seconds, is_override):
+    delta = contribution(total_seconds, station_seconds(pass_id), is_override)
+    record(pass_date, student_id, room, period, delta)
+
+# Many closed hot passes at once (room reset): station seconds in one grouped query,
+# deltas summed per rollup key, then one executemany upsert per table.
+# `closed` rows: id, date, student_id, origin_room, period, total_pass_time, is_override.
+def record_passes(closed):
+    if not closed:
+        return
+    station = {}
+    for pass_id, first_in, first_out in db.session.execute(
+        select(
+            PassEvent.pass_id,
+            func.min(case((PassEvent.event == "in", PassEvent.timestamp))),
+            func.min(case((PassEvent.event == "out", PassEvent.timestamp))),
+        )
+        .where(PassEvent.pass_id.in_([r.id for r in closed]))
+        .group_by(PassEvent.pass_id)
+    ):
+        if first_in and first_out:
+            station[pass_id] = int((first_out - first_in).total_seconds())
+
+    sums = {DailyStudentStat: {}, DailyRoomStat: {}, DailyPeriodStat: {}}
+    for r in closed:
+        delta = contribution(r.total_pass_time, station.get(r.id, 0), r.is_override)
+        for model, key in (
+            (DailyStudentStat, (("date", r.date), ("student_id", r.student_id), ("room", r.origin_room))),
+            (DailyRoomStat, (("date", r.date), ("room", r.origin_room))),
+            (DailyPeriodStat, (("date", r.date), ("period", r.period or NO_PERIOD))),
+        ):
+            acc = sums[model].setdefault(key, dict.fromkeys(METRICS, 0))
+            for m in METRICS:
+                acc[m] += delta[m]
+
+    for model, rows in sums.items():
+        keys = dict(next(iter(rows)))
+        db.session.execute(_upsert(model, keys), [{**dict(key), **acc} for key, acc in rows.items()])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rebuild From History
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Closed passes with station seconds (first "in" → first "out"), one store at a time.
+def closed_passes(pass_model, event_model):
+    ev = (
+        select(
+            event_model.pass_id.label("pass_id"),
+            func.min(case((event_model.event == "in", event_model.timestamp))).label("first_in"),
+            func.min(case((event_model.event == "out", event_model.timestamp))).label("first_out"),
+        )
+        .group_by(event_model.pass_id)
+        .subquery()
+    )
+    station = func.cast(
+        func.round((func.julianday(ev.c.first_out) - func.julianday(ev.c.first_in)) * 86400, 3),
+        Integer
+    )
+    return (
+        select(
+            pass_model.date, pass_model.student_id, pass_model.origin_room, pass_model.period,
+            pass_model.total_pass_time, pass_model.is_override, pass_model.checkout_at,
+            func.coalesce(station, 0).label("station"),
+        )
+        .outerjoin(ev, ev.c.pass_id == pass_model.id)
+        .where(pass_model.checkin_at.is_not(None))
+    )
+
+# Recompute every date still covered by passes / passes_archive. Older rollup rows
+# (whose passes were purged to gzip by rollover) are kept as they are.
+def rebuild():
+    source = union_all(
+        closed_passes(Pass, PassEvent),
+        closed_passes(PassArchive, PassEventArchive),
+    ).subquery()
+    first_day = db.session.scalar(select(func.min(source.c.date)))
+
+    tables = {DailyStudentStat: {}, DailyRoomStat: {}, DailyPeriodStat: {}}
+    for r in db.session.execute(select(source)).yield_per(5000):
+        delta = contribution(r.total_pass_time, r.station, r.is_override)
+        keys = {
+            DailyStudentStat: (r.date, r.student_id, r.origin_room),
+            DailyRoomStat: (r.date, r.origin_room),
+            DailyPeriodStat: (r.date, r.period or NO_PERIOD),
+        }
+        for model, key in keys.items():
+            acc = tables[model].setdefault(key, dict.fromkeys(METRICS, 0))
+            for m in METRICS:
+                acc[m] += delta[m]
+
+    key_cols = {
+        DailyStudentStat: ("date", "student_id", "room"),
+        DailyRoomStat: ("date", "room"),
+        DailyPeriodStat: ("date", "period"),
+    }
+    for model, acc in tables.items():
+        if first_day:
+            db.session.execute(delete(model).where(model.date >= first_day))
+        if acc:
+            db.session.execute(model.__table__.insert(), [
+                {**dict(zip(key_cols[model], key)), **vals} for key, vals in acc.items()
+            ])
+    db.session.commit()
+    invalidate()
+    return {model.__tablename__: len(acc) for model, acc in tables.items()}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Report Reads
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Memoized report reads (and the weekly summary page). Treat the value as read-only.
+# Reads served from a snapshot (replica.read_only) are not memoized: the snapshot can
+# predate the last invalidate(), and the stale value would outlive it.
+def cached(key, compute):
+    if has_app_context() and g.get("read_source") == "snapshot":
+        return compute()
+    hit = _memo.get(key)
+    if hit and hit[0] > time.monotonic():
+        return hit[1]
+    gen = _memo_gen
+    value = compute()
+    with _memo_lock:
+        if gen == _memo_gen:
+            if len(_memo) >= CACHE_MAX:
+                del _memo[min(_memo, key=lambda k: _memo[k][0])]
+            _memo[key] = (time.monotonic() + CACHE_TTL_S, value)
+    return value
+
+# After the commit that returned a pass dated `day` (everything when None: rebuild,
+# rollover). A new room can appear with any return, so the room list goes too.
+def invalidate(day=None):
+    global _memo_gen
+    with _memo_lock:
+        _memo_gen += 1
+        if day is None:
+            _memo.clear()
+            return
+        start, _ = week_bounds(day)
+        for key in [k for k in _memo if k[0] == "rooms" or k[1] == start]:
+            del _memo[key]
+
+# Rooms that have any rollup history (weekly summary filter list): DISTINCT over the
+# room index, never the passes.
+def rooms():
+    return cached(("rooms",), lambda: db.session.execute(
+        select(DailyRoomStat.room).distinct().order_by(DailyRoomStat.room)
+    ).scalars().all())
+
+# Parse ?week=YYYY-MM-DD (any day in the week); this week when missing or malformed.
+def week_of(value):
+    try:
+        return date.fromisoformat(value or "")
+    except ValueError:
+        return date.today()
+
+# Monday..Sunday bounds of the week containing `day`.
+def week_bounds(day=None):
+    day = day or date.today()
+    start = day - timedelta(days=day.weekday())
+    return start, start + timedelta(days=6)
+
+# {student_id: {"days": {date: total_seconds}, "over_5", "over_10", "overrides", "passes"}} for one week.
+def student_week(day=None, student_id=None, room=None):
+    start, end = week_bounds(day)
+    return cached(("week", start, student_id or None, room or None),
+                   lambda: _student_week(start, end, student_id, room))
+
+def _student_week(start, end, student_id, room):
+    s = DailyStudentStat
+    stmt = (
+        select(
+            s.student_id, s.date,
+            func.sum(s.total_seconds), func.sum(s.over_5), func.sum(s.over_10),
+            func.sum(s.overrides), func.sum(s.passes)
+        )
+        .where(s.date.between(start, end))
+        .group_by(s.student_id, s.date)
+    )
+    if student_id:
+        stmt = stmt.where(s.student_id == student_id)
+    if room:
+        stmt = stmt.where(s.room == room)
+
+    out = {}
+    for sid, day_, total, over_5, over_10, overrides, passes in db.session.execute(stmt):
+        rec = out.setdefault(sid, {"days": {}, "over_5": 0, "over_10": 0, "overrides": 0, "passes": 0})
+        rec["days"][day_] = total
+        rec["over_5"] += over_5
+        rec["over_10"] += over_10
+        rec["overrides"] += overrides
+        rec["passes"] += passes
+    return out
+
+# "M:12 T:0 ..." minutes per report day, from a student_week() record.
+def weekly_string(rec, days):
+    day_totals = {d: 0 for d in days}
+    for day, seconds in (rec["days"] if rec else {}).items():
+        dname = day.strftime('%A')
+        if dname in day_totals:
+            day_totals[dname] += seconds
+    return ' '.join(f"{d[0]}:{day_totals[d]//60}" for d in days)
@@ -0,0 +1,89 @@
+# src/services/scheduler.py
+# Deadline-heap scheduler: one daemon thread sleeps until the earliest deadline, no polling
+
+import heapq, itertools, threading, time
+
+
+class DeadlineScheduler:
+    def __init__(self, name="hallpass-scheduler"):
+        self.name = name
+        self._heap = []                 # (when_ts, seq, key) — may hold stale entries
+        self._jobs = {}                 # key → (when_ts, seq, fn); the live set
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._thread = None
+
+    # Run fn at `when` (datetime). Re-scheduling an existing key replaces it.
+    def schedule(self, key, when, fn):
+        ts = when.timestamp()
+        with self._cv:
+            seq = next(self._seq)
+            self._jobs[key] = (ts, seq, fn)
+            heapq.heappush(self._heap, (ts, seq, key))
+            if len(self._heap) > 2 * len(self._jobs) + 64:
+                self._compact()
+            if self._heap[0][1] == seq:
+                self._cv.notify()  # new earliest deadline: wake the sleeper early
+
+    # Drop a job. Its heap entry is skipped lazily when it reaches the top.
+    def cancel(self, key):
+        with self._cv:
+            self._jobs.pop(key, None)
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __contains__(self, key):
+        return key in self._jobs
+
+    # Earliest live deadline as epoch seconds (None if idle).
+    def next_deadline(self):
+        with self._cv:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    # ── internals ──
+    def _compact(self):
+        self._heap = [(ts, seq, key) for key, (ts, seq, _) in self._jobs.items()]
+        heapq.heapify(self._heap)
+
+    def _drop_stale(self):
+        while self._heap:
+            ts, seq, key = self._heap[0]
+            job = self._jobs.get(key)
+            if job and job[1] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def _next_due(self):
+        with self._cv:
+            while True:
+                self._drop_stale()
+                if not self._heap:
+                    self._cv.wait()
+                    continue
+                ts, seq, key = self._heap[0]
+                delay = ts - time.time()
+                if delay > 0:
+                    self._cv.wait(timeout=delay)
+                    continue
+                heapq.heappop(self._heap)
+                return key, self._jobs.pop(key)[2]
+
+    def _loop(self):
+        while True:
+            key, fn = self._next_due()
+            try:
+                fn()
+            except Exception as e:
+                print(f"[SCHEDULER ERROR] {key}: {e}")
+
+
+# Shared instance for background jobs (overdue passes, nightly rollover, …)
+scheduler = DeadlineScheduler()
@@ -0,0 +1,220 @@
+# src/services/snapshots.py
+# Consistent copies of the live DB through SQLite's online backup API, taken while kiosks
+# keep writing. Snapshots rotate under data/purge, are integrity-checked before they are
+# kept, and can be opened read-only for heavy reports and exports.
+
+import os, re, sqlite3, threading, time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from src.models import db
+from src.utils import load_config
+from src.services.scheduler import scheduler
+from src.services.jobs import task
+
+config = load_config()
+
+KEEP          = config.get("snapshot_keep", 24)                  # newest N snapshots kept
+INTERVAL_MIN  = config.get("snapshot_interval_minutes", 60)      # 0 = only on demand
+STEP_PAGES    = config.get("snapshot_step_pages", 256)           # pages copied per lock hold
+STEP_SLEEP_S  = 0.005                                            # writers' window between steps
+MAX_RESTARTS  = 5     # source changed mid-copy this often → finish in one locked pass
+TAG_RE        = re.compile(r"_snapshot_(\d{8}_\d{6})\.db$")
+
+_lock    = threading.Lock()   # one snapshot at a time per process
+_engines = {}                 # snapshot path → read-only engine
+_app     = None
+
+
+class SnapshotError(Exception):
+    pass
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Backup / Verify
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _Restarted(Exception):
+    pass
+
+# Copy src_path → dst_path with the backup API.
+#  • WAL source (the default, see database.py): one pass inside a read transaction;
+#    writers append to the WAL meanwhile and are never blocked.
+#  • Rollback-journal source: a few hundred pages per step, lock released between
+#    steps. Any write from another connection restarts the copy, so after
+#    MAX_RESTARTS the rest goes in one pass (writers wait for one file copy).
+# The copy is switched to a plain rollback journal: one self-contained file.
+def backup(src_path, dst_path, pages=STEP_PAGES):
+    stats = {"steps": 0, "restarts": 0, "pages": 0}
+    last = [None]
+
+    def progress(status, remaining, total):
+        stats["steps"] += 1
+        stats["pages"] = total
+        if last[0] is not None and remaining > last[0]:
+            stats["restarts"] += 1
+            if stats["restarts"] > MAX_RESTARTS:
+                raise _Restarted()
+        last[0] = remaining
+
+    src = sqlite3.connect(src_path, timeout=30)
+    dst = sqlite3.connect(dst_path)
+    try:
+        if src.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            pages = -1
+        try:
+            src.backup(dst, pages=pages, progress=progress, sleep=STEP_SLEEP_S)
+        except _Restarted:
+            src.backup(dst, pages=-1)
+        dst.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dst.close()
+        src.close()
+    return stats
+
+# quick_check plus the model tables present. Returns the passes row count.
+def verify(path):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        check = conn.execute("PRAGMA quick_check").fetchone()[0]
+        if check != "ok":
+            raise SnapshotError(f"quick_check failed: {check}")
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if missing := {"users", "passes", "pass_events"} - tables:
+            raise SnapshotError(f"snapshot is missing tables {sorted(missing)}")
+        return conn.execute("SELECT COUNT(*) FROM passes").fetchone()[0]
+    finally:
+        conn.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Snapshots
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Snapshots sit in purge/ beside the live file, named after it:
+# data/hallpass.db → data/purge/hallpass_snapshot_YYYYMMDD_HHMMSS.db
+def _live_path():
+    return os.path.abspath(db.engine.url.database)
+
+def _folder():
+    return os.path.join(os.path.dirname(_live_path()), "purge")
+
+def _prefix():
+    return os.path.splitext(os.path.basename(_live_path()))[0] + "_snapshot_"
+
+def _snapshot_time(path):
+    match = TAG_RE.search(os.path.basename(path))
+    return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S") if match else None
+
+# Kept snapshots of the live DB, newest first.
+def list_snapshots():
+    folder, prefix = _folder(), _prefix()
+    if not os.path.isdir(folder):
+        return []
+    names = sorted((n for n in os.listdir(folder) if n.startswith(prefix) and TAG_RE.search(n)), reverse=True)
+    return [os.path.join(folder, n) for n in names]
+
+def latest():
+    found = list_snapshots()
+    return found[0] if found else None
+
+# Take, verify and keep a snapshot of the live DB; rotate out the oldest.
+def take():
+    with _lock:
+        os.makedirs(_folder(), exist_ok=True)
+        taken = datetime.now()
+        path = os.path.join(_folder(), f"{_prefix()}{taken:%Y%m%d_%H%M%S}.db")
+        part = path + ".part"
+        started = time.perf_counter()
+        try:
+            stats = backup(_live_path(), part)
+            passes = verify(part)
+        except Exception:
+            if os.path.exists(part):
+                os.remove(part)
+            raise
+        os.replace(part, path)
+        rotate()
+    info = {
+        "path": path,
+        "taken_at": taken.isoformat(timespec="seconds"),
+        "bytes": os.path.getsize(path),
+        "passes": passes,
+        "seconds": round(time.perf_counter() - started, 3),
+        **stats,
+    }
+    print(f"[SNAPSHOT] {info}")
+    return info
+
+def rotate(keep=KEEP):
+    for path in list_snapshots()[keep:]:
+        engine = _engines.pop(path, None)
+        if engine:
+            engine.dispose()
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"[WARN] Could not remove snapshot {path}: {e}")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Read-Only Access
+# ─────────────────────────────────────────────────────────────────────────────
+
+def engine(path):
+    if path not in _engines:
+        _engines[path] = create_engine(
+            f"sqlite:///file:{os.path.abspath(path)}?mode=ro&uri=true",
+            connect_args={"check_same_thread": False},
+        )
+    return _engines[path]
+
+# Newest snapshot taken at or after `not_before`, or None.
+def fresh(not_before):
+    path = latest()
+    return path if path and _snapshot_time(path) >= not_before else None
+
+# Read-only session on a snapshot (default: newest).
+@contextmanager
+def session(path=None):
+    path = path or latest()
+    if not path:
+        raise SnapshotError("no snapshot available")
+    s = Session(bind=engine(path))
+    try:
+        yield s
+    finally:
+        s.close()
+
+
+# Background job "snapshot": the file is offered as the job's download.
+@task("snapshot")
+def snapshot_job(ctx):
+    ctx.progress(0.0, "Copying database pages")
+    info = take()
+    ctx.message = f"{info['bytes'] // 1024} KB in {info['seconds']} s ({info['restarts']} restarts)"
+    return info["path"]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scheduling
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _scheduled_take():
+    try:
+        with _app.app_context():
+            take()
+    except Exception as e:
+        print(f"[SNAPSHOT ERROR] {e}")
+    finally:
+        scheduler.schedule(("snapshot",), datetime.now() + timedelta(minutes=INTERVAL_MIN), _scheduled_take)
+
+def start(app):
+    global _app
+    if not INTERVAL_MIN:
+        return
+    _app = app
+    scheduler.schedule(("snapshot",), datetime.now() + timedelta(minutes=INTERVAL_MIN), _scheduled_take)
+    scheduler.start()
+    print(f"[SNAPSHOT] Every {INTERVAL_MIN} min, keeping {KEEP}")
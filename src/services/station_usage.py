@@ -0,0 +1,197 @@
+# src/services/station_usage.py
+# Station dwell / occupancy from swipe events: in→out pairs per (pass, station) in one
+# timestamp-ordered scan, minute-resolution occupancy curves, dwell distributions and peaks.
+# Finished days are cached whole; today is extended from the last event id already seen.
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, date, time, timedelta, timezone
+from functools import lru_cache
+import numpy as np
+from sqlalchemy import select, union_all, func, literal
+from src.models import db, PassEvent, PassEventArchive
+from src.utils import load_config
+from src.services import capacity
+
+config = load_config()
+
+CACHE_DAYS   = config.get("station_usage_cache_days", 60)
+DWELL_BINS   = (0, 2, 5, 10, 15)                 # minutes; last bin is open-ended
+MINUTES      = 24 * 60
+
+_lock  = threading.Lock()
+_days  = OrderedDict()   # finished day → payload (LRU, CACHE_DAYS entries)
+_today = None            # _DayScan for date.today()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Event Scan
+# ─────────────────────────────────────────────────────────────────────────────
+# Swipe timestamps are stored in UTC; everything else (passes, periods, this
+# output) runs on the school's local clock. The offset is looked up per UTC hour,
+# so days on either side of a DST change (and the change day itself) bucket right.
+
+@lru_cache(maxsize=4096)
+def _offset(utc_hour):
+    return utc_hour.replace(tzinfo=timezone.utc).astimezone().utcoffset()
+
+# Local wall-clock minute of the day for a stored (UTC) timestamp.
+def _local_minute(ts):
+    local = ts + _offset(ts.replace(minute=0, second=0, microsecond=0))
+    return local.hour * 60 + local.minute
+
+class _DayScan:
+    # Pairing state for one local day. visits: station → [(in, out)] in local minutes.
+    def __init__(self, day):
+        self.day     = day
+        self.visits  = {}
+        self.open    = {}     # (pass_id, station) → in minute
+        self.last_id = 0      # highest hot pass_events.id folded in
+        self.payload = None   # (last_id, minute) → summarize() result
+
+    def feed(self, rows):
+        for event_id, pass_id, station, kind, ts in rows:
+            minute = _local_minute(ts)
+            key = (pass_id, station)
+            if kind == "in":
+                self.open[key] = minute                  # a repeated "in" restarts the visit
+            elif kind == "out" and key in self.open:
+                self.visits.setdefault(station, []).append((self.open.pop(key), minute))
+            if event_id:
+                self.last_id = max(self.last_id, event_id)
+
+def _events(model, start, end, after_id=0):
+    return (
+        select(model.id if model is PassEvent else literal(0),
+               model.pass_id, model.station, model.event, model.timestamp)
+        .where(model.timestamp >= start, model.timestamp < end, model.id > after_id)
+    )
+
+# Local midnight → stored (UTC) time.
+def _utc_midnight(day):
+    return datetime.combine(day, time.min).astimezone(timezone.utc).replace(tzinfo=None)
+
+# Local day → [start, end) in stored (UTC) time (23 or 25 hours on DST change days).
+def _bounds(day):
+    return _utc_midnight(day), _utc_midnight(day + timedelta(days=1))
+
+def _scan(day):
+    start, end = _bounds(day)
+    stmt = union_all(_events(PassEvent, start, end), _events(PassEventArchive, start, end)).subquery()
+    rows = db.session.execute(select(stmt).order_by(stmt.c.timestamp, stmt.c.id)).all()
+    scan = _DayScan(day)
+    scan.feed(rows)
+    return scan
+
+# New hot events since the last call. Ids restart once rollover empties the hot
+# table, so a max id below the high-water mark means rescan from scratch.
+def _extend(scan):
+    start, end = _bounds(scan.day)
+    if (db.session.scalar(select(func.max(PassEvent.id))) or 0) < scan.last_id:
+        return _scan(scan.day)
+    rows = db.session.execute(
+        _events(PassEvent, start, end, scan.last_id).order_by(PassEvent.timestamp, PassEvent.id)
+    ).all()
+    scan.feed(rows)
+    return scan
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Summaries
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _hhmm(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+# One station: occupancy curve (difference array), dwell histogram/percentiles, peaks.
+def _station(name, visits, still_in, now_minute):
+    spans = np.array(visits, dtype=np.int64).reshape(-1, 2)
+    ins   = np.r_[spans[:, 0], np.asarray(still_in, dtype=np.int64)]
+    outs  = np.r_[spans[:, 1], np.full(len(still_in), now_minute, dtype=np.int64)]
+    ins  = np.clip(ins, 0, MINUTES - 1)
+    outs = np.clip(np.maximum(outs, ins + 1), 0, MINUTES)     # occupied over [in, out), at least one minute
+
+    diff = np.bincount(ins, minlength=MINUTES + 1) - np.bincount(outs, minlength=MINUTES + 1)
+    occupancy = np.cumsum(diff)[:MINUTES]
+    first, last = (int(ins.min()), int(outs.max()) - 1) if len(ins) else (0, -1)
+
+    dwell = spans[:, 1] - spans[:, 0]
+    hist = np.histogram(dwell, bins=[*DWELL_BINS, MINUTES])[0] if len(dwell) else np.zeros(len(DWELL_BINS), int)
+    hourly = np.bincount(ins // 60, minlength=24)
+    peak = int(occupancy.argmax())
+    return {
+        "station": name,
+        "capacity": capacity.capacity_for(name),
+        "visits": int(len(spans)),
+        "inside_now": len(still_in),
+        "start_minute": first,
+        "occupancy": occupancy[first:last + 1].tolist(),
+        "peak_occupancy": int(occupancy[peak]),
+        "peak_time": _hhmm(peak) if occupancy[peak] else None,
+        "busiest_hour": f"{int(hourly.argmax()):02d}:00" if hourly.any() else None,
+        "dwell": {
+            "mean": round(float(dwell.mean()), 1) if len(dwell) else None,
+            "p50": float(np.percentile(dwell, 50)) if len(dwell) else None,
+            "p90": float(np.percentile(dwell, 90)) if len(dwell) else None,
+            "max": int(dwell.max()) if len(dwell) else None,
+            "bins": [f"{lo}-{hi}" for lo, hi in zip(DWELL_BINS, DWELL_BINS[1:])] + [f"{DWELL_BINS[-1]}+"],
+            "counts": hist.tolist(),
+        },
+    }
+
+# Visits still open are only meaningful for today (they run up to now); on
+# finished days an unmatched "in" is a missed swipe and is left out.
+def summarize(scan, live=False):
+    now = datetime.now()
+    now_minute = now.hour * 60 + now.minute
+    still_in = {}
+    if live:
+        for (_, station), minute in scan.open.items():
+            still_in.setdefault(station, []).append(minute)
+    names = sorted(set(scan.visits) | set(still_in))
+    return {
+        "date": scan.day.isoformat(),
+        "resolution_minutes": 1,
+        "unpaired": 0 if live else len(scan.open),
+        "stations": [_station(n, scan.visits.get(n, []), still_in.get(n, []), now_minute) for n in names],
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cached Reads
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Payload for one day (default today). Past days are computed once; today is
+# extended by the new swipes only and re-summarized once per minute or new swipe.
+def day_usage(day=None):
+    global _today
+    today = date.today()
+    day = day or today
+    if day > today:
+        return summarize(_DayScan(day))
+    with _lock:
+        if day == today:
+            if _today is None or _today.day != day:
+                _today = _scan(day)
+            else:
+                _today = _extend(_today)
+            key = (_today.last_id, datetime.now().strftime("%H:%M"))
+            if _today.payload is None or _today.payload[0] != key:
+                _today.payload = (key, summarize(_today, live=True))
+            return _today.payload[1]
+
+        if day in _days:
+            _days.move_to_end(day)
+            return _days[day]
+        payload = summarize(_scan(day))
+        _days[day] = payload
+        while len(_days) > CACHE_DAYS:
+            _days.popitem(last=False)
+        return payload
+
+# Drop cached days (rollover purges, rebuilds).
+def invalidate():
+    global _today
+    with _lock:
+        _days.clear()
+        _today = None
@@ -0,0 +1,231 @@
+# src/services/swipes.py
+# Kiosk swipe handling shared by the station form and the JSON swipe API: one swipe →
+# (code, message). Batches from the kiosk's offline queue carry client idempotency keys
+# and timestamps; keys are claimed in swipe_receipts before the swipe runs, so a retried
+# batch or a replay of a live swipe never re-applies.
+
+from datetime import datetime
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models import db, User, PassEvent, SwipeReceipt
+from src.utils import load_config, log_audit, is_station, get_current_periods
+from src.services import pass_manager, capacity, hot_store
+
+config = load_config()
+
+MAX_BATCH       = config.get("kiosk_max_batch", 200)
+MAX_OFFLINE_AGE = config.get("kiosk_max_offline_seconds", 8 * 3600)   # older queued swipes are refused
+DOUBLE_SWIPE_S  = 30
+
+# Result codes returned to kiosks (the message is what the kiosk shows).
+OK_CODES = {"recorded", "returned", "checked_out"}
+PENDING  = "pending"   # receipt claimed, swipe not settled yet
+RETRY    = "retry"     # not applied: the kiosk keeps it queued and sends it again
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Single Swipe
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Apply one swipe of `student_id` at `station`. `at` is the local swipe time
+# (None = now); every write below is stamped with it.
+def swipe(student_id, station, at=None):
+    at = at or datetime.now()
+    at_utc = at - (datetime.now() - datetime.utcnow())
+
+    student = db.session.get(User, student_id)
+    if not student or student.role != "student":
+        return "invalid_student", "Unauthorized user or invalid ID"
+
+    active_pass = hot_store.open_pass_for(student.id)
+    if not active_pass:
+        return _self_checkout(student, station, at)
+
+    if active_pass.status == pass_manager.STATUS_PENDING_START:
+        return "pending_approval", "Your pass is waiting for approval."
+
+    logs_for_station = [l for l in active_pass.events if l.station == station]
+    num_in = sum(1 for l in logs_for_station if l.event == "in")
+    num_out = sum(1 for l in logs_for_station if l.event == "out")
+    new_event = "in" if num_in <= num_out else "out"
+
+    last_event = db.session.query(PassEvent).filter_by(pass_id=active_pass.id)\
+        .order_by(PassEvent.timestamp.desc()).first()
+
+    # Prevent double-swipe abuse
+    if (
+        last_event and
+        last_event.station == station and
+        last_event.event == "out" and
+        new_event == "in" and
+        (at_utc - last_event.timestamp).total_seconds() < DOUBLE_SWIPE_S
+    ):
+        return "double_swipe", "Already swiped out - wait a moment before re-entering."
+
+    # Read once: the commit below expires the instance, and every later
+    # attribute access would reload the row.
+    pass_id, origin_room, status = active_pass.id, active_pass.origin_room, active_pass.status
+    checkout_at, name = active_pass.checkout_at, student.name
+    uses_slot = is_station(station, config=config) and station != origin_room
+
+    # Full station: reject from the slot counter, no pass scan
+    if new_event == "in" and uses_slot and not capacity.reserve(station):
+        return "station_full", f"{station} is full right now - please wait for a free slot."
+
+    if new_event == "out" and uses_slot:
+        capacity.release(station)
+
+    # Set return room if valid station (not classroom); clear it when exiting it
+    if new_event == "in" and not active_pass.room_in and uses_slot:
+        active_pass.room_in = station
+    elif new_event == "out" and active_pass.room_in == station:
+        active_pass.room_in = None
+
+    # Commits the slot change, room_in and the event together
+    pass_manager.record_pass_event(active_pass, station, new_event, timestamp=at_utc)
+
+    # Check-in back to origin
+    if new_event == "in" and station == origin_room:
+        back_at = max(at, checkout_at) if checkout_at else at
+        if pass_manager.return_pass(active_pass, station=station, at=back_at):
+            return "returned", f"{name}'s pass ended at {station}."
+        return "conflict", pass_manager.CONFLICT_MESSAGE
+
+    if status == pass_manager.STATUS_PENDING_RETURN:
+        pass_manager.resume_pass(pass_id)
+    return "recorded", f"{name} {new_event} recorded at {station}."
+
+# Self-checkout logic for classrooms (slot reserved with the insert)
+def _self_checkout(student, station, at):
+    if is_station(station):
+        return "no_pass", "You don’t have an active pass to use this station."
+
+    periods = get_current_periods(at)
+    existing, created = pass_manager.open_pass(
+        student.id, station, periods[0] if periods else "0",
+        status=pass_manager.STATUS_ACTIVE, reserve_slot=True, at=at
+    )
+    if created:
+        log_audit(student.id, f"Checked out from classroom {station}")
+        return "checked_out", f"{student.name} checked out from Room {station}."
+    if existing:
+        return "already_open", "You already have an open pass."
+    return "room_full", f"Max passes reached for Room {station}."
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Batches (kiosk offline queue)
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Client timestamp (epoch ms) → local datetime, clamped to now.
+def _client_time(ms, now):
+    try:
+        return min(datetime.fromtimestamp(float(ms) / 1000), now)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return now
+
+# ── Receipts ──
+# A key is claimed (receipt code "pending") before its swipe runs and settled with the
+# result right after, so only one request ever applies it. A claim whose swipe raised
+# is released again and reported as retryable; one still in flight in another request
+# is reported as retryable too, and the kiosk keeps both queued.
+
+def _claim(station, rows, now):
+    if not rows:
+        return set()
+    claimed = set(db.session.scalars(
+        sqlite_insert(SwipeReceipt)
+        .values([{"key": k, "station": station, "student_id": sid, "swiped_at": at, "received_at": now}
+                 for at, k, sid in rows])
+        .on_conflict_do_nothing(index_elements=[SwipeReceipt.key])
+        .returning(SwipeReceipt.key)
+    ).all())
+    db.session.commit()
+    return claimed
+
+def _settle(key, code, message):
+    db.session.execute(update(SwipeReceipt).where(SwipeReceipt.key == key).values(code=code, message=message))
+    db.session.commit()
+
+def _release(key):
+    db.session.rollback()
+    db.session.execute(delete(SwipeReceipt).where(SwipeReceipt.key == key, SwipeReceipt.code == PENDING))
+    db.session.commit()
+
+def _result(key, code, message, duplicate=False):
+    if code in (None, PENDING):
+        code, message = RETRY, "Swipe not saved yet - it will be sent again."
+    return {"key": key, "code": code, "ok": code in OK_CODES, "message": message,
+            "duplicate": duplicate, "retry": code == RETRY}
+
+# Run swipe() for a claimed key and settle its receipt. On failure the claim is
+# released and (None, None) comes back.
+def _apply(key, student_id, station, at):
+    try:
+        code, message = swipe(student_id, station, at)
+    except Exception as e:
+        _release(key)
+        print(f"[SWIPE ERROR] {station} {key}: {e}")
+        return None, None
+    _settle(key, code, message)
+    return code, message
+
+# Apply a batch of {"key", "student_id", "ts"} from one station's kiosk in
+# timestamp order. New keys are claimed in one statement up front; keys seen
+# before return their stored result with duplicate=True.
+def ingest(station, items):
+    now = datetime.now()
+    swipes = []
+    for item in items[:MAX_BATCH]:
+        key = str(item.get("key") or "").strip()[:64]
+        student_id = str(item.get("student_id") or "").strip()
+        if key and student_id:
+            swipes.append((_client_time(item.get("ts"), now), key, student_id))
+    swipes.sort()
+
+    claimed = _claim(station, swipes, now)
+    results = {}
+    for at, key, student_id in swipes:
+        if key not in claimed:
+            continue
+        claimed.discard(key)     # a key repeated inside one batch applies once
+        if (now - at).total_seconds() > MAX_OFFLINE_AGE or at.date() != now.date():
+            code, message = "expired", "Swipe was queued too long ago to apply - see the front office."
+            _settle(key, code, message)
+        else:
+            code, message = _apply(key, student_id, station, at)
+        results[key] = _result(key, code, message)
+
+    stored = {r.key: r for r in db.session.scalars(
+        select(SwipeReceipt).where(SwipeReceipt.key.in_([k for _, k, _ in swipes if k not in results]))
+    )}
+    out, seen = [], set()
+    for _, key, _ in swipes:
+        if key in results:
+            out.append({**results[key], "duplicate": key in seen})
+        elif key in stored:
+            out.append(_result(key, stored[key].code, stored[key].message, duplicate=True))
+        seen.add(key)
+    return out
+
+# One live swipe (single-swipe endpoint). With a key, the key is claimed before the
+# swipe runs, so a kiosk that lost the response and replays the key through its queue
+# gets this result back instead of a second swipe. Returns (code, message); code is
+# RETRY when the swipe failed or the key is still in flight elsewhere.
+def live(station, student_id, key=None):
+    if not key:
+        return swipe(student_id, station)
+    key, now = key[:64], datetime.now()
+    if _claim(station, [(now, key, student_id)], now):
+        code, message = _apply(key, student_id, station, now)
+    else:
+        r = db.session.get(SwipeReceipt, key)
+        code, message = (r.code, r.message) if r else (None, None)
+    result = _result(key, code, message)
+    return result["code"], result["message"]
+
+# Receipts older than `before` (rollover); retries never span days.
+def prune(before):
+    result = db.session.execute(delete(SwipeReceipt).where(SwipeReceipt.received_at < before))
+    db.session.commit()
+    return result.rowcount
@@ -1,16 +1,11 @@
 # src/utils.py
 # Shared utility functions: config loader, audit logger, room/session helpers, and CSV response tools
 
-import os, json
-from datetime import datetime
+import json
+from datetime import datetime, timedelta, time
 from flask import make_response
 from src.models import db, AuditLog, ActiveRoom
-
-# ─────────────────────────────────────────────────────────────────────────────
-# Globals
-# ─────────────────────────────────────────────────────────────────────────────
-AUDIT_LOG_FILE = os.path.join('data', 'logs', 'console_audit.log')
-
+from src.services import changes, directory
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Active Room Helpers
@@ -30,6 +25,7 @@ def is_station(name: str, config=None) -> bool:
 def activate_room(room: str):
     if not ActiveRoom.query.get(room):
         db.session.add(ActiveRoom(room=room))
+        changes.record("room", room, "activated")
         db.session.commit()
 
 # Remove a room from active status.
@@ -37,12 +33,14 @@ def deactivate_room(room: str):
     rec = ActiveRoom.query.get(room)
     if rec:
         db.session.delete(rec)
+        changes.record("room", room, "deactivated")
         db.session.commit()
 
 # Reset all active rooms to a new list.
 def replace_rooms(room_list: list[str]):
     ActiveRoom.query.delete()
     db.session.bulk_save_objects([ActiveRoom(room=r) for r in room_list])
+    changes.record("room", None, "replaced", rooms=room_list)
     db.session.commit()
 
 
@@ -50,19 +48,21 @@ def replace_rooms(room_list: list[str]):
 # Audit Logger
 # ─────────────────────────────────────────────────────────────────────────────
 
-# Write an audit log entry to the DB and to a local log file.
-def log_audit(student_id, reason):
+# Write an audit log entry to the DB and to the rotating JSON-lines file (services/audit_log.py).
+# commit=False adds the row to the caller's open transaction instead.
+def log_audit(student_id, reason, commit=True):
+    from src.services import audit_log, audit_search
     try:
         clean_reason = reason.replace("–", "-").replace("—", "-")
-        line = f"[AUDIT] {student_id} - {clean_reason}"
+        now = datetime.now()
 
-        db.session.add(AuditLog(student_id=student_id, reason=clean_reason, time=datetime.now()))
-        db.session.commit()
+        db.session.add(AuditLog(student_id=student_id, reason=clean_reason, time=now,
+                                **audit_search.parse(clean_reason)))
+        if commit:
+            db.session.commit()
 
-        print(line)
-        os.makedirs(os.path.dirname(AUDIT_LOG_FILE), exist_ok=True)
-        with open(AUDIT_LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
+        print(f"[AUDIT] {student_id} - {clean_reason}")
+        audit_log.write(student_id, clean_reason, at=now)
 
     except Exception as e:
         print(f"[AUDIT ERROR] {e}")
@@ -85,21 +85,36 @@ def load_config():
 
 config = load_config()
 
-# Return a list of all periods currently active (based on time window).
-def get_current_periods():
-    now = datetime.now().time()
-    matches = []
-
-    for period, times in config.get("period_schedule", {}).items():
+# The active schedule variant parsed once: [(period, start, end)] as datetime.time.
+def _parse_periods(schedule):
+    parsed = []
+    for period, times in schedule.items():
         try:
-            start = datetime.strptime(times["start"], "%H:%M").time()
-            end = datetime.strptime(times["end"], "%H:%M").time()
-            if start <= now <= end:
-                matches.append(period)
+            parsed.append((period, datetime.strptime(times["start"], "%H:%M").time(),
+                           datetime.strptime(times["end"], "%H:%M").time()))
         except Exception as e:
             print(f"[WARN] Skipping period {period} due to bad time format: {e}")
-
-    return matches
+    return parsed
+
+PERIODS = _parse_periods(config.get("period_schedule", {}))
+
+# Return a list of all periods active now (or at `at`, for swipes replayed from a kiosk queue).
+def get_current_periods(at=None):
+    now = (at or datetime.now()).time()
+    return [period for period, start, end in PERIODS if start <= now <= end]
+
+# Next moment the set of current periods changes after `at`: a later period start, or
+# a period end (periods include their end instant, so an end equal to `at` is returned
+# as-is: the change is immediate). Falls back to the first start tomorrow, or
+# midnight for an empty schedule.
+def next_period_boundary(at=None):
+    at = at or datetime.now()
+    now = at.time()
+    today = [start for _, start, _ in PERIODS if start > now] + [end for _, _, end in PERIODS if end >= now]
+    if today:
+        return datetime.combine(at.date(), min(today))
+    tomorrow = at.date() + timedelta(days=1)
+    return datetime.combine(tomorrow, min((start for _, start, _ in PERIODS), default=time.min))
 
 # Get the room a student is assigned to during a specific period.
 def get_room(student_id, period):
@@ -120,6 +135,7 @@ def sync_student_schedule_to_periods():
                 period = key.replace("period_", "").replace("_", "/")
                 db.session.add(StudentPeriod(student_id=sched.student_id, period=period, room=val))
     db.session.commit()
+    directory.invalidate()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -11,6 +11,7 @@ document.addEventListener('DOMContentLoaded', () => {
   document.getElementById('welcome-msg').textContent = `${greeting}, ${name}`;
 
   setupOverrideForm();
+  setupStudentPicker();
   refreshStationList();
   loadPasses();
   loadPendingPasses();
@@ -43,7 +44,7 @@ function loadPasses() {
     .then(data => {
       data.forEach(p => {
         const row = tbody.insertRow();
-        row.className = p.status;
+        row.className = p.status + (p.overdue ? ' overdue' : '');
         row.innerHTML = generatePassRow(p);
         if (p.status === 'active' && p.room_time?.includes('@')) {
           const [, timePart] = p.room_time.split('@');
@@ -63,7 +64,7 @@ function loadPendingPasses() {
       tbody.innerHTML = '';
       data.forEach(p => {
         const row = tbody.insertRow();
-        row.className = p.status;
+        row.className = p.status + (p.overdue ? ' overdue' : '');
         row.innerHTML = generatePendingRow(p);
       });
     });
@@ -203,6 +204,32 @@ function setupOverrideForm() {
   });
 }
 
+// Type-ahead for the override form's student field, served by /students/directory.
+function setupStudentPicker() {
+  const input = document.getElementById('override-student-id');
+  const options = document.getElementById('override-student-options');
+  if (!input || !options) return;
+  let seq = 0;
+
+  input.addEventListener('input', () => {
+    const q = input.value.trim();
+    const mine = ++seq;
+    if (!q) { options.innerHTML = ''; return; }
+    fetch(`/students/directory?limit=10&q=${encodeURIComponent(q)}`)
+      .then(res => res.json())
+      .then(data => {
+        if (mine !== seq) return;   // a newer keystroke already asked
+        options.innerHTML = '';
+        data.students.forEach(s => {
+          const opt = document.createElement('option');
+          opt.value = s.id;
+          opt.label = s.name;
+          options.appendChild(opt);
+        });
+      });
+  });
+}
+
 /* ----------------------------------------------------------
    Section: Popups (Password + Settings + Schedule)
 ---------------------------------------------------------- */
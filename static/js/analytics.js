@@ -0,0 +1,88 @@
+// static/js/analytics.js
+// Renders /admin_analytics_data: summary, percentiles, heatmap, utilization sparklines, outliers
+
+function fmtSecs(s) {
+  if (s === null || s === undefined) return '-';
+  s = Math.round(s);
+  return `${Math.floor(s / 60)}m ${s % 60}s`;
+}
+
+function fmtMinute(m) {
+  const h = Math.floor(m / 60), mm = String(m % 60).padStart(2, '0');
+  return `${h}:${mm}`;
+}
+
+function fillRows(tbodyId, rows, cells) {
+  const tbody = document.querySelector(`#${tbodyId} tbody`);
+  tbody.innerHTML = '';
+  rows.forEach(r => {
+    const tr = tbody.insertRow();
+    cells(r).forEach(v => { tr.insertCell().textContent = v; });
+  });
+}
+
+function drawSummary(s) {
+  fillRows('summary-table', [
+    ['Passes', s.passes], ['Students', s.students], ['School days', s.days],
+    ['Mean', fmtSecs(s.mean)], ['p50', fmtSecs(s.p50)], ['p90', fmtSecs(s.p90)], ['p99', fmtSecs(s.p99)],
+    ['Share of time in stations', `${Math.round(s.station_share * 100)}%`], ['Overrides', s.overrides]
+  ], r => r);
+}
+
+function drawHeatmap(h) {
+  const table = document.getElementById('heatmap-table');
+  table.tHead.innerHTML = '<tr><th>Period</th>' + h.weekdays.map(d => `<th>${d}</th>`).join('') + '</tr>';
+  const max = Math.max(1, ...h.counts.flat());
+  const tbody = table.tBodies[0];
+  tbody.innerHTML = '';
+  h.periods.forEach((p, i) => {
+    const tr = tbody.insertRow();
+    tr.insertCell().textContent = p;
+    h.counts[i].forEach((n, j) => {
+      const td = tr.insertCell();
+      td.textContent = n ? `${n} / ${(h.mean_seconds[i][j] / 60).toFixed(1)}` : '';
+      td.style.backgroundColor = `rgba(74, 144, 226, ${(n / max).toFixed(2)})`;
+    });
+  });
+}
+
+function sparkline(values, cap) {
+  const w = 240, hgt = 32, max = Math.max(cap, ...values, 0.01);
+  const step = values.length > 1 ? w / (values.length - 1) : w;
+  const pts = values.map((v, i) => `${(i * step).toFixed(1)},${(hgt - (v / max) * hgt).toFixed(1)}`).join(' ');
+  const capY = (hgt - (cap / max) * hgt).toFixed(1);
+  return `<svg width="${w}" height="${hgt}"><line x1="0" x2="${w}" y1="${capY}" y2="${capY}" stroke="#e66" stroke-dasharray="3,3"/>` +
+         `<polyline fill="none" stroke="#4a90e2" stroke-width="1.5" points="${pts}"/></svg>`;
+}
+
+function drawUtilization(u) {
+  const tbody = document.querySelector('#util-table tbody');
+  tbody.innerHTML = '';
+  u.rooms.forEach(r => {
+    const tr = tbody.insertRow();
+    tr.insertCell().textContent = r.room;
+    tr.insertCell().textContent = r.capacity;
+    tr.insertCell().innerHTML = sparkline(r.avg_out, r.capacity);
+    tr.insertCell().textContent = `${r.peak_avg_out} @ ${fmtMinute(r.peak_minute)}`;
+    tr.insertCell().textContent = `${Math.round(r.mean_utilization * 100)}%`;
+  });
+}
+
+function loadAnalytics() {
+  fetch(window.analyticsUrl)
+    .then(res => res.json())
+    .then(data => {
+      drawSummary(data.summary);
+      fillRows('outlier-table', data.outliers, o => [
+        o.student_name, o.student_id, o.passes, fmtSecs(o.mean_seconds), fmtSecs(o.total_seconds), o.z_count, o.z_mean
+      ]);
+      const pctRow = g => [g.key, g.passes, fmtSecs(g.p50), fmtSecs(g.p90), fmtSecs(g.p99)];
+      fillRows('room-table', data.by_room, pctRow);
+      fillRows('period-table', data.by_period, pctRow);
+      drawHeatmap(data.heatmap);
+      drawUtilization(data.utilization);
+    })
+    .catch(err => console.error('❌ analytics fetch failed:', err));
+}
+
+document.addEventListener('DOMContentLoaded', loadAnalytics);
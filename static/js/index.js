@@ -81,14 +81,23 @@ function updateCustomClock() {
   if (el) el.textContent = `${weekday}, ${date} ${time}`;
 }
 
+// /period is cacheable until the next period boundary, so refresh right after it
+// (spread over a few seconds so every device doesn't ask at the same instant).
+let periodTimer = null;
+
 function updatePeriod() {
-  fetch('/debug_period')
+  clearTimeout(periodTimer);
+  fetch('/period')
     .then(res => res.json())
     .then(data => {
-      const current = Array.isArray(data) ? data.find(p => p.match) : data;
       const el = document.getElementById('period');
-      if (el) el.textContent = current ? `Current Period: ${current.period}` : 'Outside scheduled periods';
-    });
+      if (el) el.textContent = data.periods.length
+        ? `Current Period: ${data.periods.join(', ')}`
+        : 'Outside scheduled periods';
+      const wait = Date.parse(data.next_boundary) - Date.now() + 1000 + Math.random() * 4000;
+      periodTimer = setTimeout(updatePeriod, Math.max(wait, 5000));
+    })
+    .catch(() => { periodTimer = setTimeout(updatePeriod, 30000); });
 }
 
 /* ----------------------------------------------------------
@@ -153,6 +162,8 @@ document.addEventListener('DOMContentLoaded', () => {
   loadRoomDots();
 
   setInterval(updateCustomClock, 1000);
-  setInterval(updatePeriod, 30000);
+  document.addEventListener('visibilitychange', () => {
+    if (!document.hidden) updatePeriod();   // timers stall while a laptop sleeps
+  });
   setInterval(loadRoomDots, 12000);
 });
@@ -0,0 +1,111 @@
+// static/js/jobs.js
+// Background jobs panel (admin dashboard) and roster-upload status (students page).
+// Polls /jobs quickly while something is queued or running, slowly otherwise.
+
+const ACTIVE = new Set(['queued', 'running']);
+const FAST_MS = 1500;
+const SLOW_MS = 15000;
+
+let jobsTimer = null;
+
+/* ----------------------------------------------------------
+   Section: Jobs Table
+---------------------------------------------------------- */
+function jobRow(job) {
+  const tr = document.createElement('tr');
+  const pct = Math.round(job.progress * 100);
+  const status = job.status === 'failed' ? `failed: ${job.error || ''}` : job.status;
+
+  [job.kind, new Date(job.created_at).toLocaleString(), status].forEach(text => {
+    const td = document.createElement('td');
+    td.textContent = text;
+    tr.appendChild(td);
+  });
+
+  const progress = document.createElement('td');
+  progress.innerHTML = `<progress max="100" value="${pct}"></progress> ${pct}%`;
+  const msg = document.createElement('div');
+  msg.className = 'job-message';
+  msg.textContent = job.message || '';
+  progress.appendChild(msg);
+  tr.appendChild(progress);
+
+  const action = document.createElement('td');
+  if (ACTIVE.has(job.status)) {
+    const btn = document.createElement('button');
+    btn.textContent = 'Cancel';
+    btn.onclick = () => fetch(`/jobs/${job.id}/cancel`, { method: 'POST' }).then(loadJobs);
+    action.appendChild(btn);
+  } else if (job.has_result) {
+    const link = document.createElement('a');
+    link.href = `/jobs/${job.id}/download`;
+    link.textContent = 'Download';
+    action.appendChild(link);
+  }
+  tr.appendChild(action);
+  return tr;
+}
+
+function loadJobs() {
+  const tbody = document.getElementById('jobs-table');
+  if (!tbody) return Promise.resolve();
+  clearTimeout(jobsTimer);
+
+  return fetch('/jobs')
+    .then(res => res.json())
+    .then(data => {
+      tbody.innerHTML = '';
+      data.jobs.forEach(job => tbody.appendChild(jobRow(job)));
+      const busy = data.jobs.some(j => ACTIVE.has(j.status));
+      jobsTimer = setTimeout(loadJobs, busy ? FAST_MS : SLOW_MS);
+    })
+    .catch(() => { jobsTimer = setTimeout(loadJobs, SLOW_MS); });
+}
+
+function submitJob(kind) {
+  return fetch(`/jobs/${kind}`, { method: 'POST' })
+    .then(res => res.json())
+    .then(data => { if (!data.id) alert(data.message); })
+    .then(loadJobs);
+}
+
+/* ----------------------------------------------------------
+   Section: Single Job Status (?job=<id>)
+---------------------------------------------------------- */
+function watchJob(jobId) {
+  const el = document.getElementById('job-status');
+  if (!el) return;
+
+  fetch(`/jobs/${jobId}`)
+    .then(res => res.json())
+    .then(job => {
+      if (!job.status) { el.textContent = job.message; return; }
+      if (ACTIVE.has(job.status)) {
+        el.textContent = `⏳ ${job.message || 'Working'} (${Math.round(job.progress * 100)}%)`;
+        setTimeout(() => watchJob(jobId), FAST_MS);
+      } else if (job.status === 'succeeded') {
+        el.textContent = `✅ ${job.message || 'Done'}`;
+        const url = new URL(window.location);
+        url.searchParams.delete('job');
+        setTimeout(() => { window.location = url; }, 1500);
+      } else {
+        el.textContent = `⚠️ Job ${job.status}${job.error ? `: ${job.error}` : ''}`;
+      }
+    });
+}
+
+/* ----------------------------------------------------------
+   Section: Initialization
+---------------------------------------------------------- */
+document.addEventListener('DOMContentLoaded', () => {
+  const exportBtn = document.getElementById('export-db-btn');
+  if (exportBtn) exportBtn.addEventListener('click', () => submitJob('export_db'));
+  const changesBtn = document.getElementById('export-changes-btn');
+  if (changesBtn) changesBtn.addEventListener('click', () => submitJob('export_changes'));
+  const snapshotBtn = document.getElementById('snapshot-btn');
+  if (snapshotBtn) snapshotBtn.addEventListener('click', () => submitJob('snapshot'));
+  loadJobs();
+
+  const jobId = new URLSearchParams(window.location.search).get('job');
+  if (jobId) watchJob(jobId);
+});
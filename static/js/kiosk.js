@@ -0,0 +1,173 @@
+// static/js/kiosk.js
+// Station kiosk swipes without page reloads. Online, each swipe is one small JSON POST
+// to /station_swipe over a kept-alive connection. When that fails (or older swipes are
+// still waiting) the swipe lands in an IndexedDB queue that flushes in batches to
+// /station_swipes; retries are safe because each swipe carries its own key.
+
+const QUEUE_DB = 'hallpass-kiosk';
+const QUEUE_STORE = 'swipes';
+const BATCH_SIZE = 50;
+const RETRY_MS = [1000, 2000, 5000, 10000, 30000];
+
+let queueDb = null;
+let flushing = false;
+let retries = 0;
+let retryTimer = null;
+
+/* ----------------------------------------------------------
+   IndexedDB queue
+---------------------------------------------------------- */
+function openQueue() {
+  if (!queueDb) {
+    queueDb = new Promise((resolve, reject) => {
+      const req = indexedDB.open(QUEUE_DB, 1);
+      req.onupgradeneeded = () => req.result.createObjectStore(QUEUE_STORE, { keyPath: 'key' });
+      req.onsuccess = () => resolve(req.result);
+      req.onerror = () => reject(req.error);
+    });
+  }
+  return queueDb;
+}
+
+function withStore(mode, fn) {
+  return openQueue().then(db => new Promise((resolve, reject) => {
+    const tx = db.transaction(QUEUE_STORE, mode);
+    const req = fn(tx.objectStore(QUEUE_STORE));
+    tx.oncomplete = () => resolve(req ? req.result : undefined);
+    tx.onerror = () => reject(tx.error);
+  }));
+}
+
+// crypto.randomUUID needs a secure context; kiosks on plain-HTTP LANs fall back.
+function swipeKey() {
+  if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+}
+
+function enqueue(swipe) {
+  return withStore('readwrite', store => store.put(swipe)).then(() => swipe);
+}
+
+function queued() {
+  return withStore('readonly', store => store.getAll())
+    .then(all => all.sort((a, b) => a.ts - b.ts));
+}
+
+function dequeue(keys) {
+  return withStore('readwrite', store => { keys.forEach(k => store.delete(k)); return null; });
+}
+
+/* ----------------------------------------------------------
+   Flush
+---------------------------------------------------------- */
+function showStatus(text, ok) {
+  const el = document.getElementById('swipe-status');
+  if (!el) return;
+  el.textContent = text;
+  el.style.display = text ? '' : 'none';
+  el.style.color = ok === false ? '#c0392b' : '';
+}
+
+function showQueue(count) {
+  const el = document.getElementById('queue-status');
+  if (el) el.textContent = count ? `📦 ${count} swipe${count === 1 ? '' : 's'} waiting to sync` : '';
+}
+
+function scheduleRetry() {
+  clearTimeout(retryTimer);
+  retryTimer = setTimeout(flushQueue, RETRY_MS[Math.min(retries++, RETRY_MS.length - 1)]);
+}
+
+function flushQueue() {
+  if (flushing) return Promise.resolve();
+  flushing = true;
+
+  const step = () => queued().then(all => {
+    showQueue(all.length);
+    if (!all.length) return;
+    const batch = all.slice(0, BATCH_SIZE);
+
+    return fetch('/station_swipes', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ swipes: batch })
+    }).then(res => {
+      if (res.status === 403) throw new Error('station closed');
+      if (!res.ok) throw new Error(`server ${res.status}`);
+      return res.json();
+    }).then(data => {
+      const last = data.results[data.results.length - 1];
+      if (last) showStatus(last.message, last.ok);
+      // "retry" results were not applied (the server released them): keep those queued
+      const keep = new Set(data.results.filter(r => r.retry).map(r => r.key));
+      return dequeue(batch.map(s => s.key).filter(k => !keep.has(k))).then(() => {
+        if (keep.size) throw new Error(`${keep.size} swipe(s) not applied yet`);
+        retries = 0;
+        return step();
+      });
+    });
+  });
+
+  return step()
+    .catch(err => {
+      console.warn('⏳ swipe sync deferred:', err.message);
+      queued().then(all => {
+        showQueue(all.length);
+        if (all.length) showStatus('Saved — will sync when the connection is back.');
+      });
+      scheduleRetry();
+    })
+    .finally(() => { flushing = false; });
+}
+
+/* ----------------------------------------------------------
+   Live swipe (queue empty, server reachable)
+---------------------------------------------------------- */
+const OK_CODES = new Set(['recorded', 'returned', 'checked_out']);
+const RETRYABLE = new Set([502, 503, 504]);   // not applied (503 "retry" from the app too): safe to queue
+
+function sendSwipe(swipe) {
+  return queued().then(waiting => {
+    if (waiting.length || !navigator.onLine) return enqueue(swipe).then(flushQueue);
+
+    return fetch('/station_swipe', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ student_id: swipe.student_id, key: swipe.key })
+    }).then(res => {
+      if (res.ok) return res.json().then(data => showStatus(data.message, OK_CODES.has(data.code)));
+      if (RETRYABLE.has(res.status)) return enqueue(swipe).then(flushQueue);
+      showStatus(res.status === 403 ? '⛔ Station not set — relaunch from the admin panel.'
+                                    : 'Something went wrong — please swipe again.', false);
+    }, () => enqueue(swipe).then(flushQueue));   // no response: replay by key through the queue
+  });
+}
+
+/* ----------------------------------------------------------
+   Page wiring
+---------------------------------------------------------- */
+function initKiosk() {
+  const form = document.getElementById('swipe-form');
+  const input = form.querySelector('input[name="student_id"]');
+
+  form.addEventListener('submit', e => {
+    e.preventDefault();
+    const studentId = input.value.trim();
+    input.value = '';
+    input.focus();
+    if (!studentId) return;
+    showStatus('Sending…');
+    sendSwipe({ key: swipeKey(), student_id: studentId, ts: Date.now() });
+  });
+
+  window.addEventListener('online', flushQueue);
+  setInterval(flushQueue, 15000);
+  flushQueue();
+
+  if ('serviceWorker' in navigator) {
+    navigator.serviceWorker.register('/kiosk_sw.js')
+      .catch(err => console.warn('service worker not registered:', err.message));
+  }
+}
+
+document.addEventListener('DOMContentLoaded', initKiosk);
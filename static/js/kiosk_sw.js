@@ -0,0 +1,48 @@
+// static/js/kiosk_sw.js
+// Kiosk service worker (served at /kiosk_sw.js): keeps the station page and its assets
+// in cache so a kiosk that reloads during an outage still comes up and keeps queueing.
+// Swipes themselves never pass through here; they live in kiosk.js's IndexedDB queue.
+
+const CACHE = 'hallpass-kiosk-v1';
+const SHELL = [
+  '/static/css/style.css',
+  '/static/js/kiosk.js',
+  '/static/js/index.js',
+  '/static/js/theme.js',
+  '/static/images/icon.png'
+];
+
+self.addEventListener('install', event => {
+  event.waitUntil(caches.open(CACHE).then(c => c.addAll(SHELL)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(keys.filter(k => k !== CACHE).map(k => caches.delete(k))))
+      .then(() => self.clients.claim())
+  );
+});
+
+// Network first, last good copy when offline.
+function networkFirst(req) {
+  return fetch(req)
+    .then(res => {
+      if (res.ok) {
+        const copy = res.clone();
+        caches.open(CACHE).then(c => c.put(req, copy));
+      }
+      return res;
+    })
+    .catch(() => caches.match(req));
+}
+
+self.addEventListener('fetch', event => {
+  const req = event.request;
+  if (req.method !== 'GET') return;
+  const url = new URL(req.url);
+
+  if ((req.mode === 'navigate' && url.pathname === '/station_console') || SHELL.includes(url.pathname)) {
+    event.respondWith(networkFirst(req));
+  }
+});
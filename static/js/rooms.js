@@ -173,6 +173,24 @@ function resetRoom(room) {
     .catch(err => alert("❌ Reset failed: " + err.message));
 }
 
+// Whole building (e.g. after a fire drill): every open pass today, in one request.
+function resetAllRooms() {
+  if (!confirm("Close every open pass in every room today?")) return;
+
+  fetch('/admin_rooms/reset', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ all: true })
+  })
+    .then(res => res.json())
+    .then(data => {
+      if (data.error) throw new Error(data.error);
+      alert(`✅ Reset complete. ${data.cleared} passes cleared.`);
+      fetchRooms();
+    })
+    .catch(err => alert("❌ Reset failed: " + err.message));
+}
+
 function copyLink(room) {
   const link = `${window.location.origin}/station_view/${room}`;
   navigator.clipboard.writeText(link)
@@ -210,6 +228,61 @@ function closeAllRooms() {
 }
 
 
+// ─── Station usage: occupancy per minute + dwell histogram ──────────────────
+function fetchUsage() {
+  const day = document.getElementById('usage-date').value;
+  fetch(`/admin_rooms/usage${day ? `?date=${day}` : ''}`)
+    .then(r => r.json())
+    .then(drawUsage)
+    .catch(err => console.error("❌ usage fetch failed:", err));
+}
+
+function hhmm(minute) {
+  return `${Math.floor(minute / 60)}:${String(minute % 60).padStart(2, '0')}`;
+}
+
+function occupancyChart(s) {
+  const w = 420, h = 90, pad = 16;
+  const max = Math.max(s.capacity, s.peak_occupancy, 1);
+  const n = Math.max(s.occupancy.length - 1, 1);
+  const x = i => pad + (i / n) * (w - 2 * pad);
+  const y = v => h - pad - (v / max) * (h - 2 * pad);
+  const pts = s.occupancy.map((v, i) => `${x(i).toFixed(1)},${y(v).toFixed(1)}`).join(' ');
+  const end = s.start_minute + s.occupancy.length - 1;
+  return `<svg width="${w}" height="${h}">
+    <line x1="${pad}" x2="${w - pad}" y1="${y(s.capacity)}" y2="${y(s.capacity)}" stroke="#e74c3c" stroke-dasharray="4,3"/>
+    <polyline fill="none" stroke="#3498db" stroke-width="1.5" points="${pts}"/>
+    <text x="${pad}" y="${h - 2}" font-size="10">${hhmm(s.start_minute)}</text>
+    <text x="${w - pad}" y="${h - 2}" font-size="10" text-anchor="end">${hhmm(end)}</text>
+    <text x="${w - pad}" y="${y(s.capacity) - 3}" font-size="10" text-anchor="end" fill="#e74c3c">cap ${s.capacity}</text>
+  </svg>`;
+}
+
+function dwellBars(d) {
+  const max = Math.max(...d.counts, 1);
+  return d.bins.map((b, i) =>
+    `<div style="font-size: 0.8em;">${b.padEnd(6)} min
+       <span style="display: inline-block; height: 8px; background: #2ecc71; width: ${Math.round(120 * d.counts[i] / max)}px;"></span>
+       ${d.counts[i]}</div>`).join('');
+}
+
+function drawUsage(data) {
+  const box = document.getElementById('usage-charts');
+  if (!data.stations || !data.stations.length) {
+    box.innerHTML = `<em>No station swipes on ${data.date || 'this day'}.</em>`;
+    return;
+  }
+  box.innerHTML = data.stations.map(s => `
+    <div class="usage-card">
+      <strong>${s.station}</strong> — ${s.visits} visits, ${s.inside_now} inside now,
+      peak ${s.peak_occupancy}${s.peak_time ? ` @ ${s.peak_time}` : ''}, busiest hour ${s.busiest_hour || '-'}
+      ${occupancyChart(s)}
+      <div style="font-size: 0.85em;">dwell p50 ${s.dwell.p50 ?? '-'} / p90 ${s.dwell.p90 ?? '-'} / max ${s.dwell.max ?? '-'} min</div>
+      ${dwellBars(s.dwell)}
+    </div>`).join('');
+}
+
 
-window.onload = fetchRooms;
+window.onload = () => { fetchRooms(); fetchUsage(); };
 setInterval(fetchRooms, 5000);
+setInterval(fetchUsage, 60000);
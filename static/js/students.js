@@ -0,0 +1,54 @@
+// static/js/students.js
+// Student roster page: pages rows in from /students/directory and filters them as
+// you type (ID, name, or any word of the name).
+
+const PAGE_SIZE = 100;
+
+let query = '';
+let cursor = null;
+let requestSeq = 0;
+
+/* ----------------------------------------------------------
+   Section: Rows
+---------------------------------------------------------- */
+function studentRow(s) {
+  const tr = document.createElement('tr');
+  const periods = Object.entries(s.periods).map(([p, room]) => `${p}: ${room}`).join(', ');
+  [s.id, s.name, periods].forEach(text => {
+    const td = document.createElement('td');
+    td.textContent = text;
+    tr.appendChild(td);
+  });
+  return tr;
+}
+
+// Fetch the next page (append) or restart from the top for a new query.
+function loadStudents(append) {
+  const tbody = document.getElementById('student-rows');
+  const more = document.getElementById('student-more');
+  const seq = ++requestSeq;
+  const params = new URLSearchParams({ q: query, limit: PAGE_SIZE });
+  if (append && cursor) params.set('after', cursor);
+
+  fetch(`/students/directory?${params}`)
+    .then(res => res.json())
+    .then(data => {
+      if (seq !== requestSeq) return;   // a newer keystroke already asked
+      if (!append) tbody.innerHTML = '';
+      data.students.forEach(s => tbody.appendChild(studentRow(s)));
+      cursor = data.next;
+      more.hidden = !data.next;
+    });
+}
+
+/* ----------------------------------------------------------
+   Section: Initialization
+---------------------------------------------------------- */
+document.addEventListener('DOMContentLoaded', () => {
+  document.getElementById('student-search').addEventListener('input', e => {
+    query = e.target.value.trim();
+    loadStudents(false);
+  });
+  document.getElementById('student-more').addEventListener('click', () => loadStudents(true));
+  loadStudents(false);
+});
@@ -8,7 +8,7 @@ _app = None
 def get_app():
     global _app
     if _app is None:
-        _app = create_app()
+        _app = create_app({"HALLPASS_BACKGROUND": True})
     return _app
 
 # Optional: enable standalone run